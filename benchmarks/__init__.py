@@ -0,0 +1,6 @@
+"""Benchmarks of loading, querying, filtering and displaying the movie data.
+
+generate.py scales the csv files in database_files/ up, and run.py times the app's
+database and model code against them and writes the timings as JSON. See the
+Benchmarks section of the README.
+"""
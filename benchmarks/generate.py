@@ -0,0 +1,106 @@
+"""Scale the csv files in database_files/ up by a whole factor.
+
+Copy k of every movie, actor, director and production company gets its id shifted
+by k times the table's largest id plus one, and copy k of every junction row links
+copy k of its movie to copy k of its people and companies. Every movie therefore
+keeps its number of genres, cast, subtitles and so on, and every actor their number
+of movies, so the fan-out distributions and foreign keys match the original data.
+Lookup tables (genres, languages, countries, awards) are copied unchanged.
+
+Usage: python -m benchmarks.generate SCALE [OUTPUT_DIR]
+"""
+import csv
+import os
+import sys
+
+SOURCE_DIRS = ("database_files/parent_tables", "database_files/dependent_tables")
+OUTPUT_ROOT = "benchmarks/data"
+
+# tables copied once per scale step, with their id column and name column
+SCALED_TABLES = {
+    'movie': ('movie_id', 'title'),
+    'actor': ('actor_id', 'actor_name'),
+    'director': ('director_id', 'director_name'),
+    'production_company': ('company_id', 'company_name'),
+}
+
+def output_dir(scale):
+    return os.path.join(OUTPUT_ROOT, f"x{scale}")
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return header, list(reader)
+
+def strides(source_dirs=SOURCE_DIRS):
+    """{id column: amount copy k shifts it by per step}"""
+    result = {}
+    for source_dir in source_dirs:
+        for table, (id_column, _) in SCALED_TABLES.items():
+            path = os.path.join(source_dir, table + ".csv")
+            if os.path.exists(path):
+                header, rows = read_csv(path)
+                position = header.index(id_column)
+                result[id_column] = max(int(row[position]) for row in rows) + 1
+    return result
+
+def scale_table(header, rows, copies, steps, name_column=None):
+    """Yield the rows of every copy with the id columns shifted and names made distinct"""
+    shifted = [(position, steps[column]) for position, column in enumerate(header) if column in steps]
+    name = header.index(name_column) if name_column else None
+    for copy in range(copies):
+        for row in rows:
+            if copy:
+                row = list(row)
+                for position, step in shifted:
+                    row[position] = str(int(row[position]) + copy * step)
+                if name is not None:
+                    row[name] = f"{row[name]} #{copy}"
+            yield row
+
+def generate(scale, destination=None, source_dirs=SOURCE_DIRS):
+    """Write scale copies of the csv files under destination; returns {table: rows written}"""
+    destination = destination or output_dir(scale)
+    steps = strides(source_dirs)
+    counts = {}
+    for source_dir in source_dirs:
+        target_dir = os.path.join(destination, os.path.basename(source_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for file_name in sorted(os.listdir(source_dir)):
+            if not file_name.endswith(".csv"):
+                continue
+            table = os.path.splitext(file_name)[0]
+            header, rows = read_csv(os.path.join(source_dir, file_name))
+            id_columns = {column: step for column, step in steps.items() if column in header}
+            # junction tables all have a movie_id; lookup tables are copied once
+            copies = scale if table in SCALED_TABLES or "movie_id" in header else 1
+            name_column = SCALED_TABLES[table][1] if table in SCALED_TABLES else None
+            with open(os.path.join(target_dir, file_name), "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                count = 0
+                for row in scale_table(header, rows, copies, id_columns, name_column):
+                    writer.writerow(row)
+                    count += 1
+            counts[table] = count
+    return counts
+
+def data_dirs(scale):
+    """The csv directories for a scale, generating them first if they don't exist"""
+    if scale == 1:
+        return list(SOURCE_DIRS)
+    destination = output_dir(scale)
+    dirs = [os.path.join(destination, os.path.basename(source_dir)) for source_dir in SOURCE_DIRS]
+    if not all(os.path.isdir(directory) for directory in dirs):
+        generate(scale, destination)
+    return dirs
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    scale = int(sys.argv[1])
+    counts = generate(scale, sys.argv[2] if len(sys.argv) > 2 else None)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
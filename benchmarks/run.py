@@ -0,0 +1,197 @@
+"""Time the app's database and model code on the movie data, scaled up by generate.py.
+
+Runs without a display. The database is rebuilt from scratch, either in an SQLite
+file or in a separate MySQL database (BENCH_DATABASE), never the app's own. The
+Qt model steps are skipped if PyQt5 isn't installed.
+
+Usage: python -m benchmarks.run [--scale N] [--backend sqlite|mysql] [--repeat N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import tempfile
+import time
+
+from benchmarks import generate
+from src.classes import sql_controller
+from src.classes.filter_builder import FILTER_FIELDS, TEXT
+from src.check_indexes import SAMPLE_FILTERS, view_queries
+
+BENCH_DATABASE = "moviedb_bench"
+SQLITE_PATH = "benchmarks/data/bench.sqlite3"
+RESULTS_DIR = "benchmarks/results"
+# data() calls timed per model, so large scales don't take minutes
+MAX_CELLS = 500000
+
+class Suite:
+    """Collects timings as dicts ready for JSON"""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def time(self, group, name, fn, repeat=None, count=None):
+        """Run fn repeat times; count(result) is the number of items it handled, for a rate"""
+        seconds = []
+        result = None
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            result = fn()
+            seconds.append(time.perf_counter() - start)
+        entry = {"group": group, "name": name, "seconds": seconds,
+                 "min": min(seconds), "median": statistics.median(seconds)}
+        if count is not None:
+            items = count(result)
+            entry["items"] = items
+            entry["items_per_second"] = items / entry["median"] if entry["median"] > 0 else None
+        self.results.append(entry)
+        print(f"{group:<8} {name:<45} median {entry['median'] * 1000:>10.2f}ms"
+              + (f"  {entry['items']:>10} items" if count is not None else ""))
+        return result
+
+    def skip(self, group, reason):
+        self.results.append({"group": group, "skipped": reason})
+        print(f"{group:<8} skipped: {reason}")
+
+def use_database(backend):
+    """Point sql_controller at the benchmark database and return the schema file to create it with"""
+    if backend == "sqlite":
+        sql_controller.use_backend("sqlite", SQLITE_PATH)
+        return None
+    sql_controller.use_backend("mysql")
+    sql_controller.DB_NAME = BENCH_DATABASE
+    # movie_ddl.sql drops and creates moviedb by name
+    with open(sql_controller.get_backend().schema_file) as file:
+        script = re.sub(r"\bmoviedb\b", BENCH_DATABASE, file.read())
+    schema = tempfile.NamedTemporaryFile("w", suffix=".sql", delete=False)
+    with schema:
+        schema.write(script)
+    return schema.name
+
+def bench_load(suite, csv_dirs, schema_file):
+    rows = sum(_csv_rows(os.path.join(directory, name))
+               for directory in csv_dirs for name in os.listdir(directory) if name.endswith(".csv"))
+    if not sql_controller.create_database(schema_file):
+        raise RuntimeError("could not create the benchmark database")
+    # loop_csv does the same for a single directory
+    loaded = suite.time("load", "load_csv_dirs", lambda: sql_controller.load_csv_dirs(csv_dirs),
+                        repeat=1, count=lambda ok: rows)
+    if not loaded:
+        raise RuntimeError("loading the csv files failed")
+
+def bench_views(suite):
+    rows = {}
+    for view, query in view_queries().items():
+        rows[view] = suite.time("view", view, lambda: sql_controller.query_data(query, use_cache=False),
+                                count=len)
+    return rows
+
+def bench_filters(suite, view_rows):
+    """Every filter field on its own, with a value taken from the view's rows for text fields"""
+    for view, fields in FILTER_FIELDS.items():
+        sample = view_rows.get(view) or [{}]
+        for field in fields:
+            if field.kind == TEXT:
+                value = next((row[field.name] for row in sample if row.get(field.name)), None)
+                if value is None:
+                    continue
+                # the first of a comma separated list, e.g. one of a movie's genres
+                value = str(value).split(", ")[0]
+            else:
+                value = SAMPLE_FILTERS[field.kind]
+            query, params = sql_controller.filter_builder.build_query(view, {field.name: value})
+            suite.time("filter", f"{view}.{field.name} = {value!r}",
+                       lambda: sql_controller.query_data(query, params=params, use_cache=False), count=len)
+
+def bench_models(suite, view_rows):
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtCore import Qt
+        from src.classes.mysql_model import MySQLModel
+        from src.classes.table_proxy import TableProxyModel
+    except ImportError as e:
+        suite.skip("model", f"PyQt5 is not available ({e})")
+        return
+    for view, rows in view_rows.items():
+        if not rows:
+            continue
+        model = suite.time("model", f"{view} MySQLModel()", lambda: MySQLModel(rows), count=lambda _: len(rows))
+        suite.time("model", f"{view} data()", lambda: _read_cells(model, Qt.DisplayRole), count=lambda cells: cells)
+
+        proxy = TableProxyModel()
+        proxy.setSourceModel(model)
+        # the first search also builds the trigram index
+        suite.time("proxy", f"{view} first search", lambda: _search(proxy, "an"), repeat=1, count=lambda n: n)
+        for text in ("an", "the", "zzz"):
+            suite.time("proxy", f"{view} search {text!r}", lambda: _search(proxy, text), count=lambda n: n)
+        _search(proxy, "")
+        for column in range(model.columnCount()):
+            name = model.getColumnNames()[column]
+            if name.endswith("_id"):
+                continue
+            # once: later sorts of the same column are answered from the model's cache
+            suite.time("proxy", f"{view} sort {name}", lambda: proxy.sort(column, Qt.AscendingOrder),
+                       repeat=1, count=lambda _: proxy.rowCount())
+        proxy.sort(-1)
+
+def _read_cells(model, role):
+    columns = model.columnCount()
+    rows = min(model.rowCount(), max(1, MAX_CELLS // max(columns, 1)))
+    for row in range(rows):
+        for column in range(columns):
+            model.data(model.index(row, column), role)
+    return rows * columns
+
+def _search(proxy, text):
+    proxy.setFilterFixedString(text)
+    return proxy.rowCount()
+
+def _csv_rows(path):
+    with open(path, "rb") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time loading, views, filters, models and proxies.")
+    parser.add_argument("--scale", type=int, default=1, help="copies of the csv data, e.g. 10, 100 or 1000")
+    parser.add_argument("--backend", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each timed step")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/...)")
+    args = parser.parse_args(argv)
+
+    commit = _commit()
+    suite = Suite(args.repeat)
+    csv_dirs = generate.data_dirs(args.scale)
+    schema_file = use_database(args.backend)
+    try:
+        bench_load(suite, csv_dirs, schema_file)
+        view_rows = bench_views(suite)
+        bench_filters(suite, view_rows)
+        bench_models(suite, view_rows)
+    finally:
+        sql_controller.close_pool()
+        if schema_file:
+            os.remove(schema_file)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{(commit or 'unknown')[:12]}-{args.backend}-x{args.scale}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "backend": args.backend,
+                   "scale": args.scale, "repeat": args.repeat, "python": platform.python_version(),
+                   "platform": platform.platform(), "results": suite.results}, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,15 @@ CREATE TABLE `movie` (
   `release_year` varchar(50) NOT NULL,
   `runtime` int NOT NULL,
   `age_rating` varchar(50) NOT NULL,
-  `rating` float NOT NULL
+  `rating` float NOT NULL,
+  FULLTEXT KEY `ft_movie_title` (`title`),
+  -- equality, prefix and range filters (see filter_builder.py)
+  KEY `idx_movie_title` (`title`),
+  KEY `idx_movie_budget` (`budget`),
+  KEY `idx_movie_revenue` (`revenue`),
+  KEY `idx_movie_release_year` (`release_year`),
+  KEY `idx_movie_runtime` (`runtime`),
+  KEY `idx_movie_rating` (`rating`)
 );
 
 CREATE TABLE `watchlists` (
@@ -29,7 +37,8 @@ CREATE TABLE `watchlist_entries` (
   `watchlist_id` int NOT NULL,
   `rating` int,
   `comment` varchar(300),
-  `last_edited` datetime,
+  -- microseconds, so two edits within a second still tell a stale copy from a current one
+  `last_edited` datetime(6),
   PRIMARY KEY (movie_id, watchlist_id),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`watchlist_id`) REFERENCES `watchlists` (`watchlist_id`)
@@ -37,12 +46,15 @@ CREATE TABLE `watchlist_entries` (
 
 CREATE TABLE `genre` (
   `genre_id` int PRIMARY KEY NOT NULL,
-  `genre_name` varchar(50) NOT NULL
+  `genre_name` varchar(50) NOT NULL,
+  FULLTEXT KEY `ft_genre_name` (`genre_name`)
 );
 
 CREATE TABLE `movie_genre` (
   `genre_id` int NOT NULL,
   `movie_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `genre_id`),
+  KEY `idx_movie_genre_genre` (`genre_id`, `movie_id`),
   FOREIGN KEY (`genre_id`) REFERENCES `genre` (`genre_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`)
 );
@@ -55,6 +67,8 @@ CREATE TABLE `language` (
 CREATE TABLE `movie_subtitle` (
   `movie_id` int NOT NULL,
   `language_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `language_id`),
+  KEY `idx_movie_subtitle_language` (`language_id`, `movie_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`language_id`) REFERENCES `language` (`language_id`)
 );
@@ -62,6 +76,8 @@ CREATE TABLE `movie_subtitle` (
 CREATE TABLE `movie_audio` (
   `movie_id` int NOT NULL,
   `language_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `language_id`),
+  KEY `idx_movie_audio_language` (`language_id`, `movie_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`language_id`) REFERENCES `language` (`language_id`)
 );
@@ -77,6 +93,8 @@ CREATE TABLE `country` (
 CREATE TABLE `movie_country` (
   `movie_id` int NOT NULL,
   `country_id` varchar(3) NOT NULL,
+  PRIMARY KEY (`movie_id`, `country_id`),
+  KEY `idx_movie_country_country` (`country_id`, `movie_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`country_id`) REFERENCES `country` (`country_id`)
 );
@@ -85,12 +103,16 @@ CREATE TABLE `production_company` (
   `company_id` int PRIMARY KEY NOT NULL,
   `company_name` varchar(255) NOT NULL,
   `total_movies_produced` int NOT NULL,
-  `date_established` datetime NOT NULL
+  `date_established` datetime NOT NULL,
+  FULLTEXT KEY `ft_company_name` (`company_name`),
+  KEY `idx_company_name` (`company_name`)
 );
 
 CREATE TABLE `movie_company` (
   `movie_id` int NOT NULL,
   `company_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `company_id`),
+  KEY `idx_movie_company_company` (`company_id`, `movie_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`company_id`) REFERENCES `production_company` (`company_id`)
 );
@@ -100,7 +122,9 @@ CREATE TABLE `actor` (
   `actor_name` varchar(50) NOT NULL,
   `gender` varchar(50) NOT NULL,
   `date_of_birth` datetime NOT NULL,
-  `country` varchar(50) NOT NULL
+  `country` varchar(50) NOT NULL,
+  FULLTEXT KEY `ft_actor_name` (`actor_name`),
+  KEY `idx_actor_name` (`actor_name`)
 );
 
 CREATE TABLE `director` (
@@ -108,13 +132,18 @@ CREATE TABLE `director` (
   `director_name` varchar(50) NOT NULL,
   `gender` varchar(10) NOT NULL,
   `date_of_birth` datetime NOT NULL,
-  `country` varchar(50) NOT NULL
+  `country` varchar(50) NOT NULL,
+  FULLTEXT KEY `ft_director_name` (`director_name`),
+  KEY `idx_director_name` (`director_name`)
 );
 
 CREATE TABLE `movie_cast` (
   `movie_id` int NOT NULL,
   `actor_id` int NOT NULL,
   `director_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `actor_id`, `director_id`),
+  KEY `idx_movie_cast_actor` (`actor_id`, `movie_id`),
+  KEY `idx_movie_cast_director` (`director_id`, `movie_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`actor_id`) REFERENCES `actor` (`actor_id`),
   FOREIGN KEY (`director_id`) REFERENCES `director` (`director_id`)
@@ -123,99 +152,82 @@ CREATE TABLE `movie_cast` (
 CREATE TABLE `awards` (
   `award_id` int PRIMARY KEY NOT NULL,
   `category` varchar(255) NOT NULL,
-  `organization` varchar(50) NOT NULL
+  `organization` varchar(50) NOT NULL,
+  FULLTEXT KEY `ft_awards_category` (`category`, `organization`)
 );
 
 CREATE TABLE `movie_awards` (
   `movie_id` int NOT NULL,
   `award_id` int NOT NULL,
   `award_year` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `award_id`, `award_year`),
+  KEY `idx_movie_awards_award` (`award_id`, `movie_id`),
   FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
   FOREIGN KEY (`award_id`) REFERENCES `awards` (`award_id`)
 );
 
 
+-- Materialized copy of the movie aggregate, one row per movie (and director).
+-- Kept current by refresh_movie_summary and the junction and parent table triggers below.
+CREATE TABLE `movie_summary` (
+  `movie_id` int NOT NULL,
+  `title` varchar(255) NOT NULL,
+  `budget` bigint NOT NULL,
+  `revenue` bigint NOT NULL,
+  `release_year` varchar(50) NOT NULL,
+  `runtime` int NOT NULL,
+  `age_rating` varchar(50) NOT NULL,
+  `rating` float NOT NULL,
+  `award_count` bigint,
+  `genres` text,
+  `sub_language` text,
+  `actor_id` int,
+  `star` varchar(50),
+  `director_id` int,
+  `director_name` varchar(50),
+  `company_id` int,
+  `production_company` varchar(255),
+  `country_name` varchar(50),
+  KEY `idx_movie_summary_movie` (`movie_id`),
+  KEY `idx_movie_summary_director` (`director_id`)
+);
+
+-- One row per table, bumped by the data_version triggers below on every write.
+-- Clients compare versions to tell whether data they saved locally is still current.
+-- The '*' row is random per database, so versions from a recreated database never match old ones.
+CREATE TABLE `data_version` (
+  `table_name` varchar(64) PRIMARY KEY NOT NULL,
+  `version` bigint unsigned NOT NULL DEFAULT 0
+);
+
+INSERT INTO data_version (table_name, version) VALUES ('*', UUID_SHORT()), ('movie', 0), ('watchlists', 0), ('watchlist_entries', 0), ('genre', 0), ('movie_genre', 0), ('language', 0), ('movie_subtitle', 0), ('movie_audio', 0), ('country', 0), ('movie_country', 0), ('production_company', 0), ('movie_company', 0), ('actor', 0), ('director', 0), ('movie_cast', 0), ('awards', 0), ('movie_awards', 0);
+
+
 -- VIEWS DECLARATION
 
 CREATE OR REPLACE VIEW movie_view AS 
 SELECT
-    m.movie_id,
- m.title,
- m.budget,
- m.revenue,
- m.release_year,
- m.runtime,
- m.age_rating,
- m.rating,
-    ma.award_count,
- GROUP_CONCAT(DISTINCT g.genre_name SEPARATOR ', ') AS genres,
-    GROUP_CONCAT(DISTINCT s.subtitle_language SEPARATOR ', ') as sub_language,
-    MIN(a.actor_id) as actor_id,
-    MIN(a.star) as star,
-    a.director_id,
-    a.director_name,
-    MIN(p.company_id) as company_id,
-    MIN(p.production_company) as production_company,
-    MIN(c.country_name) as country_name
+    movie_id,
+    title,
+    budget,
+    revenue,
+    release_year,
+    runtime,
+    age_rating,
+    rating,
+    award_count,
+    genres,
+    sub_language,
+    actor_id,
+    star,
+    director_id,
+    director_name,
+    company_id,
+    production_company,
+    country_name
 FROM
-    movie AS m 
-LEFT OUTER JOIN 
-    (SELECT movie_id, COUNT(*) AS award_count 
-     FROM movie_awards 
-     GROUP BY movie_id) AS ma 
-ON 
-    m.movie_id = ma.movie_id
-LEFT OUTER JOIN
- (SELECT movie_id, genre_name
-    FROM genre
-    JOIN movie_genre
-    ON genre.genre_id = movie_genre.genre_id) as g
-ON 
- m.movie_id = g.movie_id
-LEFT OUTER JOIN
- (SELECT movie_id, language_name as subtitle_language
-    FROM movie_subtitle
-    JOIN language
-    ON movie_subtitle.language_id = language.language_id) as s
-ON
- m.movie_id = s.movie_id
-LEFT OUTER JOIN
- (SELECT movie_id, actor.actor_id, actor.actor_name AS star, director.director_id, director.director_name
-    FROM movie_cast
-    JOIN actor
-    ON actor.actor_id = movie_cast.actor_id
-    JOIN director
-    ON movie_cast.director_id = director.director_id) as a
-ON
- m.movie_id = a.movie_id
-LEFT OUTER JOIN
- (SELECT movie_id, production_company.company_id, company_name AS production_company
-    FROM movie_company
-    JOIN production_company
-    ON movie_company.company_id = production_company.company_id) as p
-ON
- m.movie_id = p.movie_id
-LEFT OUTER JOIN
- (SELECT movie_id, country_name
-    FROM movie_country
-    JOIN country
-    ON movie_country.country_id = country.country_id) as c
-ON
- m.movie_id = c.movie_id
-    
-GROUP BY 
-    m.movie_id,
- m.title,
- m.budget,
- m.revenue,
- m.release_year,
- m.runtime,
- m.age_rating,
- m.rating,
-    ma.award_count,
-    a.director_id,
-    a.director_name;
-    
+    movie_summary;
+
 CREATE OR REPLACE VIEW actor_view AS
 SELECT
  a.actor_id,
@@ -308,6 +320,384 @@ END //
 
 DELIMITER ;
 
+-- Rebuild movie_summary rows for one movie, or for every movie when p_movie_id is NULL.
+-- Every derived table is narrowed to the movie first, so a single refresh only reads that movie's rows.
+DELIMITER $$
+
+CREATE PROCEDURE refresh_movie_summary(IN p_movie_id INT)
+BEGIN
+    DELETE FROM movie_summary WHERE p_movie_id IS NULL OR movie_id = p_movie_id;
+
+    INSERT INTO movie_summary
+    SELECT
+        m.movie_id,
+        m.title,
+        m.budget,
+        m.revenue,
+        m.release_year,
+        m.runtime,
+        m.age_rating,
+        m.rating,
+        ma.award_count,
+        GROUP_CONCAT(DISTINCT g.genre_name SEPARATOR ', ') AS genres,
+        GROUP_CONCAT(DISTINCT s.subtitle_language SEPARATOR ', ') as sub_language,
+        MIN(a.actor_id) as actor_id,
+        MIN(a.star) as star,
+        a.director_id,
+        a.director_name,
+        MIN(p.company_id) as company_id,
+        MIN(p.production_company) as production_company,
+        MIN(c.country_name) as country_name
+    FROM
+        movie AS m
+    LEFT OUTER JOIN
+        (SELECT movie_id, COUNT(*) AS award_count
+         FROM movie_awards
+         WHERE p_movie_id IS NULL OR movie_id = p_movie_id
+         GROUP BY movie_id) AS ma
+    ON
+        m.movie_id = ma.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, genre_name
+         FROM genre
+         JOIN movie_genre
+         ON genre.genre_id = movie_genre.genre_id
+         WHERE p_movie_id IS NULL OR movie_id = p_movie_id) as g
+    ON
+        m.movie_id = g.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, language_name as subtitle_language
+         FROM movie_subtitle
+         JOIN language
+         ON movie_subtitle.language_id = language.language_id
+         WHERE p_movie_id IS NULL OR movie_id = p_movie_id) as s
+    ON
+        m.movie_id = s.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, actor.actor_id, actor.actor_name AS star, director.director_id, director.director_name
+         FROM movie_cast
+         JOIN actor
+         ON actor.actor_id = movie_cast.actor_id
+         JOIN director
+         ON movie_cast.director_id = director.director_id
+         WHERE p_movie_id IS NULL OR movie_id = p_movie_id) as a
+    ON
+        m.movie_id = a.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, production_company.company_id, company_name AS production_company
+         FROM movie_company
+         JOIN production_company
+         ON movie_company.company_id = production_company.company_id
+         WHERE p_movie_id IS NULL OR movie_id = p_movie_id) as p
+    ON
+        m.movie_id = p.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, country_name
+         FROM movie_country
+         JOIN country
+         ON movie_country.country_id = country.country_id
+         WHERE p_movie_id IS NULL OR movie_id = p_movie_id) as c
+    ON
+        m.movie_id = c.movie_id
+    WHERE
+        p_movie_id IS NULL OR m.movie_id = p_movie_id
+    GROUP BY
+        m.movie_id,
+        m.title,
+        m.budget,
+        m.revenue,
+        m.release_year,
+        m.runtime,
+        m.age_rating,
+        m.rating,
+        ma.award_count,
+        a.director_id,
+        a.director_name;
+END$$
+
+DELIMITER ;
+
+
+-- Triggers which keep movie_summary current. Bulk loads set @skip_summary_refresh
+-- and call refresh_movie_summary(NULL) once at the end instead.
+DELIMITER $$
+
+CREATE TRIGGER movie_summary_movie_insert AFTER INSERT ON movie
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_summary_movie_update AFTER UPDATE ON movie
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_summary_movie_delete AFTER DELETE ON movie
+FOR EACH ROW
+BEGIN
+    DELETE FROM movie_summary WHERE movie_id = OLD.movie_id;
+END$$
+
+CREATE TRIGGER movie_genre_summary_insert AFTER INSERT ON movie_genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_genre_summary_update AFTER UPDATE ON movie_genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN
+        CALL refresh_movie_summary(NEW.movie_id);
+        IF OLD.movie_id <> NEW.movie_id THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER movie_genre_summary_delete AFTER DELETE ON movie_genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_subtitle_summary_insert AFTER INSERT ON movie_subtitle
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_subtitle_summary_update AFTER UPDATE ON movie_subtitle
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN
+        CALL refresh_movie_summary(NEW.movie_id);
+        IF OLD.movie_id <> NEW.movie_id THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER movie_subtitle_summary_delete AFTER DELETE ON movie_subtitle
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_cast_summary_insert AFTER INSERT ON movie_cast
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_cast_summary_update AFTER UPDATE ON movie_cast
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN
+        CALL refresh_movie_summary(NEW.movie_id);
+        IF OLD.movie_id <> NEW.movie_id THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER movie_cast_summary_delete AFTER DELETE ON movie_cast
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_company_summary_insert AFTER INSERT ON movie_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_company_summary_update AFTER UPDATE ON movie_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN
+        CALL refresh_movie_summary(NEW.movie_id);
+        IF OLD.movie_id <> NEW.movie_id THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER movie_company_summary_delete AFTER DELETE ON movie_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_country_summary_insert AFTER INSERT ON movie_country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_country_summary_update AFTER UPDATE ON movie_country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN
+        CALL refresh_movie_summary(NEW.movie_id);
+        IF OLD.movie_id <> NEW.movie_id THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER movie_country_summary_delete AFTER DELETE ON movie_country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_awards_summary_insert AFTER INSERT ON movie_awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(NEW.movie_id); END IF;
+END$$
+
+CREATE TRIGGER movie_awards_summary_update AFTER UPDATE ON movie_awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN
+        CALL refresh_movie_summary(NEW.movie_id);
+        IF OLD.movie_id <> NEW.movie_id THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER movie_awards_summary_delete AFTER DELETE ON movie_awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summary(OLD.movie_id); END IF;
+END$$
+
+-- Refresh the movie_summary rows of every movie linked to one genre, language, actor, director,
+-- production company, country or award. movie_summary holds copies of their names, so
+-- renaming one changes movies that none of the junction table triggers above see.
+CREATE PROCEDURE refresh_movie_summaries_of(IN p_table VARCHAR(64), IN p_id VARCHAR(64))
+BEGIN
+    DECLARE done INT DEFAULT FALSE;
+    DECLARE v_movie_id INT;
+    DECLARE movies CURSOR FOR
+        SELECT movie_id FROM movie_genre WHERE p_table = 'genre' AND genre_id = p_id
+        UNION SELECT movie_id FROM movie_subtitle WHERE p_table = 'language' AND language_id = p_id
+        UNION SELECT movie_id FROM movie_cast WHERE p_table = 'actor' AND actor_id = p_id
+        UNION SELECT movie_id FROM movie_cast WHERE p_table = 'director' AND director_id = p_id
+        UNION SELECT movie_id FROM movie_company WHERE p_table = 'production_company' AND company_id = p_id
+        UNION SELECT movie_id FROM movie_country WHERE p_table = 'country' AND country_id = p_id
+        UNION SELECT movie_id FROM movie_awards WHERE p_table = 'awards' AND award_id = p_id;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET done = TRUE;
+    OPEN movies;
+    refresh_loop: LOOP
+        FETCH movies INTO v_movie_id;
+        IF done THEN LEAVE refresh_loop; END IF;
+        CALL refresh_movie_summary(v_movie_id);
+    END LOOP;
+    CLOSE movies;
+END$$
+
+CREATE TRIGGER genre_summary_update AFTER UPDATE ON genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.genre_id <=> NEW.genre_id AND OLD.genre_name <=> NEW.genre_name) THEN
+        CALL refresh_movie_summaries_of('genre', NEW.genre_id);
+        IF OLD.genre_id <> NEW.genre_id THEN CALL refresh_movie_summaries_of('genre', OLD.genre_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER genre_summary_delete AFTER DELETE ON genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('genre', OLD.genre_id); END IF;
+END$$
+
+CREATE TRIGGER language_summary_update AFTER UPDATE ON language
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.language_id <=> NEW.language_id AND OLD.language_name <=> NEW.language_name) THEN
+        CALL refresh_movie_summaries_of('language', NEW.language_id);
+        IF OLD.language_id <> NEW.language_id THEN CALL refresh_movie_summaries_of('language', OLD.language_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER language_summary_delete AFTER DELETE ON language
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('language', OLD.language_id); END IF;
+END$$
+
+CREATE TRIGGER actor_summary_update AFTER UPDATE ON actor
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.actor_id <=> NEW.actor_id AND OLD.actor_name <=> NEW.actor_name) THEN
+        CALL refresh_movie_summaries_of('actor', NEW.actor_id);
+        IF OLD.actor_id <> NEW.actor_id THEN CALL refresh_movie_summaries_of('actor', OLD.actor_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER actor_summary_delete AFTER DELETE ON actor
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('actor', OLD.actor_id); END IF;
+END$$
+
+CREATE TRIGGER director_summary_update AFTER UPDATE ON director
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.director_id <=> NEW.director_id AND OLD.director_name <=> NEW.director_name) THEN
+        CALL refresh_movie_summaries_of('director', NEW.director_id);
+        IF OLD.director_id <> NEW.director_id THEN CALL refresh_movie_summaries_of('director', OLD.director_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER director_summary_delete AFTER DELETE ON director
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('director', OLD.director_id); END IF;
+END$$
+
+CREATE TRIGGER production_company_summary_update AFTER UPDATE ON production_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.company_id <=> NEW.company_id AND OLD.company_name <=> NEW.company_name) THEN
+        CALL refresh_movie_summaries_of('production_company', NEW.company_id);
+        IF OLD.company_id <> NEW.company_id THEN CALL refresh_movie_summaries_of('production_company', OLD.company_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER production_company_summary_delete AFTER DELETE ON production_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('production_company', OLD.company_id); END IF;
+END$$
+
+CREATE TRIGGER country_summary_update AFTER UPDATE ON country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.country_id <=> NEW.country_id AND OLD.country_name <=> NEW.country_name) THEN
+        CALL refresh_movie_summaries_of('country', NEW.country_id);
+        IF OLD.country_id <> NEW.country_id THEN CALL refresh_movie_summaries_of('country', OLD.country_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER country_summary_delete AFTER DELETE ON country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('country', OLD.country_id); END IF;
+END$$
+
+CREATE TRIGGER awards_summary_update AFTER UPDATE ON awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL AND NOT (OLD.award_id <=> NEW.award_id) THEN
+        CALL refresh_movie_summaries_of('awards', NEW.award_id);
+        IF OLD.award_id <> NEW.award_id THEN CALL refresh_movie_summaries_of('awards', OLD.award_id); END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER awards_summary_delete AFTER DELETE ON awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN CALL refresh_movie_summaries_of('awards', OLD.award_id); END IF;
+END$$
+
+DELIMITER ;
+
 -- Trigger to update last_edited on a watchlist_entry row when the row is modified
 
 DELIMITER $$ 
@@ -315,45 +705,85 @@ CREATE TRIGGER update_watchlist_entry_last_edited
 BEFORE UPDATE ON watchlist_entries 
 FOR EACH ROW 
 BEGIN 
-SET NEW.last_edited = NOW(); 
+SET NEW.last_edited = NOW(6); 
 END$$ 
 DELIMITER ;
 
 
--- Search procedure which returns all records where an attribute value matches a given string for a given view
+-- Search procedure which returns the max_rows best matches of a FULLTEXT boolean-mode query for a given view,
+-- ranked by relevance. The text columns are matched on the base tables so the FULLTEXT indexes are used.
+-- A movie matches when its title, one of its genres, actors or directors, or one of its production
+-- companies matches every word; its relevance is that of its best match.
 DELIMITER $$
 
 CREATE PROCEDURE search_view(
-	IN view_name VARCHAR(255), 
-	IN search_value VARCHAR(255) 
+	IN view_name VARCHAR(64),
+	IN search_value VARCHAR(255),
+	IN max_rows INT
 )
 BEGIN
-	SET @column_query = CONCAT(
-    	'SELECT GROUP_CONCAT(COLUMN_NAME)
-     	FROM INFORMATION_SCHEMA.COLUMNS
-     	WHERE TABLE_NAME = ''', view_name, '''
-     	AND TABLE_SCHEMA = DATABASE()'
-	);
-
-	
-	PREPARE stmt1 FROM @column_query;
-	EXECUTE stmt1;
-	DEALLOCATE PREPARE stmt1;
-
-	
-	SET @columns = (SELECT GROUP_CONCAT(COLUMN_NAME)
-                	FROM INFORMATION_SCHEMA.COLUMNS
-                	WHERE TABLE_NAME = view_name AND TABLE_SCHEMA = DATABASE());
-
-	
-	SET @search_query = CONCAT(
-    	'SELECT * FROM ', view_name, '
-     	WHERE CONCAT_WS('', '', ', @columns, ') LIKE ''%', search_value, '%'''
-	);
-
-	PREPARE stmt2 FROM @search_query;
-	EXECUTE stmt2;
-	DEALLOCATE PREPARE stmt2;
+	CASE view_name
+	WHEN 'movie_view' THEN
+		SELECT v.*, found.relevance
+		FROM (
+			SELECT movie_id, MAX(relevance) AS relevance
+			FROM (
+				SELECT m.movie_id, MATCH(m.title) AGAINST (search_value IN BOOLEAN MODE) AS relevance
+				FROM movie AS m
+				WHERE MATCH(m.title) AGAINST (search_value IN BOOLEAN MODE)
+				UNION ALL
+				SELECT mg.movie_id, MATCH(g.genre_name) AGAINST (search_value IN BOOLEAN MODE)
+				FROM genre AS g JOIN movie_genre AS mg ON mg.genre_id = g.genre_id
+				WHERE MATCH(g.genre_name) AGAINST (search_value IN BOOLEAN MODE)
+				UNION ALL
+				SELECT mc.movie_id, MATCH(a.actor_name) AGAINST (search_value IN BOOLEAN MODE)
+				FROM actor AS a JOIN movie_cast AS mc ON mc.actor_id = a.actor_id
+				WHERE MATCH(a.actor_name) AGAINST (search_value IN BOOLEAN MODE)
+				UNION ALL
+				SELECT mc.movie_id, MATCH(d.director_name) AGAINST (search_value IN BOOLEAN MODE)
+				FROM director AS d JOIN movie_cast AS mc ON mc.director_id = d.director_id
+				WHERE MATCH(d.director_name) AGAINST (search_value IN BOOLEAN MODE)
+				UNION ALL
+				SELECT mc.movie_id, MATCH(p.company_name) AGAINST (search_value IN BOOLEAN MODE)
+				FROM production_company AS p JOIN movie_company AS mc ON mc.company_id = p.company_id
+				WHERE MATCH(p.company_name) AGAINST (search_value IN BOOLEAN MODE)
+			) AS matches
+			GROUP BY movie_id
+		) AS found
+		JOIN movie_view AS v ON v.movie_id = found.movie_id
+		ORDER BY found.relevance DESC
+		LIMIT max_rows;
+	WHEN 'actor_view' THEN
+		SELECT v.*, MATCH(a.actor_name) AGAINST (search_value IN BOOLEAN MODE) AS relevance
+		FROM actor_view AS v
+		JOIN actor AS a ON a.actor_id = v.actor_id
+		WHERE MATCH(a.actor_name) AGAINST (search_value IN BOOLEAN MODE)
+		ORDER BY relevance DESC
+		LIMIT max_rows;
+	WHEN 'director_view' THEN
+		SELECT v.*, MATCH(d.director_name) AGAINST (search_value IN BOOLEAN MODE) AS relevance
+		FROM director_view AS v
+		JOIN director AS d ON d.director_id = v.director_id
+		WHERE MATCH(d.director_name) AGAINST (search_value IN BOOLEAN MODE)
+		ORDER BY relevance DESC
+		LIMIT max_rows;
+	WHEN 'production_view' THEN
+		SELECT v.*, MATCH(p.company_name) AGAINST (search_value IN BOOLEAN MODE) AS relevance
+		FROM production_view AS v
+		JOIN production_company AS p ON p.company_id = v.company_id
+		WHERE MATCH(p.company_name) AGAINST (search_value IN BOOLEAN MODE)
+		ORDER BY relevance DESC
+		LIMIT max_rows;
+	WHEN 'awards_view' THEN
+		SELECT v.*, MATCH(a.category, a.organization) AGAINST (search_value IN BOOLEAN MODE) AS relevance
+		FROM awards_view AS v
+		JOIN awards AS a ON a.award_id = v.award_id
+		WHERE MATCH(a.category, a.organization) AGAINST (search_value IN BOOLEAN MODE)
+		ORDER BY relevance DESC
+		LIMIT max_rows;
+	ELSE
+		SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'search_view: view has no FULLTEXT search';
+	END CASE;
 END$$
 
 DELIMITER ;
@@ -375,266 +805,314 @@ END $$
 DELIMITER ;
 
 
-
+-- Bump data_version on every write to a table. Bulk loads set @skip_summary_refresh
+-- and bump every version once at the end instead (see load_csv_dirs).
 DELIMITER $$
 
-CREATE PROCEDURE filter_movie_view(
-	IN age_rating_filter VARCHAR(50),
-	IN award_count_filter INT,
-	IN budget_filter INT,
-	IN country_filter VARCHAR(255),
-	IN director_name_filter VARCHAR(255),
-	IN genre_filter VARCHAR(255),
-	IN production_company_filter VARCHAR(255),
-	IN rating_filter FLOAT,
-	IN release_date_filter DATE,
-	IN revenue_filter BIGINT,
-	IN runtime_filter INT,
-	IN starname_filter VARCHAR(255),
-	IN language_filter VARCHAR(255),
-	IN title_filter VARCHAR(255)
-)
+CREATE TRIGGER movie_version_insert AFTER INSERT ON movie
+FOR EACH ROW
 BEGIN
-	-- Base query
-	SET @query = 'SELECT * FROM movie_view WHERE 1=1';
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie'; END IF;
+END$$
 
-	-- Add filters dynamically
-	IF age_rating_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND age_rating = ''', age_rating_filter, '''');
-	END IF;
+CREATE TRIGGER movie_version_update AFTER UPDATE ON movie
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie'; END IF;
+END$$
 
-	IF award_count_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND award_count = ', award_count_filter);
-	END IF;
+CREATE TRIGGER movie_version_delete AFTER DELETE ON movie
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie'; END IF;
+END$$
 
-	IF budget_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND budget = ', budget_filter);
-	END IF;
+CREATE TRIGGER watchlists_version_insert AFTER INSERT ON watchlists
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlists'; END IF;
+END$$
 
-	IF country_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND country = ''', country_filter, '''');
-	END IF;
+CREATE TRIGGER watchlists_version_update AFTER UPDATE ON watchlists
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlists'; END IF;
+END$$
 
-	IF director_name_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND director_name = ''', director_name_filter, '''');
-	END IF;
+CREATE TRIGGER watchlists_version_delete AFTER DELETE ON watchlists
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlists'; END IF;
+END$$
 
-	IF genre_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND FIND_IN_SET(''', genre_filter, ''', genres)');
-	END IF;
+CREATE TRIGGER watchlist_entries_version_insert AFTER INSERT ON watchlist_entries
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlist_entries'; END IF;
+END$$
 
-	IF production_company_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND production_company = ''', production_company_filter, '''');
-	END IF;
+CREATE TRIGGER watchlist_entries_version_update AFTER UPDATE ON watchlist_entries
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlist_entries'; END IF;
+END$$
 
-	IF rating_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND rating = ', rating_filter);
-	END IF;
+CREATE TRIGGER watchlist_entries_version_delete AFTER DELETE ON watchlist_entries
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlist_entries'; END IF;
+END$$
 
-	IF release_date_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND STR_TO_DATE(release_year, ''%Y-%m-%d'') = ''', release_date_filter, '''');
-	END IF;
+CREATE TRIGGER genre_version_insert AFTER INSERT ON genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'genre'; END IF;
+END$$
 
-	IF revenue_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND revenue = ', revenue_filter);
-	END IF;
+CREATE TRIGGER genre_version_update AFTER UPDATE ON genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'genre'; END IF;
+END$$
 
-	IF runtime_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND runtime = ', runtime_filter);
-	END IF;
+CREATE TRIGGER genre_version_delete AFTER DELETE ON genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'genre'; END IF;
+END$$
 
-	IF starname_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND FIND_IN_SET(''', starname_filter, ''', star_name)');
-	END IF;
+CREATE TRIGGER movie_genre_version_insert AFTER INSERT ON movie_genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_genre'; END IF;
+END$$
 
-	IF language_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND FIND_IN_SET(''', language_filter, ''', sub_language)');
-	END IF;
+CREATE TRIGGER movie_genre_version_update AFTER UPDATE ON movie_genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_genre'; END IF;
+END$$
 
-	IF title_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND title = ''', title_filter, '''');
-	END IF;
+CREATE TRIGGER movie_genre_version_delete AFTER DELETE ON movie_genre
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_genre'; END IF;
+END$$
 
-	-- Execute the dynamically built query
-	PREPARE stmt FROM @query;
-	EXECUTE stmt;
-	DEALLOCATE PREPARE stmt;
+CREATE TRIGGER language_version_insert AFTER INSERT ON language
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'language'; END IF;
 END$$
 
-DELIMITER ;
+CREATE TRIGGER language_version_update AFTER UPDATE ON language
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'language'; END IF;
+END$$
 
+CREATE TRIGGER language_version_delete AFTER DELETE ON language
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'language'; END IF;
+END$$
 
-DELIMITER $$
+CREATE TRIGGER movie_subtitle_version_insert AFTER INSERT ON movie_subtitle
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_subtitle'; END IF;
+END$$
 
-CREATE PROCEDURE filter_actor_view(
-	IN nationality_filter VARCHAR(255),
-	IN date_of_birth_filter DATE,
-	IN gender_filter VARCHAR(10),
-	IN movie_count_filter INT,
-	IN name_filter VARCHAR(255)
-)
+CREATE TRIGGER movie_subtitle_version_update AFTER UPDATE ON movie_subtitle
+FOR EACH ROW
 BEGIN
-	-- Base query
-	SET @query = 'SELECT * FROM actor_view WHERE 1=1';
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_subtitle'; END IF;
+END$$
 
-	-- Add gender filter
-	IF gender_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND gender = ''', gender_filter, '''');
-	END IF;
+CREATE TRIGGER movie_subtitle_version_delete AFTER DELETE ON movie_subtitle
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_subtitle'; END IF;
+END$$
 
-	-- Add date of birth filter
-	IF date_of_birth_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND date_of_birth = ''', date_of_birth_filter, '''');
-	END IF;
+CREATE TRIGGER movie_audio_version_insert AFTER INSERT ON movie_audio
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_audio'; END IF;
+END$$
 
-	-- Add nationality filter
-	IF nationality_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND nationality = ''', nationality_filter, '''');
-	END IF;
+CREATE TRIGGER movie_audio_version_update AFTER UPDATE ON movie_audio
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_audio'; END IF;
+END$$
 
-	IF name_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND name = ''', name_filter, '''');
-	END IF;
+CREATE TRIGGER movie_audio_version_delete AFTER DELETE ON movie_audio
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_audio'; END IF;
+END$$
 
-	-- Add movie count filter
-	IF movie_count_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND movie_count = ', movie_count_filter);
-	END IF;
+CREATE TRIGGER country_version_insert AFTER INSERT ON country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'country'; END IF;
+END$$
 
-	-- Execute the dynamically built query
-	PREPARE stmt FROM @query;
-	EXECUTE stmt;
-	DEALLOCATE PREPARE stmt;
+CREATE TRIGGER country_version_update AFTER UPDATE ON country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'country'; END IF;
 END$$
 
-DELIMITER ;
+CREATE TRIGGER country_version_delete AFTER DELETE ON country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'country'; END IF;
+END$$
 
-DELIMITER $$
+CREATE TRIGGER movie_country_version_insert AFTER INSERT ON movie_country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_country'; END IF;
+END$$
 
-CREATE PROCEDURE filter_director_view(
-	IN nationality_filter VARCHAR(255),
-	IN date_of_birth_filter DATE,
-	IN gender_filter VARCHAR(10),
-	IN movie_count_filter INT,
-	IN name_filter VARCHAR(255)
-)
+CREATE TRIGGER movie_country_version_update AFTER UPDATE ON movie_country
+FOR EACH ROW
 BEGIN
-	-- Base query
-	SET @query = 'SELECT * FROM director_view WHERE 1=1';
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_country'; END IF;
+END$$
 
-	-- Add gender filter
-	IF gender_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND gender = ''', gender_filter, '''');
-	END IF;
+CREATE TRIGGER movie_country_version_delete AFTER DELETE ON movie_country
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_country'; END IF;
+END$$
 
-	-- Add date of birth filter
-	IF date_of_birth_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND date_of_birth = ''', date_of_birth_filter, '''');
-	END IF;
+CREATE TRIGGER production_company_version_insert AFTER INSERT ON production_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'production_company'; END IF;
+END$$
 
-	-- Add nationality filter
-	IF nationality_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND country = ''', nationality_filter, '''');
-	END IF;
+CREATE TRIGGER production_company_version_update AFTER UPDATE ON production_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'production_company'; END IF;
+END$$
 
-IF name_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND name = ''', name_filter, '''');
-	END IF;
+CREATE TRIGGER production_company_version_delete AFTER DELETE ON production_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'production_company'; END IF;
+END$$
 
-	-- Add movie count filter
-	IF movie_count_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND movie_count = ', movie_count_filter);
-	END IF;
+CREATE TRIGGER movie_company_version_insert AFTER INSERT ON movie_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_company'; END IF;
+END$$
 
-	-- Execute the dynamically built query
-	PREPARE stmt FROM @query;
-	EXECUTE stmt;
-	DEALLOCATE PREPARE stmt;
+CREATE TRIGGER movie_company_version_update AFTER UPDATE ON movie_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_company'; END IF;
 END$$
 
-DELIMITER ;
+CREATE TRIGGER movie_company_version_delete AFTER DELETE ON movie_company
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_company'; END IF;
+END$$
 
-DELIMITER $$
+CREATE TRIGGER actor_version_insert AFTER INSERT ON actor
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'actor'; END IF;
+END$$
 
-CREATE PROCEDURE filter_production_view(
-	IN company_name_filter VARCHAR(255),
-	IN movie_count_filter INT
-)
+CREATE TRIGGER actor_version_update AFTER UPDATE ON actor
+FOR EACH ROW
 BEGIN
-	SET @query = 'SELECT
-                	p.company_id,
-                	p.company_name,
-                	m.movie_count
-              	FROM
-                	production_company AS p
-              	LEFT OUTER JOIN
-                	(SELECT company_id, COUNT(*) AS movie_count
-                 	FROM movie_company
-                 	GROUP BY company_id) AS m
-              	ON
-                	p.company_id = m.company_id
-              	WHERE 1=1';
-
-	-- Apply company name filter
-	IF company_name_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND p.company_name = ''', company_name_filter, '''');
-	END IF;
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'actor'; END IF;
+END$$
 
-	-- Apply movie count filter
-	IF movie_count_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND m.movie_count = ', movie_count_filter);
-	END IF;
+CREATE TRIGGER actor_version_delete AFTER DELETE ON actor
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'actor'; END IF;
+END$$
 
-	-- Execute the dynamically built query
-	PREPARE stmt FROM @query;
-	EXECUTE stmt;
-	DEALLOCATE PREPARE stmt;
+CREATE TRIGGER director_version_insert AFTER INSERT ON director
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'director'; END IF;
 END$$
 
-DELIMITER ;
+CREATE TRIGGER director_version_update AFTER UPDATE ON director
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'director'; END IF;
+END$$
 
-DELIMITER $$
+CREATE TRIGGER director_version_delete AFTER DELETE ON director
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'director'; END IF;
+END$$
 
-CREATE PROCEDURE filter_awards_view(
-	IN category_filter VARCHAR(255),
-	IN organization_filter VARCHAR(255),
-	IN timesgiven_filter INT
-)
+CREATE TRIGGER movie_cast_version_insert AFTER INSERT ON movie_cast
+FOR EACH ROW
 BEGIN
-	-- Base query
-	SET @query = 'SELECT
-                	a.award_id,
-                	a.organization,
-                	a.category,
-                	m.times_given
-              	FROM
-                	awards AS a
-              	LEFT OUTER JOIN
-                	(SELECT award_id, COUNT(*) AS times_given
-                 	FROM movie_awards
-                 	GROUP BY award_id) AS m
-              	ON
-                	a.award_id = m.award_id
-              	WHERE 1=1';
-
-	-- Apply filters dynamically
-	IF category_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND a.category = ''', category_filter, '''');
-	END IF;
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_cast'; END IF;
+END$$
 
-	IF organization_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND a.organization = ''', organization_filter, '''');
-	END IF;
+CREATE TRIGGER movie_cast_version_update AFTER UPDATE ON movie_cast
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_cast'; END IF;
+END$$
 
-	IF timesgiven_filter IS NOT NULL THEN
-    	SET @query = CONCAT(@query, ' AND m.times_given = ', timesgiven_filter);
-	END IF;
+CREATE TRIGGER movie_cast_version_delete AFTER DELETE ON movie_cast
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_cast'; END IF;
+END$$
 
-	-- Execute the dynamically built query
-	PREPARE stmt FROM @query;
-	EXECUTE stmt;
-	DEALLOCATE PREPARE stmt;
+CREATE TRIGGER awards_version_insert AFTER INSERT ON awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'awards'; END IF;
 END$$
 
-DELIMITER ;
+CREATE TRIGGER awards_version_update AFTER UPDATE ON awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'awards'; END IF;
+END$$
 
+CREATE TRIGGER awards_version_delete AFTER DELETE ON awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'awards'; END IF;
+END$$
+
+CREATE TRIGGER movie_awards_version_insert AFTER INSERT ON movie_awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_awards'; END IF;
+END$$
+
+CREATE TRIGGER movie_awards_version_update AFTER UPDATE ON movie_awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_awards'; END IF;
+END$$
+
+CREATE TRIGGER movie_awards_version_delete AFTER DELETE ON movie_awards
+FOR EACH ROW
+BEGIN
+    IF @skip_summary_refresh IS NULL THEN UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_awards'; END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,860 @@
+-- SQLite version of movie_ddl.sql, used when sql_controller.DB_BACKEND is "sqlite".
+-- The stored procedures are Python functions in src/classes/sqlite_backend.py, and the
+-- triggers check skip_summary_refresh(), a function the backend registers on each
+-- connection, where movie_ddl.sql checks the @skip_summary_refresh session variable.
+-- FULLTEXT keys have no equivalent here; search_view matches words with LIKE instead.
+-- Text columns are COLLATE NOCASE to compare like MySQL's default case-insensitive collation.
+
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE `movie` (
+  `movie_id` int PRIMARY KEY NOT NULL,
+  `title` varchar(255) COLLATE NOCASE NOT NULL,
+  `budget` bigint NOT NULL,
+  `revenue` bigint NOT NULL,
+  `release_year` varchar(50) COLLATE NOCASE NOT NULL,
+  `runtime` int NOT NULL,
+  `age_rating` varchar(50) COLLATE NOCASE NOT NULL,
+  `rating` float NOT NULL
+);
+CREATE INDEX `idx_movie_title` ON `movie` (`title`);
+CREATE INDEX `idx_movie_budget` ON `movie` (`budget`);
+CREATE INDEX `idx_movie_revenue` ON `movie` (`revenue`);
+CREATE INDEX `idx_movie_release_year` ON `movie` (`release_year`);
+CREATE INDEX `idx_movie_runtime` ON `movie` (`runtime`);
+CREATE INDEX `idx_movie_rating` ON `movie` (`rating`);
+
+CREATE TABLE `watchlists` (
+  `watchlist_id` INTEGER PRIMARY KEY,
+  `name` varchar(50) COLLATE NOCASE,
+  `date_created` datetime,
+  `last_edited` datetime,
+  `description` varchar(255) COLLATE NOCASE
+);
+
+CREATE TABLE `watchlist_entries` (
+  `movie_id` int NOT NULL,
+  `watchlist_id` int NOT NULL,
+  `rating` int,
+  `comment` varchar(300) COLLATE NOCASE,
+  `last_edited` datetime,
+  PRIMARY KEY (movie_id, watchlist_id),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`watchlist_id`) REFERENCES `watchlists` (`watchlist_id`)
+);
+
+CREATE TABLE `genre` (
+  `genre_id` int PRIMARY KEY NOT NULL,
+  `genre_name` varchar(50) COLLATE NOCASE NOT NULL
+);
+
+CREATE TABLE `movie_genre` (
+  `genre_id` int NOT NULL,
+  `movie_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `genre_id`),
+  FOREIGN KEY (`genre_id`) REFERENCES `genre` (`genre_id`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`)
+);
+CREATE INDEX `idx_movie_genre_genre` ON `movie_genre` (`genre_id`, `movie_id`);
+
+CREATE TABLE `language` (
+  `language_id` int PRIMARY KEY NOT NULL,
+  `language_name` varchar(50) COLLATE NOCASE NOT NULL
+);
+
+CREATE TABLE `movie_subtitle` (
+  `movie_id` int NOT NULL,
+  `language_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `language_id`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`language_id`) REFERENCES `language` (`language_id`)
+);
+CREATE INDEX `idx_movie_subtitle_language` ON `movie_subtitle` (`language_id`, `movie_id`);
+
+CREATE TABLE `movie_audio` (
+  `movie_id` int NOT NULL,
+  `language_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `language_id`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`language_id`) REFERENCES `language` (`language_id`)
+);
+CREATE INDEX `idx_movie_audio_language` ON `movie_audio` (`language_id`, `movie_id`);
+
+CREATE TABLE `country` (
+  `country_id` varchar(3) COLLATE NOCASE PRIMARY KEY NOT NULL,
+  `country_name` varchar(50) COLLATE NOCASE NOT NULL,
+  `GDP` bigint NOT NULL,
+  `population` int NOT NULL
+);
+
+CREATE TABLE `movie_country` (
+  `movie_id` int NOT NULL,
+  `country_id` varchar(3) COLLATE NOCASE NOT NULL,
+  PRIMARY KEY (`movie_id`, `country_id`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`country_id`) REFERENCES `country` (`country_id`)
+);
+CREATE INDEX `idx_movie_country_country` ON `movie_country` (`country_id`, `movie_id`);
+
+CREATE TABLE `production_company` (
+  `company_id` int PRIMARY KEY NOT NULL,
+  `company_name` varchar(255) COLLATE NOCASE NOT NULL,
+  `total_movies_produced` int NOT NULL,
+  `date_established` datetime NOT NULL
+);
+CREATE INDEX `idx_company_name` ON `production_company` (`company_name`);
+
+CREATE TABLE `movie_company` (
+  `movie_id` int NOT NULL,
+  `company_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `company_id`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`company_id`) REFERENCES `production_company` (`company_id`)
+);
+CREATE INDEX `idx_movie_company_company` ON `movie_company` (`company_id`, `movie_id`);
+
+CREATE TABLE `actor` (
+  `actor_id` int PRIMARY KEY NOT NULL,
+  `actor_name` varchar(50) COLLATE NOCASE NOT NULL,
+  `gender` varchar(50) COLLATE NOCASE NOT NULL,
+  `date_of_birth` datetime NOT NULL,
+  `country` varchar(50) COLLATE NOCASE NOT NULL
+);
+CREATE INDEX `idx_actor_name` ON `actor` (`actor_name`);
+
+CREATE TABLE `director` (
+  `director_id` int PRIMARY KEY NOT NULL,
+  `director_name` varchar(50) COLLATE NOCASE NOT NULL,
+  `gender` varchar(10) COLLATE NOCASE NOT NULL,
+  `date_of_birth` datetime NOT NULL,
+  `country` varchar(50) COLLATE NOCASE NOT NULL
+);
+CREATE INDEX `idx_director_name` ON `director` (`director_name`);
+
+CREATE TABLE `movie_cast` (
+  `movie_id` int NOT NULL,
+  `actor_id` int NOT NULL,
+  `director_id` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `actor_id`, `director_id`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`actor_id`) REFERENCES `actor` (`actor_id`),
+  FOREIGN KEY (`director_id`) REFERENCES `director` (`director_id`)
+);
+CREATE INDEX `idx_movie_cast_actor` ON `movie_cast` (`actor_id`, `movie_id`);
+CREATE INDEX `idx_movie_cast_director` ON `movie_cast` (`director_id`, `movie_id`);
+
+CREATE TABLE `awards` (
+  `award_id` int PRIMARY KEY NOT NULL,
+  `category` varchar(255) COLLATE NOCASE NOT NULL,
+  `organization` varchar(50) COLLATE NOCASE NOT NULL
+);
+
+CREATE TABLE `movie_awards` (
+  `movie_id` int NOT NULL,
+  `award_id` int NOT NULL,
+  `award_year` int NOT NULL,
+  PRIMARY KEY (`movie_id`, `award_id`, `award_year`),
+  FOREIGN KEY (`movie_id`) REFERENCES `movie` (`movie_id`),
+  FOREIGN KEY (`award_id`) REFERENCES `awards` (`award_id`)
+);
+CREATE INDEX `idx_movie_awards_award` ON `movie_awards` (`award_id`, `movie_id`);
+
+
+-- Materialized copy of the movie aggregate, one row per movie (and director),
+-- rebuilt by the refresh_movie_summary procedure.
+CREATE TABLE `movie_summary` (
+  `movie_id` int NOT NULL,
+  `title` varchar(255) COLLATE NOCASE NOT NULL,
+  `budget` bigint NOT NULL,
+  `revenue` bigint NOT NULL,
+  `release_year` varchar(50) COLLATE NOCASE NOT NULL,
+  `runtime` int NOT NULL,
+  `age_rating` varchar(50) COLLATE NOCASE NOT NULL,
+  `rating` float NOT NULL,
+  `award_count` bigint,
+  `genres` text COLLATE NOCASE,
+  `sub_language` text COLLATE NOCASE,
+  `actor_id` int,
+  `star` varchar(50) COLLATE NOCASE,
+  `director_id` int,
+  `director_name` varchar(50) COLLATE NOCASE,
+  `company_id` int,
+  `production_company` varchar(255) COLLATE NOCASE,
+  `country_name` varchar(50) COLLATE NOCASE
+);
+CREATE INDEX `idx_movie_summary_movie` ON `movie_summary` (`movie_id`);
+CREATE INDEX `idx_movie_summary_director` ON `movie_summary` (`director_id`);
+
+-- Movies whose movie_summary rows are out of date. SQLite triggers can't call procedures,
+-- so the triggers below queue the movie here and the backend refreshes the queued
+-- movies after each write statement it runs.
+CREATE TABLE `movie_summary_stale` (
+  `movie_id` INTEGER PRIMARY KEY
+);
+
+-- One row per table, bumped by the data_version triggers below on every write.
+-- The '*' row is random per database, so versions from a recreated database never match old ones.
+CREATE TABLE `data_version` (
+  `table_name` varchar(64) COLLATE NOCASE PRIMARY KEY NOT NULL,
+  `version` bigint unsigned NOT NULL DEFAULT 0
+);
+
+INSERT INTO data_version (table_name, version) VALUES ('*', abs(random())), ('movie', 0), ('watchlists', 0), ('watchlist_entries', 0), ('genre', 0), ('movie_genre', 0), ('language', 0), ('movie_subtitle', 0), ('movie_audio', 0), ('country', 0), ('movie_country', 0), ('production_company', 0), ('movie_company', 0), ('actor', 0), ('director', 0), ('movie_cast', 0), ('awards', 0), ('movie_awards', 0);
+
+
+-- VIEWS DECLARATION
+
+CREATE VIEW movie_view AS
+SELECT
+    movie_id,
+    title,
+    budget,
+    revenue,
+    release_year,
+    runtime,
+    age_rating,
+    rating,
+    award_count,
+    genres,
+    sub_language,
+    actor_id,
+    star,
+    director_id,
+    director_name,
+    company_id,
+    production_company,
+    country_name
+FROM
+    movie_summary;
+
+CREATE VIEW actor_view AS
+SELECT
+    a.actor_id,
+    a.actor_name AS name,
+    a.gender,
+    a.date_of_birth,
+    a.country,
+    m.movie_count
+FROM
+    actor as a
+LEFT OUTER JOIN
+    (SELECT actor_id, COUNT(*) AS movie_count
+     FROM movie_cast
+     GROUP BY actor_id) AS m
+ON
+    a.actor_id = m.actor_id;
+
+CREATE VIEW director_view AS
+SELECT
+    d.director_id,
+    d.director_name AS name,
+    d.gender,
+    d.date_of_birth,
+    d.country,
+    m.movie_count
+FROM
+    director as d
+LEFT OUTER JOIN
+    (SELECT director_id, COUNT(*) AS movie_count
+     FROM movie_cast
+     GROUP BY director_id) AS m
+ON
+    d.director_id = m.director_id;
+
+CREATE VIEW production_view AS
+SELECT
+    p.company_id,
+    p.company_name,
+    m.movie_count
+FROM
+    production_company as p
+LEFT OUTER JOIN
+    (SELECT company_id, COUNT(*) AS movie_count
+     FROM movie_company
+     GROUP BY company_id) AS m
+ON
+    p.company_id = m.company_id;
+
+CREATE VIEW awards_view AS
+SELECT
+    a.award_id,
+    a.organization,
+    a.category,
+    COALESCE(m.times_given, 0) AS times_given
+FROM
+    awards as a
+LEFT OUTER JOIN
+    (SELECT award_id, COUNT(*) AS times_given
+     FROM movie_awards
+     GROUP BY award_id) AS m
+ON
+    a.award_id = m.award_id;
+
+
+-- TRIGGERS
+
+-- Update last_edited on a watchlist_entry row when the row is modified. SQLite can't
+-- assign NEW in a BEFORE trigger, so the row is updated again afterwards (recursive
+-- triggers are off, so that update doesn't fire this trigger). Rows whose rating is
+-- still NULL are being given their default rating by set_default_rating, not edited.
+-- last_edited has milliseconds, so two edits within a second are still told apart.
+CREATE TRIGGER update_watchlist_entry_last_edited
+AFTER UPDATE ON watchlist_entries
+FOR EACH ROW WHEN OLD.rating IS NOT NULL
+BEGIN
+    UPDATE watchlist_entries SET last_edited = strftime('%Y-%m-%d %H:%M:%f', 'now')
+    WHERE movie_id = NEW.movie_id AND watchlist_id = NEW.watchlist_id;
+END;
+
+-- automatically set a default rating for movies added to a watchlist without a user-provided rating
+CREATE TRIGGER set_default_rating
+AFTER INSERT ON watchlist_entries
+FOR EACH ROW WHEN NEW.rating IS NULL
+BEGIN
+    UPDATE watchlist_entries SET rating = 3
+    WHERE movie_id = NEW.movie_id AND watchlist_id = NEW.watchlist_id;
+END;
+
+CREATE TRIGGER movie_summary_movie_delete AFTER DELETE ON movie
+FOR EACH ROW
+BEGIN
+    DELETE FROM movie_summary WHERE movie_id = OLD.movie_id;
+END;
+
+-- Queue movies for refresh_movie_summary. Bulk loads register skip_summary_refresh()
+-- as 1 and refresh every movie once at the end instead.
+CREATE TRIGGER movie_summary_movie_insert AFTER INSERT ON movie
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_summary_movie_update AFTER UPDATE ON movie
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_genre_summary_insert AFTER INSERT ON movie_genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_genre_summary_update AFTER UPDATE ON movie_genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_genre_summary_delete AFTER DELETE ON movie_genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_subtitle_summary_insert AFTER INSERT ON movie_subtitle
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_subtitle_summary_update AFTER UPDATE ON movie_subtitle
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_subtitle_summary_delete AFTER DELETE ON movie_subtitle
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_cast_summary_insert AFTER INSERT ON movie_cast
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_cast_summary_update AFTER UPDATE ON movie_cast
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_cast_summary_delete AFTER DELETE ON movie_cast
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_company_summary_insert AFTER INSERT ON movie_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_company_summary_update AFTER UPDATE ON movie_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_company_summary_delete AFTER DELETE ON movie_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_country_summary_insert AFTER INSERT ON movie_country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_country_summary_update AFTER UPDATE ON movie_country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_country_summary_delete AFTER DELETE ON movie_country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_awards_summary_insert AFTER INSERT ON movie_awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+END;
+
+CREATE TRIGGER movie_awards_summary_update AFTER UPDATE ON movie_awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (NEW.movie_id);
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+CREATE TRIGGER movie_awards_summary_delete AFTER DELETE ON movie_awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id) VALUES (OLD.movie_id);
+END;
+
+-- Renaming a genre, language, actor, director, production company or country, or changing
+-- an id, changes what movie_summary copied from it, so every movie linked to it is queued too.
+CREATE TRIGGER genre_summary_update AFTER UPDATE OF genre_id, genre_name ON genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_genre WHERE genre_id IN (OLD.genre_id, NEW.genre_id);
+END;
+
+CREATE TRIGGER genre_summary_delete AFTER DELETE ON genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_genre WHERE genre_id = OLD.genre_id;
+END;
+
+CREATE TRIGGER language_summary_update AFTER UPDATE OF language_id, language_name ON language
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_subtitle WHERE language_id IN (OLD.language_id, NEW.language_id);
+END;
+
+CREATE TRIGGER language_summary_delete AFTER DELETE ON language
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_subtitle WHERE language_id = OLD.language_id;
+END;
+
+CREATE TRIGGER actor_summary_update AFTER UPDATE OF actor_id, actor_name ON actor
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_cast WHERE actor_id IN (OLD.actor_id, NEW.actor_id);
+END;
+
+CREATE TRIGGER actor_summary_delete AFTER DELETE ON actor
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_cast WHERE actor_id = OLD.actor_id;
+END;
+
+CREATE TRIGGER director_summary_update AFTER UPDATE OF director_id, director_name ON director
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_cast WHERE director_id IN (OLD.director_id, NEW.director_id);
+END;
+
+CREATE TRIGGER director_summary_delete AFTER DELETE ON director
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_cast WHERE director_id = OLD.director_id;
+END;
+
+CREATE TRIGGER production_company_summary_update AFTER UPDATE OF company_id, company_name ON production_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_company WHERE company_id IN (OLD.company_id, NEW.company_id);
+END;
+
+CREATE TRIGGER production_company_summary_delete AFTER DELETE ON production_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_company WHERE company_id = OLD.company_id;
+END;
+
+CREATE TRIGGER country_summary_update AFTER UPDATE OF country_id, country_name ON country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_country WHERE country_id IN (OLD.country_id, NEW.country_id);
+END;
+
+CREATE TRIGGER country_summary_delete AFTER DELETE ON country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_country WHERE country_id = OLD.country_id;
+END;
+
+CREATE TRIGGER awards_summary_update AFTER UPDATE OF award_id ON awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_awards WHERE award_id IN (OLD.award_id, NEW.award_id);
+END;
+
+CREATE TRIGGER awards_summary_delete AFTER DELETE ON awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    INSERT OR IGNORE INTO movie_summary_stale (movie_id)
+    SELECT movie_id FROM movie_awards WHERE award_id = OLD.award_id;
+END;
+
+
+-- Bump data_version on every write to a table. Bulk loads skip these and bump every
+-- version once at the end instead (see load_csv_dirs).
+
+CREATE TRIGGER movie_version_insert AFTER INSERT ON movie
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie';
+END;
+
+CREATE TRIGGER movie_version_update AFTER UPDATE ON movie
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie';
+END;
+
+CREATE TRIGGER movie_version_delete AFTER DELETE ON movie
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie';
+END;
+
+CREATE TRIGGER watchlists_version_insert AFTER INSERT ON watchlists
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlists';
+END;
+
+CREATE TRIGGER watchlists_version_update AFTER UPDATE ON watchlists
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlists';
+END;
+
+CREATE TRIGGER watchlists_version_delete AFTER DELETE ON watchlists
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlists';
+END;
+
+CREATE TRIGGER watchlist_entries_version_insert AFTER INSERT ON watchlist_entries
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlist_entries';
+END;
+
+CREATE TRIGGER watchlist_entries_version_update AFTER UPDATE ON watchlist_entries
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlist_entries';
+END;
+
+CREATE TRIGGER watchlist_entries_version_delete AFTER DELETE ON watchlist_entries
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'watchlist_entries';
+END;
+
+CREATE TRIGGER genre_version_insert AFTER INSERT ON genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'genre';
+END;
+
+CREATE TRIGGER genre_version_update AFTER UPDATE ON genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'genre';
+END;
+
+CREATE TRIGGER genre_version_delete AFTER DELETE ON genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'genre';
+END;
+
+CREATE TRIGGER movie_genre_version_insert AFTER INSERT ON movie_genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_genre';
+END;
+
+CREATE TRIGGER movie_genre_version_update AFTER UPDATE ON movie_genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_genre';
+END;
+
+CREATE TRIGGER movie_genre_version_delete AFTER DELETE ON movie_genre
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_genre';
+END;
+
+CREATE TRIGGER language_version_insert AFTER INSERT ON language
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'language';
+END;
+
+CREATE TRIGGER language_version_update AFTER UPDATE ON language
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'language';
+END;
+
+CREATE TRIGGER language_version_delete AFTER DELETE ON language
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'language';
+END;
+
+CREATE TRIGGER movie_subtitle_version_insert AFTER INSERT ON movie_subtitle
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_subtitle';
+END;
+
+CREATE TRIGGER movie_subtitle_version_update AFTER UPDATE ON movie_subtitle
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_subtitle';
+END;
+
+CREATE TRIGGER movie_subtitle_version_delete AFTER DELETE ON movie_subtitle
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_subtitle';
+END;
+
+CREATE TRIGGER movie_audio_version_insert AFTER INSERT ON movie_audio
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_audio';
+END;
+
+CREATE TRIGGER movie_audio_version_update AFTER UPDATE ON movie_audio
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_audio';
+END;
+
+CREATE TRIGGER movie_audio_version_delete AFTER DELETE ON movie_audio
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_audio';
+END;
+
+CREATE TRIGGER country_version_insert AFTER INSERT ON country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'country';
+END;
+
+CREATE TRIGGER country_version_update AFTER UPDATE ON country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'country';
+END;
+
+CREATE TRIGGER country_version_delete AFTER DELETE ON country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'country';
+END;
+
+CREATE TRIGGER movie_country_version_insert AFTER INSERT ON movie_country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_country';
+END;
+
+CREATE TRIGGER movie_country_version_update AFTER UPDATE ON movie_country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_country';
+END;
+
+CREATE TRIGGER movie_country_version_delete AFTER DELETE ON movie_country
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_country';
+END;
+
+CREATE TRIGGER production_company_version_insert AFTER INSERT ON production_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'production_company';
+END;
+
+CREATE TRIGGER production_company_version_update AFTER UPDATE ON production_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'production_company';
+END;
+
+CREATE TRIGGER production_company_version_delete AFTER DELETE ON production_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'production_company';
+END;
+
+CREATE TRIGGER movie_company_version_insert AFTER INSERT ON movie_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_company';
+END;
+
+CREATE TRIGGER movie_company_version_update AFTER UPDATE ON movie_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_company';
+END;
+
+CREATE TRIGGER movie_company_version_delete AFTER DELETE ON movie_company
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_company';
+END;
+
+CREATE TRIGGER actor_version_insert AFTER INSERT ON actor
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'actor';
+END;
+
+CREATE TRIGGER actor_version_update AFTER UPDATE ON actor
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'actor';
+END;
+
+CREATE TRIGGER actor_version_delete AFTER DELETE ON actor
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'actor';
+END;
+
+CREATE TRIGGER director_version_insert AFTER INSERT ON director
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'director';
+END;
+
+CREATE TRIGGER director_version_update AFTER UPDATE ON director
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'director';
+END;
+
+CREATE TRIGGER director_version_delete AFTER DELETE ON director
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'director';
+END;
+
+CREATE TRIGGER movie_cast_version_insert AFTER INSERT ON movie_cast
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_cast';
+END;
+
+CREATE TRIGGER movie_cast_version_update AFTER UPDATE ON movie_cast
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_cast';
+END;
+
+CREATE TRIGGER movie_cast_version_delete AFTER DELETE ON movie_cast
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_cast';
+END;
+
+CREATE TRIGGER awards_version_insert AFTER INSERT ON awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'awards';
+END;
+
+CREATE TRIGGER awards_version_update AFTER UPDATE ON awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'awards';
+END;
+
+CREATE TRIGGER awards_version_delete AFTER DELETE ON awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'awards';
+END;
+
+CREATE TRIGGER movie_awards_version_insert AFTER INSERT ON movie_awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_awards';
+END;
+
+CREATE TRIGGER movie_awards_version_update AFTER UPDATE ON movie_awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_awards';
+END;
+
+CREATE TRIGGER movie_awards_version_delete AFTER DELETE ON movie_awards
+FOR EACH ROW WHEN skip_summary_refresh() IS NULL
+BEGIN
+    UPDATE data_version SET version = version + 1 WHERE table_name = 'movie_awards';
+END;
@@ -0,0 +1,73 @@
+"""Run EXPLAIN on every view and filter query and fail if any of them fall back
+to a full table or full index scan on a junction table. The plans checked are
+MySQL's, so on other backends the check is skipped.
+
+Usage: python -m src.check_indexes
+"""
+import sys
+
+from src.classes.sql_controller import query_data, get_backend
+from src.classes.filter_builder import FILTER_FIELDS, TEXT, NUMBER, FLOAT, YEAR, DATE, build_query
+
+JUNCTION_TABLES = {'movie_genre', 'movie_subtitle', 'movie_audio', 'movie_country', 'movie_company', 'movie_cast', 'movie_awards'}
+# EXPLAIN access types that read every row: a table scan, or a scan of a whole index
+FULL_SCAN_TYPES = {'ALL': "full scan", 'index': "full index scan"}
+
+# a sample value of each kind, as a range where the kind has one
+SAMPLE_FILTERS = {TEXT: "x*", NUMBER: "1..100", FLOAT: "5..8", YEAR: "1990..2000", DATE: "1970"}
+
+def filter_queries():
+    """The statement filter_builder makes for each view with every filter switched on"""
+    queries = {}
+    for view_name, fields in FILTER_FIELDS.items():
+        values = {field.name: SAMPLE_FILTERS[field.kind] for field in fields}
+        queries['filter ' + view_name] = build_query(view_name, values)
+    return queries
+
+OTHER_QUERIES = {
+    'get_watchlist_entries': """SELECT watchlist_entries.watchlist_id, watchlist_entries.movie_id, movie.title AS movie_name
+        FROM watchlist_entries INNER JOIN movie ON watchlist_entries.movie_id = movie.movie_id
+        WHERE watchlist_entries.watchlist_id = 1""",
+}
+
+def view_queries(path="data/main_tables.txt"):
+    queries = {}
+    with open(path) as file:
+        for s in file.readlines():
+            query = s.strip().split(",,,")[0]
+            queries[query.split(" ")[-1]] = query
+    return queries
+
+def full_junction_scans(query, params=None):
+    """EXPLAIN a query and return the plan rows that scan a whole junction table or one of its indexes"""
+    plan = query_data("EXPLAIN " + query, params=params)
+    if not plan:
+        return []
+    return [row for row in plan if row.get('table') in JUNCTION_TABLES and row.get('type') in FULL_SCAN_TYPES]
+
+def check_all():
+    """{query name: offending plan rows}, or None if the backend's plans can't be checked"""
+    if get_backend().name != "mysql":
+        return None
+    failures = {}
+    queries = {name: (query, None) for name, query in view_queries().items()}
+    queries.update((name, (query, None)) for name, query in OTHER_QUERIES.items())
+    queries.update(filter_queries())
+    for name, (query, params) in queries.items():
+        scans = full_junction_scans(query, params)
+        if scans:
+            failures[name] = scans
+    return failures
+
+if __name__ == '__main__':
+    failures = check_all()
+    if failures is None:
+        print(f"SKIPPED: the check reads MySQL EXPLAIN plans, and the {get_backend().name} backend is selected")
+        sys.exit(0)
+    for name, scans in failures.items():
+        for row in scans:
+            print(f"FAIL {name}: {FULL_SCAN_TYPES[row['type']]} of {row['table']} "
+                  f"(key={row.get('key')}, rows={row.get('rows')}, possible_keys={row.get('possible_keys')})")
+    if failures:
+        sys.exit(1)
+    print("OK: no view or filter query scans a whole junction table or index")
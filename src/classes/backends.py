@@ -0,0 +1,153 @@
+"""Storage backends: how sql_controller opens connections, runs statements, calls
+procedures, creates the schema and bulk loads the csv files.
+
+Statements throughout the app are written for MySQL, with %s placeholders and
+CALL for the stored procedures. MySQLBackend runs them as they are; SQLiteBackend
+(see sqlite_backend.py) keeps the database in one local file and translates them.
+"""
+import json
+import re
+import time
+
+class Backend:
+    """One database engine. Subclasses fill in every method that raises NotImplementedError."""
+    name = None
+    # schema create_database applies when it isn't given a file
+    schema_file = None
+    # errors after which a connection is thrown away instead of going back to the pool
+    connection_errors = ()
+    # base class of every error the driver raises
+    database_error = Exception
+
+    def connect(self):
+        """Open a connection for the pool, in autocommit mode"""
+        raise NotImplementedError
+
+    def is_healthy(self, connection):
+        """True if an idle pooled connection can still be used"""
+        raise NotImplementedError
+
+    def cursor(self, connection, dict_rows=True):
+        """DB-API cursor taking MySQL statements; rows are dicts unless dict_rows is False"""
+        raise NotImplementedError
+
+    def stream_cursor(self, connection):
+        """Cursor whose tuple rows are read from the server as fetchmany asks for them,
+        instead of all at once when the statement runs"""
+        raise NotImplementedError
+
+    def begin(self, connection):
+        """Start a transaction on a pooled connection; ended with connection.commit()/rollback()"""
+        connection.begin()
+
+    def apply_schema(self, file_path, log=None):
+        """Drop and recreate the database from a schema file; returns True on success.
+        log(statement, seconds, error) is called for every statement run"""
+        raise NotImplementedError
+
+    def explain(self, cursor, query, params=None):
+        """The plan of a read query, as something json.dumps accepts"""
+        raise NotImplementedError
+
+    def bulk_load(self, csv_dirs, mode="executemany"):
+        """Load every csv in csv_dirs, skipping the per-row summary triggers; returns LoadResults"""
+        raise NotImplementedError
+
+
+class MySQLBackend(Backend):
+    name = "mysql"
+    schema_file = "database_files/movie_ddl.sql"
+
+    def __init__(self, connection_args):
+        """connection_args(database) returns pymysql.connect keyword arguments"""
+        import pymysql
+        self._pymysql = pymysql
+        self._connection_args = connection_args
+        self.connection_errors = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+        self.database_error = pymysql.MySQLError
+
+    def connect(self):
+        # autocommit so pooled connections never hold a stale read snapshot
+        return self._pymysql.connect(autocommit=True, **self._connection_args())
+
+    def is_healthy(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def cursor(self, connection, dict_rows=True):
+        cursors = self._pymysql.cursors
+        return connection.cursor(cursors.DictCursor if dict_rows else cursors.Cursor)
+
+    def stream_cursor(self, connection):
+        # unbuffered: closing it early still reads the rest of the result off the connection
+        return connection.cursor(self._pymysql.cursors.SSCursor)
+
+    def apply_schema(self, file_path, log=None):
+        with open(file_path, "r") as file:
+            sql_script = file.read()
+        try:
+            connection_args = self._connection_args(database="mysql")
+            connection_args["cursorclass"] = self._pymysql.cursors.DictCursor
+            connection = self._pymysql.connect(**connection_args)
+        except Exception as err:
+            print(f"Error: {err}")
+            return False
+        try:
+            cursor = connection.cursor()
+
+            # Split the script by `DELIMITER` statements
+            statements = re.split(r"DELIMITER\s+(\S+)", sql_script)
+
+            # Default delimiter
+            current_delimiter = ";"
+
+            # Execute each part of the script
+            for i, statement in enumerate(statements):
+                if i % 2 == 0:  # Normal SQL commands
+                    commands = statement.split(current_delimiter)
+                    for command in commands:
+                        command = command.strip()
+                        if command:  # Skip empty commands
+                            _execute_logged(cursor, command, log)
+                            print(f"Executed: {command[:30]}...")  # Log part of the statement
+                else:  # Change delimiter
+                    current_delimiter = statement.strip()
+                    print(f"Changed delimiter to: {current_delimiter}")
+
+            connection.commit()
+            return True
+
+        except self._pymysql.MySQLError as err:
+            print(f"Error: {err}")
+            return False
+
+        finally:
+            cursor.close()
+            connection.close()
+
+    def explain(self, cursor, query, params=None):
+        cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+        row = cursor.fetchone()
+        return json.loads(next(iter(row.values())) if isinstance(row, dict) else row[0])
+
+    def bulk_load(self, csv_dirs, mode="executemany"):
+        from src.classes.bulk_loader import load_directories
+        return load_directories(csv_dirs, mode=mode, before_load=_skip_summary_refresh)
+
+def _skip_summary_refresh(cursor):
+    # the triggers check this session variable, see movie_ddl.sql
+    cursor.execute("SET @skip_summary_refresh = 1")
+
+def _execute_logged(cursor, statement, log):
+    start = time.perf_counter()
+    try:
+        cursor.execute(statement)
+    except Exception as e:
+        if log:
+            log(statement, time.perf_counter() - start, e)
+        raise
+    if log:
+        log(statement, time.perf_counter() - start, None)
@@ -0,0 +1,179 @@
+"""Bitmap index of the genres, subtitle and audio languages and production countries of every movie.
+
+Each movie gets a bit position, and each genre, language or country is a Python int
+with the bits of its movies set. AND, OR and NOT over them are then single integer
+operations however many movies match. Queries are written like
+
+    genre:Horror AND genre:Comedy AND subtitle:French AND NOT country:US
+
+AND may be left out, OR and parentheses group, and "quoted values" hold spaces.
+Countries can be given by name or code. Names compare ignoring case, and an
+unknown name matches no movie.
+"""
+import re
+
+# query of each dimension; its rows are a movie_id followed by the names the value goes by
+DIMENSIONS = {
+    "genre": "SELECT mg.movie_id, g.genre_name FROM movie_genre AS mg JOIN genre AS g ON g.genre_id = mg.genre_id",
+    "subtitle": "SELECT ms.movie_id, l.language_name FROM movie_subtitle AS ms "
+                "JOIN language AS l ON l.language_id = ms.language_id",
+    "audio": "SELECT ma.movie_id, l.language_name FROM movie_audio AS ma JOIN language AS l ON l.language_id = ma.language_id",
+    "country": "SELECT mc.movie_id, c.country_name, c.country_id FROM movie_country AS mc "
+               "JOIN country AS c ON c.country_id = mc.country_id",
+}
+MOVIES_QUERY = "SELECT movie_id FROM movie"
+# tables the index is built from, to tell when it is out of date (see data_versions)
+TABLES = ("movie", "movie_genre", "genre", "movie_subtitle", "movie_audio", "language", "movie_country", "country")
+
+_TOKEN = re.compile(r'\s*(?:(?P<paren>[()])|(?P<dimension>\w+)\s*:\s*(?:"(?P<quoted>[^"]*)"|(?P<value>[^\s()"]+))'
+                    r'|(?P<word>[^\s()"]+))')
+
+class BitmapIndex:
+    """One int bitset per genre, language and country; bit i stands for movie_ids[i]"""
+
+    def __init__(self, movie_ids):
+        self.movie_ids = list(movie_ids)
+        self.positions = {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+        self.everything = (1 << len(self.movie_ids)) - 1
+        self.bitmaps = {dimension: {} for dimension in DIMENSIONS}  # dimension -> casefolded name -> bits
+        self.names = {dimension: {} for dimension in DIMENSIONS}  # dimension -> casefolded name -> name
+
+    @classmethod
+    def fromDatabase(cls, query):
+        """Build from the movie tables; query(sql) returns rows the way
+        query_data(sql, get_tuples=True) does, as tuples or bare values for one column"""
+        index = cls(query(MOVIES_QUERY) or [])
+        for dimension, sql in DIMENSIONS.items():
+            index.addRows(dimension, query(sql) or [])
+        return index
+
+    def addRows(self, dimension, rows):
+        """Set the bits of (movie_id, name, ...) rows; movies not in movie_ids are skipped"""
+        # positions are collected per name and turned into an int once, since growing an
+        # int bit by bit copies it every time
+        size = len(self.movie_ids) // 8 + 1
+        masks = {}
+        names = self.names[dimension]
+        for (movie_id, *row_names) in rows:
+            position = self.positions.get(movie_id)
+            if position is None:
+                continue
+            for column, name in enumerate(row_names):
+                if name is None:
+                    continue
+                key = str(name).casefold()
+                mask = masks.get(key)
+                if mask is None:
+                    mask = masks[key] = bytearray(size)
+                    if column == 0:
+                        # values lists names, not the codes also accepted
+                        names.setdefault(key, str(name))
+                mask[position >> 3] |= 1 << (position & 7)
+        bitmaps = self.bitmaps[dimension]
+        for key, mask in masks.items():
+            bitmaps[key] = bitmaps.get(key, 0) | int.from_bytes(mask, "little")
+
+    def bitmap(self, dimension, name):
+        if dimension not in self.bitmaps:
+            raise ValueError(f"unknown field {dimension!r}, use one of {', '.join(DIMENSIONS)}")
+        return self.bitmaps[dimension].get(str(name).casefold(), 0)
+
+    def values(self, dimension):
+        """Every name of a dimension, sorted"""
+        return sorted(self.names[dimension].values(), key=str.casefold)
+
+    def query(self, text):
+        """Bits of the movies matching a query (see the module docstring); raises ValueError if malformed"""
+        parser = _Parser(self, _tokens(text))
+        bits = parser.anyOf()
+        if parser.peek() is not None:
+            raise ValueError(f"unexpected {parser.peek()[1]!r}")
+        return bits
+
+    def movieIds(self, bits):
+        """Set of the movie_ids whose bits are set"""
+        movie_ids = self.movie_ids
+        found = set()
+        data = bits.to_bytes(len(movie_ids) // 8 + 1, "little")
+        for byte_index, byte in enumerate(data):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        found.add(movie_ids[base + bit])
+        return found
+
+    def count(self, bits):
+        return bin(bits).count("1")
+
+def _tokens(text):
+    """(kind, value) pairs: ("(", ...), (")", ...), ("term", (dimension, name)) or ("word", word)"""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"can't read {text[position:]!r}")
+        position = match.end()
+        if match.group("paren"):
+            tokens.append((match.group("paren"), match.group("paren")))
+        elif match.group("dimension"):
+            name = match.group("quoted") if match.group("quoted") is not None else match.group("value")
+            tokens.append(("term", (match.group("dimension").lower(), name)))
+        else:
+            tokens.append(("word", match.group("word")))
+    return tokens
+
+class _Parser:
+    """Recursive descent over tokens: OR binds loosest, then AND (or nothing), then NOT"""
+
+    def __init__(self, index, tokens):
+        self.index = index
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def keyword(self, word):
+        token = self.peek()
+        if token is not None and token[0] == "word" and token[1].upper() == word:
+            self.position += 1
+            return True
+        return False
+
+    def anyOf(self):
+        bits = self.allOf()
+        while self.keyword("OR"):
+            bits |= self.allOf()
+        return bits
+
+    def allOf(self):
+        bits = self.factor()
+        while True:
+            if self.keyword("AND"):
+                bits &= self.factor()
+                continue
+            token = self.peek()
+            if token is None or token[0] == ")" or (token[0] == "word" and token[1].upper() == "OR"):
+                return bits
+            bits &= self.factor()
+
+    def factor(self):
+        if self.keyword("NOT"):
+            return self.index.everything & ~self.factor()
+        token = self.peek()
+        if token is None:
+            raise ValueError("the query ends too early")
+        self.position += 1
+        if token[0] == "(":
+            bits = self.anyOf()
+            closing = self.peek()
+            if closing is None or closing[0] != ")":
+                raise ValueError("missing )")
+            self.position += 1
+            return bits
+        if token[0] == "term":
+            return self.index.bitmap(*token[1])
+        raise ValueError(f"expected field:value, got {token[1]!r}")
@@ -0,0 +1,174 @@
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.classes import sql_controller
+
+# load modes
+EXECUTEMANY = "executemany"
+LOAD_DATA = "load_data"
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_WORKERS = 4
+
+class LoadResult:
+    def __init__(self, table_name, rows, seconds, error=None):
+        self.table_name = table_name
+        self.rows = rows
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.error:
+            return f"{self.table_name}: failed after {self.rows} rows ({self.error})"
+        return f"{self.table_name}: {self.rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+
+def find_csv_files(csv_dirs):
+    """Map table name -> csv path for every csv file in the given directories"""
+    files = {}
+    for csv_dir in csv_dirs:
+        for file_name in sorted(os.listdir(csv_dir)):
+            if file_name.endswith(".csv"):
+                files[os.path.splitext(file_name)[0]] = os.path.join(csv_dir, file_name)
+    return files
+
+def fetch_dependencies(connection, tables):
+    """Foreign key dependencies between the given tables, read from the schema"""
+    query = """SELECT TABLE_NAME, REFERENCED_TABLE_NAME
+        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL"""
+    dependencies = {table: set() for table in tables}
+    with connection.cursor() as cursor:
+        cursor.execute(query)
+        for table_name, referenced in cursor.fetchall():
+            if table_name in dependencies and referenced in dependencies and referenced != table_name:
+                dependencies[table_name].add(referenced)
+    return dependencies
+
+def dependency_levels(dependencies):
+    """Group tables into levels; every table only references tables in earlier levels"""
+    remaining = {table: set(deps) for table, deps in dependencies.items()}
+    levels = []
+    while remaining:
+        level = sorted(table for table, deps in remaining.items() if not deps)
+        if not level:
+            raise ValueError("circular foreign keys between: " + ", ".join(sorted(remaining)))
+        levels.append(level)
+        for table in level:
+            del remaining[table]
+        for deps in remaining.values():
+            deps.difference_update(level)
+    return levels
+
+def fallback_levels(tables):
+    """Load one table at a time following sql_controller.order when the schema can't be read"""
+    known = [os.path.splitext(name)[0] for name in sql_controller.order]
+    ordered = [table for table in known if table in tables]
+    ordered += sorted(table for table in tables if table not in known)
+    return [[table] for table in ordered]
+
+def read_chunks(csv_path, chunk_size):
+    """Yield (header, rows) chunks so only chunk_size rows are held in memory"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        chunk = []
+        for row in reader:
+            # empty fields are NULL, matching how pandas read them before
+            chunk.append(tuple(value if value != "" else None for value in row))
+            if len(chunk) >= chunk_size:
+                yield header, chunk
+                chunk = []
+        if chunk:
+            yield header, chunk
+
+def open_connection(mode):
+    # imported here so the SQLite backend can use this module's helpers without pymysql
+    import pymysql
+    args = sql_controller.get_connection_args()
+    if mode == LOAD_DATA:
+        args["local_infile"] = True
+    return pymysql.connect(autocommit=False, **args)
+
+def load_table(csv_path, table_name, mode=EXECUTEMANY, chunk_size=DEFAULT_CHUNK_SIZE, before_load=None):
+    """Load one csv file into a table and return a LoadResult"""
+    start = time.perf_counter()
+    rows = 0
+    try:
+        connection = open_connection(mode)
+    except Exception as e:
+        return LoadResult(table_name, 0, 0, e)
+    try:
+        with connection.cursor() as cursor:
+            if before_load:
+                before_load(cursor)
+            if mode == LOAD_DATA:
+                rows = _load_data_infile(cursor, csv_path, table_name)
+                connection.commit()
+            else:
+                for header, chunk in read_chunks(csv_path, chunk_size):
+                    columns = ", ".join(f"`{column}`" for column in header)
+                    placeholders = ", ".join(["%s"] * len(header))
+                    # pymysql rewrites this into multi-row VALUES batches
+                    cursor.executemany(f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})", chunk)
+                    connection.commit()
+                    rows += len(chunk)
+        return LoadResult(table_name, rows, time.perf_counter() - start)
+    except Exception as e:
+        connection.rollback()
+        return LoadResult(table_name, rows, time.perf_counter() - start, e)
+    finally:
+        connection.close()
+
+def _load_data_infile(cursor, csv_path, table_name):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    variables = ", ".join(f"@c{i}" for i in range(len(header)))
+    assignments = ", ".join(f"`{column}` = NULLIF(@c{i}, '')" for i, column in enumerate(header))
+    query = f"""LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}`
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        ({variables}) SET {assignments}"""
+    return cursor.execute(query, (os.path.abspath(csv_path),))
+
+def load_directories(csv_dirs, mode=EXECUTEMANY, chunk_size=DEFAULT_CHUNK_SIZE, workers=DEFAULT_WORKERS, before_load=None, verbose=True):
+    """Load every csv in csv_dirs in foreign key order.
+
+    Tables within the same dependency level are loaded in parallel, each on its
+    own connection. Loading stops after the first level with a failed table,
+    since later levels would only hit foreign key errors."""
+    import pymysql
+    files = find_csv_files(csv_dirs)
+    try:
+        connection = open_connection(EXECUTEMANY)
+        try:
+            levels = dependency_levels(fetch_dependencies(connection, files))
+        finally:
+            connection.close()
+    except pymysql.MySQLError as e:
+        print(f"Could not read foreign keys ({e}), loading tables one at a time")
+        levels = fallback_levels(files)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for level in levels:
+            futures = [executor.submit(load_table, files[table], table, mode, chunk_size, before_load) for table in level]
+            level_results = [future.result() for future in futures]
+            results.extend(level_results)
+            if verbose:
+                for result in level_results:
+                    print(result)
+            if not all(result.ok for result in level_results):
+                break
+    return results
@@ -0,0 +1,296 @@
+from array import array
+from decimal import Decimal
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+# sort key of NULL in numeric columns: before every number, as MySQL sorts it
+NULL_KEY = float("-inf")
+
+def sort_key(value):
+    """Key ordering any mix of values: NULL first, then numbers, then text ignoring case,
+    then anything else by its text"""
+    if value is None:
+        return (0, 0, "")
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return (1, value, "")
+    if isinstance(value, str):
+        return (2, value.casefold(), value)
+    return (3, str(value), "")
+
+class ObjectColumn:
+    """Plain list of values, used for unique text and anything the other columns can't hold"""
+    kind = "object"
+
+    def __init__(self, values=()):
+        self.values = list(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def accepts(self, value):
+        return True
+
+    def set(self, i, value):
+        self.values[i] = value
+
+    def append(self, value):
+        self.values.append(value)
+
+    def delete(self, i):
+        del self.values[i]
+
+    def index(self, value):
+        try:
+            return self.values.index(value)
+        except ValueError:
+            return -1
+
+    def tolist(self):
+        return list(self.values)
+
+    def sort_keys(self):
+        """Key of each row's value, for sorted(rows, key=keys.__getitem__)"""
+        values = self.values
+        if all(type(value) is str or value is None for value in values):
+            # the common case of text with some NULLs, without building tuples: every
+            # string gets a prefix so NULL's empty key sorts before even ""
+            return ["" if value is None else "\0" + value.casefold() for value in values]
+        return [sort_key(value) for value in values]
+
+class _TypedColumn:
+    """Values packed into a typed array, with a byte per row marking NULLs"""
+    typecode = None
+
+    def __init__(self, values=()):
+        self.values = array(self.typecode)
+        self.nulls = bytearray()
+        for value in values:
+            self.append(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return None if self.nulls[i] else self.values[i]
+
+    def set(self, i, value):
+        if value is None:
+            self.nulls[i] = 1
+        else:
+            self.values[i] = value
+            self.nulls[i] = 0
+
+    def append(self, value):
+        if value is None:
+            self.values.append(0)
+            self.nulls.append(1)
+        else:
+            self.values.append(value)
+            self.nulls.append(0)
+
+    def delete(self, i):
+        del self.values[i]
+        del self.nulls[i]
+
+    def index(self, value):
+        if value is None:
+            return self.nulls.find(1)
+        if not self.accepts(value):
+            return -1
+        start = 0
+        while True:
+            try:
+                i = self.values.index(value, start)
+            except ValueError:
+                return -1
+            if not self.nulls[i]:
+                return i
+            start = i + 1
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+    def sort_keys(self):
+        if 1 not in self.nulls:
+            return self.values
+        keys = self.values.tolist()
+        for i, null in enumerate(self.nulls):
+            if null:
+                keys[i] = NULL_KEY
+        return keys
+
+class IntColumn(_TypedColumn):
+    kind = "int"
+    typecode = "q"
+
+    def accepts(self, value):
+        return value is None or (type(value) is int and INT64_MIN <= value <= INT64_MAX)
+
+class FloatColumn(_TypedColumn):
+    kind = "float"
+    typecode = "d"
+
+    def accepts(self, value):
+        return value is None or type(value) is float
+
+class DictColumn:
+    """Dictionary encoded column: each distinct value is stored once and rows hold codes"""
+    kind = "dict"
+
+    def __init__(self, values=()):
+        self.codes = array("i")
+        self.dictionary = []
+        self.lookup = {}
+        for value in values:
+            self.append(value)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.dictionary[self.codes[i]]
+
+    def accepts(self, value):
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    def code(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.dictionary)
+            self.dictionary.append(value)
+            self.lookup[value] = code
+        return code
+
+    def set(self, i, value):
+        self.codes[i] = self.code(value)
+
+    def append(self, value):
+        self.codes.append(self.code(value))
+
+    def delete(self, i):
+        del self.codes[i]
+
+    def index(self, value):
+        code = self.lookup.get(value) if self.accepts(value) else None
+        if code is None:
+            return -1
+        try:
+            return self.codes.index(code)
+        except ValueError:
+            return -1
+
+    def tolist(self):
+        dictionary = self.dictionary
+        return [dictionary[code] for code in self.codes]
+
+    def sort_keys(self):
+        # order the distinct values once; each row's key is its value's rank
+        order = sorted(range(len(self.dictionary)), key=lambda code: sort_key(self.dictionary[code]))
+        ranks = [0] * len(order)
+        for rank, code in enumerate(order):
+            ranks[code] = rank
+        return array("i", map(ranks.__getitem__, self.codes))
+
+def copy_column(column):
+    copied = column.__class__.__new__(column.__class__)
+    if isinstance(column, DictColumn):
+        copied.codes = array("i", column.codes)
+        copied.dictionary = list(column.dictionary)
+        copied.lookup = dict(column.lookup)
+    elif isinstance(column, _TypedColumn):
+        copied.values = array(column.typecode, column.values)
+        copied.nulls = bytearray(column.nulls)
+    else:
+        copied.values = list(column.values)
+    return copied
+
+def make_column(values):
+    """Pick the most compact column type that can hold every value"""
+    present = [value for value in values if value is not None]
+    if present and all(type(value) is int and INT64_MIN <= value <= INT64_MAX for value in present):
+        return IntColumn(values)
+    if present and all(type(value) is float for value in present):
+        return FloatColumn(values)
+    try:
+        distinct = len(set(present))
+    except TypeError:
+        return ObjectColumn(values)
+    # repeated values (ratings, countries, genres...) are stored once
+    if distinct <= max(16, len(present) // 2):
+        return DictColumn(values)
+    return ObjectColumn(values)
+
+class ColumnStore:
+    """Table of rows held as one column object per header"""
+
+    def __init__(self, rows=None, headers=None):
+        rows = rows or []
+        if headers is None:
+            headers = list(rows[0].keys()) if rows else []
+        self.headers = list(headers)
+        self.columns = [make_column([row[header] for row in rows]) for header in self.headers]
+        self._length = len(rows)
+
+    @classmethod
+    def fromColumns(cls, headers, columns, length):
+        """Wrap column objects that were built elsewhere, e.g. read from a snapshot"""
+        store = cls.__new__(cls)
+        store.headers = list(headers)
+        store.columns = list(columns)
+        store._length = length
+        return store
+
+    def copy(self):
+        return ColumnStore.fromColumns(self.headers, [copy_column(column) for column in self.columns], self._length)
+
+    def __len__(self):
+        return self._length
+
+    def get(self, row, col):
+        return self.columns[col][row]
+
+    def row(self, row):
+        return {header: column[row] for header, column in zip(self.headers, self.columns)}
+
+    def rows(self):
+        return [self.row(i) for i in range(self._length)]
+
+    def set(self, row, col, value):
+        column = self.columns[col]
+        if not column.accepts(value):
+            column = self.columns[col] = ObjectColumn(column.tolist())
+        column.set(row, value)
+
+    def append(self, row):
+        for col, header in enumerate(self.headers):
+            value = row.get(header)
+            column = self.columns[col]
+            if not column.accepts(value):
+                column = self.columns[col] = ObjectColumn(column.tolist())
+            column.append(value)
+        self._length += 1
+
+    def extend(self, rows):
+        if not self._length and rows:
+            # the first rows decide the column types
+            headers = self.headers or list(rows[0].keys())
+            self.__init__(rows, headers)
+            return
+        for row in rows:
+            self.append(row)
+
+    def delete(self, row):
+        for column in self.columns:
+            column.delete(row)
+        self._length -= 1
+
+    def index(self, col, value):
+        return self.columns[col].index(value)
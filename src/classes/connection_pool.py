@@ -0,0 +1,136 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    """Thread-safe pool of reusable database connections.
+
+    Connections are created lazily by the connect callable, checked for health
+    every time they are handed out, and closed once they have been idle for
+    longer than idle_timeout seconds. The check is a ping, one round trip per
+    checkout (well under a millisecond on a local server), so a connection the
+    server dropped is replaced instead of failing the caller's query. health_check(connection) and
+    connection_errors default to pymysql's ping and connection errors."""
+
+    def __init__(self, connect, max_size=5, idle_timeout=300,
+                 health_check=None, connection_errors=None):
+        self._connect = connect
+        if health_check is not None:
+            self._is_healthy = health_check
+        self._connection_errors = connection_errors
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = []  # list of (connection, time returned to the pool)
+        self._in_use = 0
+        self._closed = False
+        self._lock = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Check a connection out of the pool, opening one if there is room"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                self._evict_idle_locked()
+                if self._idle:
+                    connection, _ = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    connection = None
+                    self._in_use += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"no connection available after {timeout}s")
+                self._lock.wait(remaining)
+        # connect and ping outside the lock so other threads are not blocked on the network
+        try:
+            if connection is not None and not self._is_healthy(connection):
+                self._close_quietly(connection)
+                connection = None
+            if connection is None:
+                connection = self._connect()
+            return connection
+        except Exception:
+            self._release_slot()
+            raise
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or close it if it is broken"""
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed or not getattr(connection, "open", True):
+                self._close_quietly(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        broken = False
+        try:
+            yield connection
+        except Exception as e:
+            broken = self._is_connection_error(e)
+            raise
+        finally:
+            self.release(connection, discard=broken)
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle_locked()
+
+    def close(self):
+        """Close every idle connection; connections in use are closed when released"""
+        with self._lock:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+            self._idle = []
+            self._lock.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {"idle": len(self._idle), "in_use": self._in_use, "max_size": self.max_size}
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        keep = []
+        for connection, returned_at in self._idle:
+            if now - returned_at > self.idle_timeout:
+                self._close_quietly(connection)
+            else:
+                keep.append((connection, returned_at))
+        self._idle = keep
+
+    def _release_slot(self):
+        with self._lock:
+            self._in_use -= 1
+            self._lock.notify()
+
+    @staticmethod
+    def _is_healthy(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _is_connection_error(self, e):
+        if self._connection_errors is not None:
+            return isinstance(e, self._connection_errors)
+        import pymysql
+        return isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
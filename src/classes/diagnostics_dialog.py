@@ -0,0 +1,108 @@
+import json
+import os
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QTextEdit, QPushButton,
+                             QLabel, QSpinBox, QFileDialog, QMessageBox, QHeaderView, QAbstractItemView)
+
+class DiagnosticsDialog(QDialog):
+    """Per-statement timings from a QueryLog (see query_log.py), with the plans captured for slow reads"""
+
+    COLUMNS = ["Statement", "Kind", "Count", "Errors", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Rows", "Payload KB"]
+
+    def __init__(self, query_log, export_folder, parent=None):
+        super().__init__(parent)
+        self.query_log = query_log
+        self.export_folder = export_folder
+        self.summary = []
+        self.setWindowTitle("Query Diagnostics")
+        self.resize(1100, 600)
+
+        # plans are captured for reads slower than this; 0 turns it off
+        self.slow_box = QSpinBox()
+        self.slow_box.setRange(0, 600000)
+        self.slow_box.setSuffix(" ms")
+        self.slow_box.setSpecialValueText("off")
+        if query_log.slow_seconds is not None:
+            self.slow_box.setValue(int(query_log.slow_seconds * 1000))
+        self.slow_box.valueChanged.connect(self.slowThresholdChanged)
+        threshold_layout = QHBoxLayout()
+        threshold_layout.addWidget(QLabel("Capture the plan of reads slower than:"))
+        threshold_layout.addWidget(self.slow_box)
+        threshold_layout.addStretch()
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.itemSelectionChanged.connect(self.showDetails)
+
+        # full statement and plan of the selected row
+        self.details = QTextEdit()
+        self.details.setReadOnly(True)
+
+        buttons = QHBoxLayout()
+        for text, slot in [("Refresh", self.refresh), ("Clear", self.clearLog), ("Export JSONL...", self.export), ("Close", self.accept)]:
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(threshold_layout)
+        layout.addWidget(self.table, 3)
+        layout.addWidget(self.details, 1)
+        layout.addLayout(buttons)
+        self.refresh()
+
+    def refresh(self):
+        self.summary = self.query_log.summary()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(self.summary))
+        for row, entry in enumerate(self.summary):
+            values = [entry["shape"], entry["kind"], entry["count"], entry["errors"],
+                      entry["p50"] * 1000, entry["p95"] * 1000, entry["p99"] * 1000, entry["max"] * 1000,
+                      entry["rows"], entry["payload"] / 1024]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    value = round(value, 2)
+                # numbers are set as data so the columns sort numerically
+                item.setData(Qt.DisplayRole, value)
+                # the summary index survives sorting the table
+                item.setData(Qt.UserRole, row)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        self.details.clear()
+
+    def showDetails(self):
+        items = self.table.selectedItems()
+        if not items:
+            return
+        entry = self.summary[items[0].data(Qt.UserRole)]
+        text = entry["shape"]
+        plan = self.query_log.plan(entry["shape"])
+        if plan is not None:
+            text += "\n\nPlan:\n" + (plan if isinstance(plan, str) else json.dumps(plan, indent=2, default=str))
+        self.details.setPlainText(text)
+
+    def slowThresholdChanged(self, value):
+        self.query_log.slow_seconds = value / 1000 if value else None
+
+    def clearLog(self):
+        self.query_log.clear()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Query Log", os.path.join(self.export_folder, "query_log.jsonl"),
+                                              "JSON lines (*.jsonl)")
+        if not path:
+            return
+        try:
+            count = self.query_log.export_jsonl(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write {path}: {e}")
+            return
+        QMessageBox.information(self, "Exported", f"Wrote {count} statements to {path}.")
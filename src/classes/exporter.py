@@ -0,0 +1,173 @@
+"""Writing the rows a tab shows to a CSV, JSON lines or Parquet file, a chunk at a time.
+
+The rows come from the model's columns, read at the slots the proxy shows in the
+order it shows them (column_chunks), or for a paged tab from its query run on an
+unbuffered cursor (query_chunks, see sql_controller.stream_query). Either way
+only one chunk of rows is in memory at once, however many are written. Parquet
+needs pyarrow, which is only imported when a Parquet file is written.
+"""
+import csv
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+# file extension -> file dialog filter
+FORMATS = {
+    ".csv": "CSV (*.csv)",
+    ".jsonl": "JSON lines (*.jsonl)",
+    ".parquet": "Parquet (*.parquet)",
+}
+# rows read and written at a time
+CHUNK_ROWS = 5000
+
+class ExportCancelled(Exception):
+    pass
+
+def column_chunks(columns, slots, chunk_rows=CHUNK_ROWS):
+    """Lists of row tuples holding each column's value at slots, in the order of slots.
+    columns are column_store columns; they are only read, so a model that resets keeps
+    exporting the rows it had when the export started."""
+    for start in range(0, len(slots), chunk_rows):
+        chunk = slots[start:start + chunk_rows]
+        yield list(zip(*[[column[slot] for slot in chunk] for column in columns]))
+
+def query_chunks(query, params, column_names, chunk_rows=CHUNK_ROWS):
+    """Lists of row tuples with the values of column_names, streamed from a read query"""
+    from src.classes.sql_controller import stream_query
+    picks = None
+    stream = stream_query(query, params or None, chunk_rows)
+    try:
+        for columns, rows in stream:
+            if picks is None:
+                picks = [columns.index(name) for name in column_names]
+            yield [tuple(row[i] for i in picks) for row in rows]
+    finally:
+        stream.close()
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    raise TypeError(f"can't write {type(value).__name__} as JSON")
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+class JsonLinesWriter:
+    """One JSON object per row, keyed by column name"""
+
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8")
+        self.columns = columns
+
+    def write(self, rows):
+        columns = self.columns
+        self.file.writelines(json.dumps(dict(zip(columns, row)), default=_json_value, ensure_ascii=False) + "\n"
+                             for row in rows)
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    """One row group per chunk. Column types are taken from the first chunk; a column
+    that is empty there is written as text."""
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("writing Parquet files needs pyarrow (pip install pyarrow)") from e
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.columns = columns
+        self.schema = None
+        self.writer = None
+
+    def write(self, rows):
+        pa = self.pa
+        # DECIMAL precision is inferred from the values, which later chunks may exceed
+        values = [[float(value) if isinstance(value, Decimal) else value for value in column] for column in zip(*rows)]
+        if self.writer is None:
+            types = [pa.array(column).type for column in values]
+            self.schema = pa.schema([(name, pa.string() if pa.types.is_null(column_type) else column_type)
+                                     for name, column_type in zip(self.columns, types)])
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        arrays = []
+        for column, field in zip(values, self.schema):
+            if pa.types.is_string(field.type):
+                column = [None if value is None else str(value) for value in column]
+            arrays.append(pa.array(column, type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is None:
+            # no rows: still write a file with the columns
+            self.schema = self.pa.schema([(name, self.pa.string()) for name in self.columns])
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        self.writer.close()
+
+WRITERS = {".csv": CsvWriter, ".jsonl": JsonLinesWriter, ".parquet": ParquetWriter}
+
+class ExportJob:
+    """An export to run on a worker thread: rows_written can be read while it runs and
+    cancel() stops it after the chunk being written"""
+
+    def __init__(self, path, columns, chunks, total=None):
+        """chunks yields lists of row tuples with the values of columns; total is the
+        number of rows if known"""
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in WRITERS:
+            raise ValueError(f"can't export to {extension or 'a file without an extension'}, use one of {', '.join(WRITERS)}")
+        self.path = path
+        self.columns = list(columns)
+        self.chunks = chunks
+        self.total = total
+        self.rows_written = 0
+        self._writer_class = WRITERS[extension]
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def isCancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        """Write every row; returns the number written. If cancelled, or if writing fails,
+        the partly written file is removed; cancelling raises ExportCancelled."""
+        writer = self._writer_class(self.path, self.columns)
+        finished = False
+        try:
+            for rows in self.chunks:
+                if self._cancelled.is_set():
+                    raise ExportCancelled(f"export to {self.path} cancelled")
+                writer.write(rows)
+                self.rows_written += len(rows)
+            finished = True
+        finally:
+            close = getattr(self.chunks, "close", None)
+            if close is not None:
+                # stops a streaming query and gives its connection back
+                close()
+            writer.close()
+            if not finished:
+                os.remove(self.path)
+        return self.rows_written
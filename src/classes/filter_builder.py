@@ -0,0 +1,257 @@
+import datetime
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# value kinds, see parse_value
+TEXT = "text"
+NUMBER = "number"
+FLOAT = "float"
+YEAR = "year"
+DATE = "date"
+
+# how a field can be checked on rows already loaded, see local_filter.py
+SINGLE = "single"  # the view column holds the value
+LIST = "list"  # the view column holds every value, separated by LIST_JOINER
+# None: the view only shows one of several values (e.g. a movie's first star), so
+# only the database can check it
+
+# name: the view column shown in the filter dialog
+# column: the base table column the predicate is on
+# condition: WHERE condition on the view with {} where the predicate goes, usually a
+# subquery on the base table so the predicate can use that table's indexes
+# local: SINGLE, LIST or None, see above
+FilterField = namedtuple("FilterField", "name kind column condition local", defaults=(SINGLE,))
+
+_MOVIE = "movie_id IN (SELECT movie_id FROM movie WHERE {})"
+_ACTOR = "actor_id IN (SELECT actor_id FROM actor WHERE {})"
+_DIRECTOR = "director_id IN (SELECT director_id FROM director WHERE {})"
+_COMPANY = "company_id IN (SELECT company_id FROM production_company WHERE {})"
+_AWARD = "award_id IN (SELECT award_id FROM awards WHERE {})"
+_VIEW = "{}"
+
+FILTER_FIELDS = {
+    'movie_view': [
+        FilterField('title', TEXT, 'title', _MOVIE),
+        FilterField('budget', NUMBER, 'budget', _MOVIE),
+        FilterField('revenue', NUMBER, 'revenue', _MOVIE),
+        FilterField('release_year', YEAR, 'release_year', _MOVIE),
+        FilterField('runtime', NUMBER, 'runtime', _MOVIE),
+        FilterField('age_rating', TEXT, 'age_rating', _MOVIE),
+        FilterField('rating', FLOAT, 'rating', _MOVIE),
+        FilterField('award_count', NUMBER, 'award_count', _VIEW),
+        FilterField('genres', TEXT, 'g.genre_name',
+                    "movie_id IN (SELECT mg.movie_id FROM movie_genre AS mg JOIN genre AS g ON g.genre_id = mg.genre_id WHERE {})",
+                    LIST),
+        FilterField('sub_language', TEXT, 'l.language_name',
+                    "movie_id IN (SELECT ms.movie_id FROM movie_subtitle AS ms JOIN language AS l ON l.language_id = ms.language_id WHERE {})",
+                    LIST),
+        FilterField('star', TEXT, 'a.actor_name',
+                    "movie_id IN (SELECT mc.movie_id FROM movie_cast AS mc JOIN actor AS a ON a.actor_id = mc.actor_id WHERE {})",
+                    None),
+        FilterField('director_name', TEXT, 'director_name', _DIRECTOR),
+        FilterField('production_company', TEXT, 'p.company_name',
+                    "movie_id IN (SELECT mc.movie_id FROM movie_company AS mc JOIN production_company AS p ON p.company_id = mc.company_id WHERE {})",
+                    None),
+        FilterField('country_name', TEXT, 'c.country_name',
+                    "movie_id IN (SELECT mc.movie_id FROM movie_country AS mc JOIN country AS c ON c.country_id = mc.country_id WHERE {})",
+                    None),
+    ],
+    'actor_view': [
+        FilterField('name', TEXT, 'actor_name', _ACTOR),
+        FilterField('gender', TEXT, 'gender', _ACTOR),
+        FilterField('date_of_birth', DATE, 'date_of_birth', _ACTOR),
+        FilterField('country', TEXT, 'country', _ACTOR),
+        FilterField('movie_count', NUMBER, 'movie_count', _VIEW),
+    ],
+    'director_view': [
+        FilterField('name', TEXT, 'director_name', _DIRECTOR),
+        FilterField('gender', TEXT, 'gender', _DIRECTOR),
+        FilterField('date_of_birth', DATE, 'date_of_birth', _DIRECTOR),
+        FilterField('country', TEXT, 'country', _DIRECTOR),
+        FilterField('movie_count', NUMBER, 'movie_count', _VIEW),
+    ],
+    'production_view': [
+        FilterField('company_name', TEXT, 'company_name', _COMPANY),
+        FilterField('movie_count', NUMBER, 'movie_count', _VIEW),
+    ],
+    'awards_view': [
+        FilterField('organization', TEXT, 'organization', _AWARD),
+        FilterField('category', TEXT, 'category', _AWARD),
+        FilterField('times_given', NUMBER, 'times_given', _VIEW),
+    ],
+}
+
+LIST_SEPARATOR = "|"
+RANGE_SEPARATOR = ".."
+PREFIX_WILDCARD = "*"
+# ratings are stored as FLOAT with one decimal, so "equal" means within half a step
+FLOAT_TOLERANCE = 0.05
+# separator of the values of a LIST field in the view, see movie_view
+LIST_JOINER = ", "
+
+# The text typed for a field parsed into an operator and its arguments:
+#   eq [value], in [values], between [low, high], ge [low], le [high],
+#   dates [start or None, end or None] for start <= value < end,
+#   prefix [text], contains [text], any [Predicate, ...] for an OR of predicates
+Predicate = namedtuple("Predicate", "op values")
+
+_DATE = re.compile(r"^(\d{4})(?:-(\d{1,2})-(\d{1,2}))?$")
+
+def filter_columns(view_name):
+    return [field.name for field in FILTER_FIELDS.get(view_name, [])]
+
+def parse_value(kind, text):
+    """Turn the text typed for one field into (predicate shape, params).
+
+    The shape has {col} where the column goes. Every kind accepts a|b|c for any of
+    several values; numbers, years and dates also accept a..b, a.. and ..b ranges,
+    and text accepts abc* for a prefix and *abc for a substring match. Raises
+    ValueError for a malformed value."""
+    return predicate_sql(parse_predicate(kind, text))
+
+def parse_predicate(kind, text):
+    """The Predicate for the text typed for one field, see parse_value"""
+    text = text.strip()
+    if LIST_SEPARATOR in text:
+        values = [value.strip() for value in text.split(LIST_SEPARATOR) if value.strip()]
+        if not values:
+            raise ValueError(f"no values in {text!r}")
+        if kind == DATE or kind == FLOAT or (kind == TEXT and any(PREFIX_WILDCARD in value for value in values)):
+            # each value covers a range, so the list is an OR of ranges
+            return Predicate("any", [parse_predicate(kind, value) for value in values])
+        return Predicate("in", [_convert(kind, value) for value in values])
+    if kind != TEXT and RANGE_SEPARATOR in text:
+        low, high = (part.strip() for part in text.split(RANGE_SEPARATOR, 1))
+        if not low and not high:
+            raise ValueError(f"empty range {text!r}")
+        if kind == DATE:
+            return Predicate("dates", [_dateBounds(low)[0] if low else None, _dateBounds(high)[1] if high else None])
+        if low and high:
+            return Predicate("between", [_convert(kind, low), _convert(kind, high)])
+        if low:
+            return Predicate("ge", [_convert(kind, low)])
+        return Predicate("le", [_convert(kind, high)])
+    if kind == TEXT and text.startswith(PREFIX_WILDCARD):
+        substring = text.strip(PREFIX_WILDCARD)
+        if not substring:
+            raise ValueError(f"empty substring {text!r}")
+        return Predicate("contains", [substring])
+    if kind == TEXT and text.endswith(PREFIX_WILDCARD):
+        prefix = text.rstrip(PREFIX_WILDCARD)
+        if not prefix:
+            raise ValueError(f"empty prefix {text!r}")
+        return Predicate("prefix", [prefix])
+    if kind == DATE:
+        return Predicate("dates", list(_dateBounds(text)))
+    if kind == FLOAT:
+        value = _convert(kind, text)
+        return Predicate("between", [round(value - FLOAT_TOLERANCE, 6), round(value + FLOAT_TOLERANCE, 6)])
+    return Predicate("eq", [_convert(kind, text)])
+
+def predicate_sql(predicate):
+    """(shape, params) of a Predicate, with {col} in the shape where the column goes"""
+    op, values = predicate
+    if op == "eq":
+        return "{col} = %s", list(values)
+    if op == "in":
+        return "{col} IN (" + ", ".join(["%s"] * len(values)) + ")", list(values)
+    if op == "between":
+        return "{col} BETWEEN %s AND %s", list(values)
+    if op == "ge":
+        return "{col} >= %s", list(values)
+    if op == "le":
+        return "{col} <= %s", list(values)
+    if op == "dates":
+        return _dateRange(*values)
+    if op == "prefix":
+        return "{col} LIKE %s ESCAPE '!'", [escape_like(values[0]) + "%"]
+    if op == "contains":
+        return "{col} LIKE %s ESCAPE '!'", ["%" + escape_like(values[0]) + "%"]
+    if op == "any":
+        parts = [predicate_sql(part) for part in values]
+        return "(" + " OR ".join(f"({shape})" for shape, _ in parts) + ")", [p for _, params in parts for p in params]
+    raise ValueError(f"unknown operator {op!r}")
+
+def build_conditions(view_name, values):
+    """(shape, conditions) for the non-empty values of a {field name: text} dict.
+
+    conditions is a list of (sql, params) WHERE fragments, as PageSource takes them;
+    shape identifies the statement apart from its params, see filter_statement."""
+    shape = []
+    conditions = []
+    for field in FILTER_FIELDS.get(view_name, []):
+        text = values.get(field.name)
+        if text is None or str(text).strip() == "":
+            continue
+        try:
+            predicate, params = parse_value(field.kind, str(text))
+        except ValueError as e:
+            raise ValueError(f"{field.name}: {e}") from None
+        shape.append((field.name, predicate))
+        conditions.append((_condition(field, predicate), params))
+    return tuple(shape), conditions
+
+@lru_cache(maxsize=256)
+def filter_statement(view_name, shape):
+    """SELECT for a filter shape. The same filters always give the same statement text,
+    so repeated filters share query cache entries and one statement digest on the server."""
+    fields = {field.name: field for field in FILTER_FIELDS[view_name]}
+    clauses = [_condition(fields[name], predicate) for name, predicate in shape]
+    query = f"SELECT * FROM {view_name}"
+    if clauses:
+        query += " WHERE " + " AND ".join(f"({clause})" for clause in clauses)
+    return query
+
+def build_query(view_name, values):
+    """(query, params) selecting the rows of view_name matching values"""
+    shape, conditions = build_conditions(view_name, values)
+    return filter_statement(view_name, shape), [p for _, params in conditions for p in params]
+
+def _condition(field, predicate):
+    return field.condition.format(predicate.format(col=field.column))
+
+def _convert(kind, text):
+    try:
+        if kind == NUMBER:
+            return int(text)
+        if kind == FLOAT:
+            return float(text)
+        if kind == YEAR:
+            # release_year is a 4 digit string, so comparing strings orders it like numbers
+            return f"{int(text):04d}"
+    except ValueError:
+        raise ValueError(f"{text!r} is not a {kind}") from None
+    if kind == DATE:
+        return _dateBounds(text)[0]
+    return text
+
+def escape_like(text):
+    """text with LIKE's wildcards escaped, for a LIKE ... ESCAPE '!' pattern"""
+    # an explicit escape character, since MySQL's default backslash isn't one in SQLite
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+def _dateBounds(text):
+    """[start, end) of a year (1970) or a day (1970-01-31)"""
+    match = _DATE.match(text.strip())
+    if not match:
+        raise ValueError(f"{text!r} is not a year or YYYY-MM-DD date")
+    year, month, day = match.groups()
+    try:
+        if month is None:
+            return datetime.date(int(year), 1, 1), datetime.date(int(year) + 1, 1, 1)
+        start = datetime.date(int(year), int(month), int(day))
+    except ValueError:
+        raise ValueError(f"{text!r} is not a valid date") from None
+    return start, start + datetime.timedelta(days=1)
+
+def _dateRange(start, end):
+    clauses = []
+    params = []
+    if start:
+        clauses.append("{col} >= %s")
+        params.append(start)
+    if end:
+        clauses.append("{col} < %s")
+        params.append(end)
+    return " AND ".join(clauses), params
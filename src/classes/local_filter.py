@@ -0,0 +1,129 @@
+"""Filters checked on the rows a tab has already loaded instead of in the database.
+
+The filter text is parsed the same way as for the database (see
+filter_builder.parse_predicate) and compiled into one test per field. Each field is
+checked a column at a time on the model's column store: a dictionary encoded column
+(see column_store.py) has each distinct value tested once and its rows matched by
+code, so a genre, rating or age rating filter tests a few dozen values however many
+rows there are. Every field only looks at the rows the fields before it kept, and
+the result is a set of row slots for TableProxyModel.setRowFilter, so no row is
+copied.
+
+Text compares ignoring case, like the database's collation, and NULL matches
+nothing, like a comparison with NULL in SQL.
+"""
+import datetime
+
+from src.classes.column_store import DictColumn
+from src.classes.filter_builder import FILTER_FIELDS, TEXT, NUMBER, FLOAT, YEAR, DATE, LIST, LIST_JOINER, parse_predicate
+
+def compile_filter(view_name, values):
+    """[(view column, test)] for the non-empty values of a {field name: text} dict, or None if
+    one of them can only be checked by the database. Raises ValueError for a malformed value."""
+    tests = []
+    for field in FILTER_FIELDS.get(view_name, []):
+        text = values.get(field.name)
+        if text is None or str(text).strip() == "":
+            continue
+        try:
+            predicate = parse_predicate(field.kind, str(text))
+        except ValueError as e:
+            raise ValueError(f"{field.name}: {e}") from None
+        if field.local is None:
+            return None
+        test = make_test(field.kind, predicate)
+        if field.local == LIST:
+            test = _anyItem(test)
+        tests.append((field.name, test))
+    return tests
+
+def make_test(kind, predicate):
+    """Function telling whether a value of the view (never None) matches a Predicate"""
+    op, values = predicate
+    if op == "any":
+        tests = [make_test(kind, part) for part in values]
+        return lambda value: any(test(value) for test in tests)
+    convert = _CONVERT[kind]
+    if kind == TEXT:
+        values = [value.casefold() for value in values]
+    if op == "eq":
+        target = values[0]
+        return lambda value: convert(value) == target
+    if op == "in":
+        targets = set(values)
+        return lambda value: convert(value) in targets
+    if op == "between":
+        (low, high) = values
+        return lambda value: low <= convert(value) <= high
+    if op == "ge":
+        low = values[0]
+        return lambda value: convert(value) >= low
+    if op == "le":
+        high = values[0]
+        return lambda value: convert(value) <= high
+    if op == "dates":
+        (start, end) = values
+        return lambda value: _inDates(convert(value), start, end)
+    if op == "prefix":
+        prefix = values[0]
+        return lambda value: convert(value).startswith(prefix)
+    if op == "contains":
+        substring = values[0]
+        return lambda value: substring in convert(value)
+    raise ValueError(f"unknown operator {op!r}")
+
+def select(model, tests):
+    """Slots of the model's rows passing every test, as compile_filter returns them"""
+    slots = model.liveSlots()
+    for name, test in tests:
+        if not slots:
+            break
+        slots = _matching(model.storeColumn(model.getColIndex(name)), slots, test)
+    return set(slots)
+
+def _matching(column, slots, test):
+    if isinstance(column, DictColumn):
+        dictionary = column.dictionary
+        passing = {code for code, value in enumerate(dictionary) if value is not None and test(value)}
+        if not passing:
+            return []
+        if len(passing) == len(dictionary):
+            return slots
+        codes = column.codes
+        return [slot for slot in slots if codes[slot] in passing]
+    matched = []
+    for slot in slots:
+        value = column[slot]
+        if value is not None and test(value):
+            matched.append(slot)
+    return matched
+
+def _anyItem(test):
+    # every value of a LIST field, e.g. "Action, Drama", is checked on its own
+    return lambda value: any(test(item) for item in str(value).split(LIST_JOINER))
+
+def _text(value):
+    return str(value).casefold()
+
+def _number(value):
+    return value
+
+def _year(value):
+    # release_year is a 4 digit string, compared as the database compares it
+    return str(value)
+
+def _date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    # SQLite returns dates as text
+    try:
+        return datetime.date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+def _inDates(value, start, end):
+    return value is not None and (start is None or start <= value) and (end is None or value < end)
+
+_CONVERT = {TEXT: _text, NUMBER: _number, FLOAT: _number, YEAR: _year, DATE: _date}
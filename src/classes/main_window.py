@@ -2,35 +2,58 @@
 # imports
 import os, sys, traceback
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QMainWindow, QStackedWidget, QDialog, QSpinBox, QTextEdit, QTabWidget, QToolButton, QWidget, QInputDialog, QHBoxLayout, QVBoxLayout, QLabel, QToolBar, QMessageBox, QAction, QMenu, QLineEdit
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QMainWindow, QStackedWidget, QDialog, QSpinBox, QTextEdit, QTabWidget, QToolButton, QWidget, QInputDialog, QHBoxLayout, QVBoxLayout, QLabel, QToolBar, QMessageBox, QAction, QMenu, QLineEdit, QComboBox, QDockWidget, QTextBrowser, QFileDialog, QProgressDialog
 from PyQt5.QtGui import QIcon
 from pathlib import Path
-import json
+import html
 
 from src.classes.tab import TabWidget
+from src.classes.diagnostics_dialog import DiagnosticsDialog
+from src.classes.bitmap_index import BitmapIndex, DIMENSIONS, TABLES as BITMAP_TABLES
+from src.classes.recommender import Recommender, read_features, TABLES as RECOMMENDER_TABLES
+from src.classes.similar_dialog import SimilarMoviesDialog
+from src.classes.movie_details import DetailCache, fetch_details
+from src.classes.exporter import ExportJob, FORMATS as EXPORT_FORMATS, column_chunks, query_chunks
+from src.classes.query_worker import run_in_background
+from src.classes.unit_of_work import UnitOfWork
+from src.classes import startup_profile
+from src.classes.snapshot import read_snapshot, change_token, refresh as refresh_snapshot
 from src.classes.sql_controller import *
 
+# tabs with at least this many rows (and paged tabs) are searched by the database
+SERVER_SEARCH_ROWS = 20000
+# watchlist changes are written to the database this often, and when the window closes
+AUTOSAVE_INTERVAL = 10000
+# while autosaves fail the interval doubles up to this, so an unreachable database isn't retried constantly
+AUTOSAVE_MAX_INTERVAL = 300000
+# details of the movies this many rows above and below the selected one are fetched with it
+DETAIL_PREFETCH_ROWS = 10
+# movies whose details are kept, see movie_details.DetailCache
+DETAIL_CACHE_SIZE = 500
+
 class MainWindow(QMainWindow):
     def __init__(self):
         """Build window with task table"""
         super().__init__()
-        attempt = connect_to_database()
-        if attempt is None:
+        with startup_profile.measure("db connect"):
+            connected = check_connection()
+        if not connected:
             loaded = self.loadSQLData()
             print("Return of method loadSQLData:", loaded)
             if not loaded:
                 print("Loading ddl failed...")
                 sys.exit(1)
-        else:
-            attempt.close()
         # set up window
         self.setWindowTitle("Movie Database")
-        from src.run import resource_path
+        from src.resources import resource_path
         self.setWindowIcon(QIcon(resource_path(Path('data/computer.ico'))))
 
         # create menu bar widgets
         new_action = QAction("New Watchlist", self)
+        diagnostics_action = QAction("Diagnostics", self)
+        genre_query_action = QAction("Genre/Language Query", self)
+        export_action = QAction("Export", self)
         self.hide_columns_button = QToolButton()
         self.hide_columns_button.setText("Hide Columns")
         self.filter_button = QToolButton()
@@ -39,18 +62,52 @@ class MainWindow(QMainWindow):
         # create search bar
         search_label = QLabel("Search: ")
         self.search_bar = QLineEdit()
-
-        # create tabs
+        self.search_scope = QComboBox()
+        self.searched_tab = None
+        self.pending_search = None
+        # built on the first genre/language query, see movieBitmapIndex
+        self.bitmap_index = None
+        self.bitmap_versions = None
+        self.last_genre_query = ""
+        # built in the background after startup and updated there, see movieRecommender
+        self.recommender = None
+        self.recommender_versions = None
+        self.recommender_updating = False
+        # details of the selected movie and the rows around it, see movieSelected
+        self.detail_cache = DetailCache(self.fetchDetails, max_entries=DETAIL_CACHE_SIZE)
+        self.detail_movie = None
+        self.detail_pending = set()
+        # ExportJob -> its progress dialog, see exportTab
+        self.exports = {}
+        # wait for a pause in typing before searching the database
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.runServerSearch)
+        self.save_timer = QTimer(self)
+        self.save_timer.setInterval(AUTOSAVE_INTERVAL)
+        self.save_timer.timeout.connect(self.autosave)
+        self.saving = False
+
+        # create placeholder tabs, their rows are loaded once the window is shown
         self.tabs = QTabWidget()
         with open("data/main_tables.txt") as file:
             for s in file.readlines():
-                (query, name) = s.strip().split(",,,")
+                # optional third and fourth fields turn on paging: rows per page, and the
+                # space separated key columns pages are ordered by (an indexed unique key)
+                (query, name, *paging) = s.strip().split(",,,")
                 table_name = query.split(" ")[-1]
-                info = query_data(query)
-                self.tabs.addTab(TabWidget(self, info, table_name), name)
+                page_size = int(paging[0]) if paging and paging[0] else None
+                key_columns = paging[1].split() if len(paging) > 1 else None
+                tab = TabWidget(self, None, table_name, query=query, page_size=page_size, key_columns=key_columns,
+                                loading=True)
+                self.tabs.addTab(tab, name)
         self.tabs.widget(0).person_menu.triggered.connect(self.goToID)
         self.tabs.widget(0).watchlist_menu.triggered.connect(self.addToWatchlist)
+        self.tabs.widget(0).moreLikeThis.connect(self.moreLikeThis)
         self.tabs.setCurrentIndex(0)
+        for i in range(self.tabs.count()):
+            self.watchSelection(self.tabs.widget(i))
 
         # create stacked widget
         self.stacked_widget = QStackedWidget(self)
@@ -77,7 +134,11 @@ class MainWindow(QMainWindow):
 
         # connect actions
         new_action.triggered.connect(self.newWatchlist)
-        self.search_bar.textChanged.connect(self.tabs.currentWidget().proxy.setFilterFixedString)
+        diagnostics_action.triggered.connect(self.showDiagnostics)
+        genre_query_action.triggered.connect(self.genreQuery)
+        export_action.triggered.connect(self.exportTab)
+        self.search_bar.textChanged.connect(self.searchChanged)
+        self.search_scope.currentIndexChanged.connect(self.searchScopeChanged)
         self.tabs.currentChanged.connect(self.changeCurrentTab)
         self.side_bar.actionTriggered.connect(self.sideBarClicked)
         self.filter_button.clicked.connect(self.setFilter)
@@ -90,11 +151,16 @@ class MainWindow(QMainWindow):
             self.menubar.addAction(action)
         for widget in menu_widgets:
             self.menubar.addWidget(widget)
+        # after the widgets, which sideBarClicked finds by position
+        self.menubar.addAction(diagnostics_action)
+        self.menubar.addAction(genre_query_action)
+        self.menubar.addAction(export_action)
 
         # create horizontal search bar layout
         search_layout = QHBoxLayout()
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_bar)
+        search_layout.addWidget(self.search_scope)
         search_layout.setContentsMargins(10, 0, 10, 0)
         search_layout.setSpacing(10)
 
@@ -112,7 +178,20 @@ class MainWindow(QMainWindow):
         self.tabs.currentWidget().model.layoutChanged.emit()
         self.addToolBar(Qt.LeftToolBarArea, self.side_bar)
 
+        # create movie detail pane
+        self.detail_view = QTextBrowser()
+        self.detail_view.setOpenLinks(False)
+        self.detail_view.setText("Select a movie to see its details.")
+        self.detail_dock = QDockWidget("Movie Details", self)
+        self.detail_dock.setWidget(self.detail_view)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.detail_dock)
+        self.menubar.addAction(self.detail_dock.toggleViewAction())
+
         self.showMaximized()
+        # runs once the event loop has painted the window
+        QTimer.singleShot(0, lambda: startup_profile.mark("first paint"))
+        self.startLoading()
+        self.save_timer.start()
 
         # locate user's download folder
         if os.name == "nt":
@@ -120,6 +199,152 @@ class MainWindow(QMainWindow):
         else:  # PORT: For *Nix systems
             self.DOWNLOAD_FOLDER = f"{os.getenv('HOME')}/Downloads"
 
+    def startLoading(self):
+        """Show every tab's snapshot right away, then check the snapshots against the database
+        in the background and query the tabs whose data changed, the Movies tab first"""
+        self.tabs_loading = 0
+        for tab in self.allTabs():
+            if tab.page_size:
+                # paged tabs only read their first page, which is cheap enough for the GUI thread
+                with startup_profile.measure(f"first page {tab.name}"):
+                    tab.loadData(None)
+                continue
+            with startup_profile.measure(f"snapshot {tab.name}"):
+                cached = read_snapshot(self.snapshotName(tab))
+            if cached:
+                (tab.snapshot_token, store) = cached
+                tab.loadData(store)
+        run_in_background("versions", startup_profile.timed("data versions", data_versions),
+                          on_finished=self.revalidateTabs, on_failed=lambda key, message: self.revalidateTabs(key, {}))
+        # the neighbours take a few seconds to compute, so they are ready before the first click
+        self.updateRecommender()
+
+    def revalidateTabs(self, key, versions):
+        for priority, tab in enumerate(reversed(self.allTabs())):
+            if tab.page_size:
+                continue
+            (query, params) = self.tabQuery(tab)
+            token = change_token(query, versions)
+            if token is not None and token == tab.snapshot_token:
+                continue
+            self.tabs_loading += 1
+            load = startup_profile.timed(f"query {tab.name}", refresh_snapshot)
+            run_in_background(tab, load, self.snapshotName(tab), query, params, token,
+                              on_finished=self.tabLoaded, on_failed=self.tabLoadFailed, priority=priority)
+        if self.tabs_loading == 0:
+            startup_profile.finish()
+
+    def allTabs(self):
+        return [self.tabs.widget(i) for i in range(self.tabs.count())] + self.watchlistTabs()
+
+    def tabQuery(self, tab):
+        if tab.query:
+            return (tab.query, None)
+        return ("CALL get_watchlist_entries(%s);", tab.watchlist_id)
+
+    def snapshotName(self, tab):
+        return tab.name if tab.query else f"watchlist_{tab.watchlist_id}"
+
+    def searchChanged(self, text):
+        tab = self.currentTab()
+        # the search bar is shared, so clear the search on the tab that was searched last
+        if self.searched_tab is not None and self.searched_tab is not tab:
+            self.clearSearch(self.searched_tab)
+        self.searched_tab = tab
+        if self.usesServerSearch(tab):
+            self.pending_search = (tab, text)
+            self.search_timer.start()
+        else:
+            tab.proxy.setFilterFixedString(text)
+
+    def usesServerSearch(self, tab):
+        # paged tabs search every column of their query themselves, see PageSource.setSearch
+        if tab.name not in SEARCHABLE_VIEWS or tab.loading or tab.page_size:
+            return False
+        return len(tab.default_data or ()) >= SERVER_SEARCH_ROWS
+
+    def clearSearch(self, tab):
+        if self.usesServerSearch(tab):
+            self.pending_search = None
+            if tab.filtered:
+                tab.setFilter()
+        tab.proxy.setFilterFixedString("")
+
+    def runServerSearch(self):
+        if self.pending_search is None:
+            return
+        (tab, text) = self.pending_search
+        if text.strip() == "":
+            tab.proxy.setFilterFixedString("")
+            if tab.filtered:
+                tab.setFilter()
+            return
+        run_in_background(self.pending_search, search_view, tab.name, text,
+                          on_finished=self.serverSearchFinished, on_failed=self.serverSearchFailed)
+
+    def serverSearchFinished(self, key, rows):
+        if key != self.pending_search:
+            return  # the text changed while this search was running
+        (tab, text) = key
+        if rows is None:
+            # no word long enough for the index, filter the loaded rows instead
+            tab.proxy.setFilterFixedString(text)
+        else:
+            tab.showSearchResults(rows)
+            tab.proxy.setFilterFixedString("")
+
+    def serverSearchFailed(self, key, message):
+        print(f"Search failed: {message}")
+        if key == self.pending_search:
+            key[0].proxy.setFilterFixedString(key[1])
+
+    def searchScopeChanged(self, index):
+        column = self.search_scope.itemData(index)
+        self.currentTab().proxy.setSearchColumns(None if column is None else [column])
+
+    def setSearchScopes(self):
+        """List the current tab's visible columns in the search scope box"""
+        tab = self.currentTab()
+        self.search_scope.blockSignals(True)
+        self.search_scope.clear()
+        self.search_scope.addItem("All columns", None)
+        for i, column in enumerate(tab.columns):
+            if "_id" not in column:
+                self.search_scope.addItem(column, i)
+        self.search_scope.blockSignals(False)
+        tab.proxy.setSearchColumns(None)
+
+    def tabLoaded(self, tab, data):
+        if tab.loading:
+            tab.loadData(data)
+        elif tab.snapshot_token is not None:
+            # the tab is showing an outdated snapshot
+            tab.refreshData(data)
+        if tab is self.currentTab():
+            self.setColumnsMenu()
+        self.tabFinishedLoading()
+
+    def tabLoadFailed(self, tab, message):
+        print(f"Loading {tab.name} failed: {message}")
+        if tab.loading:
+            tab.loadFailed(message)
+        self.tabFinishedLoading()
+
+    def tabFinishedLoading(self):
+        self.tabs_loading -= 1
+        if self.tabs_loading == 0:
+            startup_profile.finish()
+
+    def ensureLoaded(self, tab):
+        """Load a watchlist tab right away if its background query hasn't finished yet"""
+        if tab.loading:
+            tab.loadData(query_data("CALL get_watchlist_entries(%s);", params=tab.watchlist_id))
+
+    def currentTab(self):
+        if self.stacked_widget.currentIndex() == 0:
+            return self.tabs.currentWidget()
+        return self.stacked_widget.currentWidget().tab
+
     def getConfirmation(self, action, task_name, message):
         """Ask user if they would like to complete the action"""
         # create message box
@@ -134,8 +359,8 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Ask user if they would like to save unsaved changes"""
-        # check if model is dirty or not
-        if self.model.isDirty() == False:
+        # check if any watchlist has unsaved changes
+        if self.isDirty() == False:
             # close
             event.accept()
         else:
@@ -144,7 +369,10 @@ class MainWindow(QMainWindow):
                             "Would you like to save your changes before exiting?", QMessageBox.Yes, QMessageBox.No)
             # save if yes accepted
             if reply == QMessageBox.Yes:
-                self.save()
+                if self.save():
+                    event.accept()
+                else:
+                    event.ignore()
             else:
                 second_confirmation = QMessageBox.question(self, 'Discard Changes', 
                             "Are you sure you want to delete all changes and exit?", QMessageBox.Yes, QMessageBox.Cancel)
@@ -152,6 +380,54 @@ class MainWindow(QMainWindow):
                     event.ignore()
                 else: event.accept()
     
+    def watchlistTabs(self):
+        return [self.stacked_widget.widget(i).tab for i in range(1, self.stacked_widget.count())]
+
+    def isDirty(self):
+        return any(tab.model.isDirty() for tab in self.watchlistTabs())
+
+    def save(self, interactive=True):
+        """Write every watchlist's pending changes; returns False if a save failed or one is running.
+
+        Problems are shown in dialogs when interactive, and in the status bar otherwise."""
+        # a dialog below runs a nested event loop, in which the autosave timer keeps firing
+        if self.saving:
+            return False
+        self.saving = True
+        try:
+            conflicts = []
+            for tab in self.watchlistTabs():
+                try:
+                    result = tab.save()
+                except Exception as e:
+                    print(e)
+                    if interactive:
+                        QMessageBox.critical(self, "Error", f"Uh oh! The changes to {tab.name} couldn't be saved.\n\n{e}")
+                    else:
+                        self.statusBar().showMessage(f"Couldn't save the changes to {tab.name}, will try again: {e}")
+                    return False
+                if result is not None and not result.ok:
+                    conflicts.append(f"{tab.name}: {len(result.conflicts)}")
+            if conflicts and interactive:
+                QMessageBox.warning(self, "Changed Elsewhere", "Some watchlist entries were changed elsewhere since they were loaded, "
+                                    "so your changes to them were replaced:\n" + "\n".join(conflicts))
+            elif conflicts:
+                self.statusBar().showMessage("Entries changed elsewhere were replaced by the stored ones: " + ", ".join(conflicts))
+            return True
+        finally:
+            self.saving = False
+
+    def autosave(self):
+        if not self.isDirty():
+            return
+        if self.save(interactive=False):
+            if self.save_timer.interval() != AUTOSAVE_INTERVAL:
+                self.save_timer.setInterval(AUTOSAVE_INTERVAL)
+                self.statusBar().showMessage("Changes saved", 5000)
+        elif not self.saving:
+            # back off while the database can't be reached
+            self.save_timer.setInterval(min(self.save_timer.interval() * 2, AUTOSAVE_MAX_INTERVAL))
+
     def columnsChange(self, checkbox):
         """Toggle if a column is hidden or shown"""
         if self.stacked_widget.currentIndex() == 0:
@@ -163,7 +439,6 @@ class MainWindow(QMainWindow):
 
     def changeCurrentTab(self):
         self.search_bar.clear()
-        self.search_bar.textChanged.connect(self.tabs.currentWidget().proxy.setFilterFixedString)
         self.setColumnsMenu()
     
     def sideBarClicked(self, action):
@@ -172,10 +447,8 @@ class MainWindow(QMainWindow):
             self.stacked_widget.setCurrentIndex(index)
             self.search_bar.clear()
             if index == 0:
-                self.search_bar.textChanged.connect(self.tabs.currentWidget().proxy.setFilterFixedString)
                 self.menubar.actions()[2].setVisible(True)
             else:
-                self.search_bar.textChanged.connect(self.stacked_widget.currentWidget().tab.proxy.setFilterFixedString)
                 self.menubar.actions()[2].setVisible(False)
             self.setColumnsMenu()
         except Exception as e:
@@ -212,8 +485,267 @@ class MainWindow(QMainWindow):
             query = "INSERT INTO watchlists (name, description) VALUES (%s, %s);"
             query_data(query, params=(name, description))
             # add watchlist to sidebar
-            self.createWatchlistWidget(len(self.watchlists), name, description, len(self.watchlists))
+            watchlist_widget = self.createWatchlistWidget(len(self.watchlists), name, description, len(self.watchlists))
+            self.ensureLoaded(watchlist_widget.tab)
     
+    def showDiagnostics(self):
+        """Show the timings of the statements run so far, see query_log.py"""
+        DiagnosticsDialog(get_query_log(), self.DOWNLOAD_FOLDER, self).exec_()
+
+    def movieBitmapIndex(self):
+        """The BitmapIndex of the movie tables, rebuilt when one of them changed since it was built"""
+        versions = data_versions()
+        current = [versions.get(table) for table in ("*",) + BITMAP_TABLES] if versions else None
+        if self.bitmap_index is None or current is None or current != self.bitmap_versions:
+            self.bitmap_index = BitmapIndex.fromDatabase(lambda query: query_data(query, get_tuples=True))
+            self.bitmap_versions = current
+        return self.bitmap_index
+
+    def recommenderVersions(self):
+        versions = data_versions()
+        return [versions.get(table) for table in ("*",) + RECOMMENDER_TABLES] if versions else None
+
+    def updateRecommender(self):
+        """Build the Recommender, or bring it up to date, on a worker thread unless that is
+        already running. The current one keeps answering until the new one is ready."""
+        if self.recommender_updating:
+            return
+        self.recommender_updating = True
+        run_in_background("recommender", self.readRecommender, self.recommender, self.recommender_versions,
+                          on_finished=self.recommenderBuilt, on_failed=self.recommenderFailed, priority=-1)
+
+    def readRecommender(self, recommender, known_versions):
+        """(versions, Recommender) matching the database, or None if recommender already does.
+        Safe on a worker thread: a copy of recommender is updated, not the one being shown."""
+        query = lambda sql: query_data(sql, get_tuples=True)
+        versions = self.recommenderVersions()
+        if recommender is None:
+            return (versions, Recommender.fromDatabase(query))
+        if versions is not None and versions == known_versions:
+            return None
+        recommender = recommender.copy()
+        recommender.update(*read_features(query))
+        return (versions, recommender)
+
+    def recommenderBuilt(self, key, result):
+        self.recommender_updating = False
+        if result is not None:
+            (self.recommender_versions, self.recommender) = result
+
+    def recommenderFailed(self, key, message):
+        self.recommender_updating = False
+        print(f"Building recommendations failed: {message}")
+
+    def movieRecommender(self):
+        """The last built Recommender, or None while the first one is still being built.
+        Movies changed since it was built are picked up in the background for the next call."""
+        self.updateRecommender()
+        if self.recommender is None:
+            QMessageBox.information(self, "Loading", "The recommendations are still being computed. Try again in a moment.")
+        return self.recommender
+
+    def moreLikeThis(self, movie_id, title):
+        try:
+            recommender = self.movieRecommender()
+            if recommender is None:
+                return
+            movies = [(other, recommender.titles.get(other, other), score) for other, score in recommender.neighbours(movie_id)]
+        except Exception as e:
+            self.showError("more like this", e)
+            return
+        SimilarMoviesDialog(f"More Like {title}", movies, self.showMovie, self.showMovies, self).exec_()
+
+    def recommendForWatchlist(self, watchlist_id):
+        widgets = [self.stacked_widget.widget(i) for i in range(1, self.stacked_widget.count())]
+        widget = next((widget for widget in widgets if widget.id == watchlist_id), None)
+        if widget is None:
+            return
+        try:
+            recommender = self.movieRecommender()
+            if recommender is None:
+                return
+            movies = [(other, recommender.titles.get(other, other), score)
+                      for other, score in recommender.recommend(widget.tab.ratedMovies())]
+        except Exception as e:
+            self.showError("recommend movies", e)
+            return
+        SimilarMoviesDialog(f"Recommended For {widget.tab.name}", movies, self.showMovie, self.showMovies, self).exec_()
+
+    def moviesTab(self):
+        """Index of the Movies tab in self.tabs, or -1"""
+        return next((i for i in range(self.tabs.count()) if self.tabs.widget(i).name == "movie_view"), -1)
+
+    def showMovie(self, movie_id):
+        """Switch to the Movies tab and select a movie"""
+        index = self.moviesTab()
+        if index == -1:
+            return
+        self.stacked_widget.setCurrentIndex(0)
+        self.menubar.actions()[2].setVisible(True)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.widget(index).findPerson(movie_id, "movie_id")
+
+    def showMovies(self, movie_ids):
+        """Switch to the Movies tab showing only some movies"""
+        index = self.moviesTab()
+        if index == -1 or self.tabs.widget(index).loading:
+            return
+        self.stacked_widget.setCurrentIndex(0)
+        self.menubar.actions()[2].setVisible(True)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.widget(index).showMovies(movie_ids)
+
+    def exportTab(self):
+        """Write the rows and columns the current tab shows, in its order, to a CSV, JSON lines
+        or Parquet file on a worker thread (see exporter.py)"""
+        tab = self.currentTab()
+        if tab.loading:
+            QMessageBox.information(self, "Loading", "The rows are still loading. Try again in a moment.")
+            return
+        (path, chosen) = QFileDialog.getSaveFileName(self, "Export", os.path.join(self.DOWNLOAD_FOLDER, tab.name + ".csv"),
+                                                     ";;".join(EXPORT_FORMATS.values()))
+        if not path:
+            return
+        if os.path.splitext(path)[1].lower() not in EXPORT_FORMATS:
+            path += next((extension for extension, name in EXPORT_FORMATS.items() if name == chosen), ".csv")
+        indexes = tab.visibleColumns()
+        names = [tab.columns[i] for i in indexes]
+        try:
+            if tab.model.isPaged():
+                # the rows past the pages loaded so far are streamed from the database
+                (query, params) = tab.model.pagedQuery()
+                job = ExportJob(path, names, query_chunks(query, params, names))
+            else:
+                slots = tab.proxy.shownSlots()
+                job = ExportJob(path, names, column_chunks([tab.model.storeColumn(i) for i in indexes], slots), len(slots))
+        except Exception as e:
+            self.showError("export", e)
+            return
+        progress = QProgressDialog(f"Exporting to {path}...", "Cancel", 0, job.total or 0, self)
+        progress.setWindowTitle("Export")
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(job.cancel)
+        timer = QTimer(progress)
+        timer.timeout.connect(lambda: self.exportProgress(job))
+        timer.start(200)
+        progress.show()
+        self.exports[job] = progress
+        run_in_background(job, job.run, on_finished=self.exportFinished, on_failed=self.exportFailed)
+
+    def exportProgress(self, job):
+        progress = self.exports.get(job)
+        if progress is None:
+            return
+        if job.total:
+            progress.setValue(job.rows_written)
+        progress.setLabelText(f"Exporting to {job.path}...\n{job.rows_written:,} rows written")
+
+    def exportFinished(self, job, rows):
+        self.exports.pop(job).close()
+        QMessageBox.information(self, "Exported", f"Wrote {rows:,} rows to {job.path}.")
+
+    def exportFailed(self, job, message):
+        self.exports.pop(job).close()
+        if not job.isCancelled():
+            QMessageBox.critical(self, "Error", f"Uh oh! The export failed.\n\n{message}")
+
+    def watchSelection(self, tab):
+        tab.view.selectionModel().currentRowChanged.connect(lambda current, previous: self.movieSelected(tab, current.row()))
+
+    def fetchDetails(self, movie_ids):
+        """{movie_id: details} of some movies in one statement per batch; safe on a worker thread"""
+        # the DetailCache keeps them, so they would only crowd the query cache
+        return fetch_details(movie_ids, lambda query, params: query_data(query, get_tuples=True, params=params, use_cache=False))
+
+    def nearbyMovies(self, tab, view_row, rows):
+        """movie_ids of the rows from rows above to rows below view_row, nearest first"""
+        movie_ids = []
+        for offset in sorted(range(-rows, rows + 1), key=abs):
+            movie = tab.movieAt(view_row + offset)
+            if movie is not None:
+                movie_ids.append(movie[0])
+        return movie_ids
+
+    def movieSelected(self, tab, view_row):
+        """Show the details of the movie selected in a tab. Those of the rows around it are
+        fetched in the same statement, so moving through the rows rarely waits for the database."""
+        movie = tab.movieAt(view_row)
+        if movie is None or not self.detail_dock.isVisible():
+            return
+        self.detail_movie = movie
+        self.showDetails(*movie, self.detail_cache.get(movie[0]))
+        # refetch once the selection comes within half the window of a row not fetched yet
+        if not self.detail_cache.missing(self.nearbyMovies(tab, view_row, DETAIL_PREFETCH_ROWS // 2)):
+            return
+        missing = [movie_id for movie_id in self.detail_cache.missing(self.nearbyMovies(tab, view_row, DETAIL_PREFETCH_ROWS))
+                   if movie_id not in self.detail_pending]
+        if not missing:
+            return
+        self.detail_pending.update(missing)
+        run_in_background(tuple(missing), self.detail_cache.load, missing,
+                          on_finished=self.detailsLoaded, on_failed=self.detailsFailed)
+
+    def detailsLoaded(self, key, details):
+        self.detail_pending.difference_update(key)
+        if self.detail_movie is not None and self.detail_movie[0] in details:
+            self.showDetails(*self.detail_movie, details[self.detail_movie[0]])
+
+    def detailsFailed(self, key, message):
+        self.detail_pending.difference_update(key)
+        if self.detail_movie is not None and self.detail_movie[0] in key:
+            self.detail_view.setText(f"The details couldn't be loaded.\n\n{message}")
+
+    def showDetails(self, movie_id, title, details):
+        """Fill the detail pane; details None means they are still being fetched"""
+        parts = [f"<h3>{html.escape(str(title))}</h3>"]
+        if details is None:
+            parts.append("<p>Loading...</p>")
+        else:
+            awards = [f"{organization}: {category}" if year is None else f"{year} {organization}: {category}"
+                      for (year, organization, category) in details["awards"]]
+            # awards one per line, the rest as comma separated lists
+            for heading, values, separator in [("Directed by", details["directors"], ", "), ("Cast", details["cast"], ", "),
+                                               ("Awards", awards, "<br>"), ("Audio", details["audio"], ", "),
+                                               ("Subtitles", details["subtitles"], ", "),
+                                               ("Production companies", details["companies"], ", "),
+                                               ("Countries", details["countries"], ", ")]:
+                shown = separator.join(html.escape(str(value)) for value in values) if values else "<i>none</i>"
+                parts.append(f"<p><b>{heading}</b><br>{shown}</p>")
+        self.detail_view.setHtml("".join(parts))
+
+    def genreQuery(self):
+        """Show the movies matching a query like "genre:Horror AND subtitle:French AND NOT country:US"
+        in the Movies tab, answered from a bitmap index (see bitmap_index.py)"""
+        index = self.moviesTab()
+        if index == -1:
+            return
+        (text, success) = QInputDialog.getText(self, "Genre/Language Query",
+                                               "Fields: " + ", ".join(DIMENSIONS) + ". Combine them with AND, OR, NOT and ( ).\n"
+                                               "e.g. genre:Horror AND genre:Comedy AND subtitle:English AND NOT country:US\n"
+                                               "Leave empty to show every movie.", QLineEdit.Normal, self.last_genre_query)
+        if not success:
+            return
+        self.last_genre_query = text
+        self.stacked_widget.setCurrentIndex(0)
+        self.menubar.actions()[2].setVisible(True)
+        self.tabs.setCurrentIndex(index)
+        tab = self.tabs.widget(index)
+        if tab.loading:
+            QMessageBox.information(self, "Loading", "The movies are still loading. Try again in a moment.")
+            return
+        try:
+            if not text.strip():
+                tab.setFilter()
+                return
+            bitmap_index = self.movieBitmapIndex()
+            tab.showMovies(bitmap_index.movieIds(bitmap_index.query(text)))
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Uh oh! Looks like your query was off. Try again.\n\n{e}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", "Uh oh! The query couldn't be run. Try again.")
+            print(e)
+
     def setColumnsMenu(self):
     # dynamically add actions to visible_columns_menu
         visible_columns_menu = QMenu()
@@ -238,6 +770,7 @@ class MainWindow(QMainWindow):
 
         # attach menus to qtoolbuttons
         self.hide_columns_button.setMenu(visible_columns_menu)
+        self.setSearchScopes()
 
     def goToID(self, action):
         (person_id, tab_index, col_name) = action.whatsThis().split(",")
@@ -245,29 +778,43 @@ class MainWindow(QMainWindow):
         self.tabs.currentWidget().findPerson(int(person_id), col_name)
 
     def setFilter(self):
-        columns = query_data("SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = 'testmoviedb' AND TABLE_NAME = '%s';" % self.tabs.currentWidget().name, get_tuples = True)
-        columns = [column for column in columns if '_id' not in column]
-        success, values = self.get_text_values("Set Filter", columns, [QLineEdit() for _ in range(len(columns))], self, title = "Set Filter")
+        tab = self.tabs.currentWidget()
+        columns = filter_columns(tab.name)
+        if not columns:
+            return
+        editors = [QLineEdit() for _ in range(len(columns))]
+        for editor in editors:
+            editor.setPlaceholderText("a | b,  a..b,  abc*,  *abc")
+        success, values = self.get_text_values("Set Filter", columns, editors, self, title = "Set Filter")
         if success:
-            values = [None if v == "" else v for v in values]
-            print(columns)
-            procedure_name = "filter_" + self.tabs.currentWidget().name
-            from src.classes.sql_controller import callProcedure
+            values = dict(zip(columns, values))
             try:
-                new_data = callProcedure(procedure_name, values)
-                self.tabs.currentWidget().setFilter(new_data)
+                if tab.model.isPaged():
+                    tab.setConditions(filter_conditions(tab.name, values))
+                elif tab.setLocalFilter(values):
+                    # answered from the rows the tab already has
+                    return
+                elif any(value.strip() for value in values.values()):
+                    tab.setFilter(filter_view(tab.name, values))
+                else:
+                    tab.setFilter()
+            except ValueError as e:
+                QMessageBox.critical(self, "Error", f"Uh oh! Looks like your formatting was off. Try again.\n\n{e}")
             except Exception as e:
-                QMessageBox.critical(self, "Error", "Uh oh! Looks like your formatting was off. Try again.")
+                QMessageBox.critical(self, "Error", "Uh oh! The filter couldn't be run. Try again.")
                 print(e)
-        
-    
+
     def addToWatchlist(self, action):
+        if not action.data():
+            # "More Like This", which has its own slot
+            return
         (watchlist_id, movie_id, watchlist_name, movie_name) = action.data()
         row_index = -1
         widget_index = -1
         col_index = -1
         for i in range(1, self.stacked_widget.count()):
             if self.stacked_widget.widget(i).id == watchlist_id:
+                self.ensureLoaded(self.stacked_widget.widget(i).tab)
                 row_index, col_index = self.stacked_widget.widget(i).tab.model.getRowIndexFromVal(int(movie_id), "movie_id")
                 widget_index = i
         if row_index == -1:
@@ -278,14 +825,12 @@ class MainWindow(QMainWindow):
             if success:
                 # check if they added a comment
                 if comment == "": comment = "NA"
-                # add entry to sql table
-                query = "INSERT INTO watchlist_entries (movie_id, watchlist_id, rating, comment) VALUES (%s, %s, %s, %s);"
-                query_data(query, params=(movie_id, watchlist_id, rating, comment))
-                # locate watchlist in stacked_widget and update
+                # add the entry to the watchlist's tab; it is written to the sql table on the next save
+                entry = {'watchlist_id': watchlist_id, 'movie_id': int(movie_id), 'movie_name': movie_name,
+                         'rating': rating, 'comment': comment, 'last_edited': None}
                 for i in range(1, self.stacked_widget.count()):
-                    if self.stacked_widget.widget(i).tab.name == watchlist_name:
-                        entries_info = query_data("CALL get_watchlist_entries(%s);", params=watchlist_id)
-                        self.stacked_widget.widget(i).tab.setFilter(entries_info)
+                    if self.stacked_widget.widget(i).id == watchlist_id:
+                        self.stacked_widget.widget(i).tab.upsertEntry(entry)
         else:
             find_entry = QMessageBox()
             find_entry.setIcon(QMessageBox.Information)
@@ -296,7 +841,6 @@ class MainWindow(QMainWindow):
             if ret_val == QMessageBox.Ok:
                 self.stacked_widget.setCurrentIndex(widget_index)
                 self.search_bar.clear()
-                self.search_bar.textChanged.connect(self.stacked_widget.currentWidget().tab.proxy.setFilterFixedString)
                 self.menubar.actions()[2].setVisible(False)
                 self.setColumnsMenu()
                 view_index = self.stacked_widget.currentWidget().tab.getRowFromModel(row_index, col_index)
@@ -332,15 +876,21 @@ class MainWindow(QMainWindow):
         temp = QAction(name, self)
         temp.setWhatsThis(str(index))
         self.side_bar.addAction(temp)
-        entries_info = query_data("CALL get_watchlist_entries(%s);", params=watchlist_id)
         watchlist_widget = QWidget()
         watchlist_widget.id = watchlist_id
         layout = QVBoxLayout()
         layout.addWidget(QLabel(name + ": " + description))
-        watchlist_widget.tab = TabWidget(watchlist_widget, entries_info, name)
+        watchlist_widget.tab = TabWidget(watchlist_widget, None, name, loading=True)
+        watchlist_widget.tab.watchlist_id = watchlist_id
+        watchlist_widget.tab.moreLikeThis.connect(self.moreLikeThis)
+        watchlist_widget.tab.recommendForWatchlist.connect(self.recommendForWatchlist)
+        self.watchSelection(watchlist_widget.tab)
+        # edits are kept until the next save instead of being written one at a time
+        watchlist_widget.tab.model.trackChanges(UnitOfWork())
         layout.addWidget(watchlist_widget.tab)
         watchlist_widget.setLayout(layout)
         self.stacked_widget.addWidget(watchlist_widget)
+        return watchlist_widget
     
     def getPassword(self):
         text, ret = QInputDialog.getText(None, "SQL Password","Please enter your SQL password below. Double check it, as you cannot change it later.", QLineEdit.Normal, "")
@@ -354,14 +904,15 @@ class MainWindow(QMainWindow):
     def loadSQLData(self):
         with open('data/sql_password.txt', 'r') as f:
             n = len(f.readlines())
-        if n <= 1:
+        if n <= 1 and get_backend().name == "mysql":
             new_password = self.getPassword()
             setPassword(new_password)
-        success = create_database('database_files/movie_ddl.sql')
+        # the backend's own schema file, movie_ddl.sql for MySQL
+        success = create_database()
         print("create database:", success)
         try:
-            loop_csv("database_files/parent_tables")
-            loop_csv("database_files/dependent_tables")
+            if not load_csv_dirs(["database_files/parent_tables", "database_files/dependent_tables"]):
+                return False
             with open('data/sql_password.txt', 'a') as f:
                 f.write("\nReady")
             return True
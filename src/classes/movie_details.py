@@ -0,0 +1,118 @@
+"""Everything movie_view leaves out about a movie, fetched when it is selected.
+
+movie_view has one star, company and country per movie so it stays narrow. The
+detail pane shows all of them, with the directors, awards and languages. Every
+kind of detail is one part of a single UNION ALL statement, so one round trip
+fetches all the details of a batch of movies: the selected one and the rows
+around it. The results are kept in a DetailCache, a bounded LRU with a TTL like
+query_cache.QueryCache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+# each part selects (movie_id, kind, name, detail, year) for the movies in {ids}
+DETAIL_PARTS = [
+    "SELECT mc.movie_id, 'cast' AS kind, a.actor_name AS name, d.director_name AS detail, NULL AS year "
+    "FROM movie_cast AS mc JOIN actor AS a ON a.actor_id = mc.actor_id JOIN director AS d ON d.director_id = mc.director_id "
+    "WHERE mc.movie_id IN ({ids})",
+    "SELECT ma.movie_id, 'award', aw.organization, aw.category, ma.award_year "
+    "FROM movie_awards AS ma JOIN awards AS aw ON aw.award_id = ma.award_id WHERE ma.movie_id IN ({ids})",
+    "SELECT mu.movie_id, 'audio', l.language_name, NULL, NULL "
+    "FROM movie_audio AS mu JOIN language AS l ON l.language_id = mu.language_id WHERE mu.movie_id IN ({ids})",
+    "SELECT ms.movie_id, 'subtitle', l.language_name, NULL, NULL "
+    "FROM movie_subtitle AS ms JOIN language AS l ON l.language_id = ms.language_id WHERE ms.movie_id IN ({ids})",
+    "SELECT mp.movie_id, 'company', p.company_name, NULL, NULL "
+    "FROM movie_company AS mp JOIN production_company AS p ON p.company_id = mp.company_id WHERE mp.movie_id IN ({ids})",
+    "SELECT mn.movie_id, 'country', c.country_name, NULL, NULL "
+    "FROM movie_country AS mn JOIN country AS c ON c.country_id = mn.country_id WHERE mn.movie_id IN ({ids})",
+]
+# most movies fetched in one statement
+BATCH_SIZE = 50
+
+def details_query(count):
+    """(statement, params multiplier) fetching the details of count movies"""
+    ids = ", ".join(["%s"] * count)
+    return " UNION ALL ".join(part.format(ids=ids) for part in DETAIL_PARTS), len(DETAIL_PARTS)
+
+def empty_details():
+    return {"cast": [], "directors": [], "awards": [], "audio": [], "subtitles": [], "companies": [], "countries": []}
+
+def fetch_details(movie_ids, query):
+    """{movie_id: details} of movie_ids in batches of BATCH_SIZE; query(sql, params) returns
+    rows as tuples, like query_data(sql, get_tuples=True, params=params).
+
+    details has lists of actor names ("cast"), director names, (year, organization,
+    category) awards, audio and subtitle languages, companies and countries, sorted."""
+    movie_ids = list(dict.fromkeys(movie_ids))
+    found = {movie_id: empty_details() for movie_id in movie_ids}
+    for start in range(0, len(movie_ids), BATCH_SIZE):
+        batch = movie_ids[start:start + BATCH_SIZE]
+        (statement, parts) = details_query(len(batch))
+        for (movie_id, kind, name, detail, year) in query(statement, batch * parts) or []:
+            details = found.get(movie_id)
+            if details is None:
+                continue
+            if kind == "cast":
+                details["cast"].append(name)
+                details["directors"].append(detail)
+            elif kind == "award":
+                details["awards"].append((year, name, detail))
+            elif kind == "audio":
+                details["audio"].append(name)
+            elif kind == "subtitle":
+                details["subtitles"].append(name)
+            elif kind == "company":
+                details["companies"].append(name)
+            elif kind == "country":
+                details["countries"].append(name)
+    for details in found.values():
+        for kind, values in details.items():
+            # a movie with two directors lists each actor twice
+            details[kind] = sorted(set(values), key=lambda value: (value is None, value))
+    return found
+
+class DetailCache:
+    """LRU cache of fetch_details results, safe to fill from a worker thread"""
+
+    def __init__(self, fetch, max_entries=500, ttl=300):
+        """fetch(movie_ids) returns {movie_id: details}"""
+        self.fetch = fetch
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # movie_id -> (details, expiry time)
+        self._lock = threading.Lock()
+
+    def get(self, movie_id):
+        """Cached details of a movie, or None"""
+        with self._lock:
+            entry = self._entries.get(movie_id)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[movie_id]
+                return None
+            self._entries.move_to_end(movie_id)
+            return entry[0]
+
+    def missing(self, movie_ids):
+        return [movie_id for movie_id in dict.fromkeys(movie_ids) if self.get(movie_id) is None]
+
+    def load(self, movie_ids):
+        """Fetch the movies that aren't cached in one go; returns {movie_id: details} of all of them"""
+        missing = self.missing(movie_ids)
+        if missing:
+            fetched = self.fetch(missing)
+            expiry = time.monotonic() + self.ttl
+            with self._lock:
+                for movie_id, details in fetched.items():
+                    self._entries[movie_id] = (details, expiry)
+                    self._entries.move_to_end(movie_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return {movie_id: details for movie_id in movie_ids
+                for details in [self.get(movie_id)] if details is not None}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,13 +1,25 @@
-from PyQt5.QtCore import QAbstractTableModel, Qt
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from src.classes.column_store import ColumnStore
 
 class MySQLModel(QAbstractTableModel):
-    def __init__(self, data=None):
+    def __init__(self, data=None, query=None, page_size=None, prefetch_pages=1, key_columns=None):
         super(MySQLModel, self).__init__()
-        self._data = data if data else []
-        self._headers = list(data[0].keys()) if data else []
+        # bumped on every change to the rows, so work started on an older copy can be discarded
+        self.revision = 0
+        # rows are stored column by column, see column_store.py
+        self._store = ColumnStore(data if data else [])
+        self._headers = self._store.headers
+        # (column, order) of the last sort, reapplied when the rows are replaced
+        self._sort = None
+        self._resetRows()
+        self._source = None
+        # UnitOfWork recording edits for a later save, see trackChanges
+        self._changes = None
+        if query and page_size:
+            self.setPagedQuery(query, page_size, prefetch_pages, key_columns)
 
     def rowCount(self, parent=None):
-        return len(self._data)
+        return len(self._rows)
 
     def columnCount(self, parent=None):
         return len(self._headers)
@@ -16,9 +28,7 @@ class MySQLModel(QAbstractTableModel):
         if not index.isValid():
             return None
         if role == Qt.DisplayRole:
-            row = index.row()
-            col = index.column()
-            return self._data[row][self._headers[col]]
+            return self._store.columns[index.column()][self._rows[index.row()]]
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -28,38 +38,369 @@ class MySQLModel(QAbstractTableModel):
             if orientation == Qt.Vertical:
                 return section + 1
         return None
-    
+
     def getColumnNames(self):
         return self._headers
-    
+
     def getRowIndexFromVal(self, val, col_name):
-        for i, row in enumerate(self._data):
-            if row[col_name] == val:
-                return (i, list(row.keys()).index(col_name))
-        return (-1, -1)
-    
-    def removeRow(self, index):
-        del self._data[index]
-    
-    def resetModel(self, data):
+        if col_name not in self._headers:
+            return (-1, -1)
+        col = self.getColIndex(col_name)
+        rows = self.findRows(val, col_name)
+        if not rows:
+            return (-1, -1)
+        return (min(rows), col)
+
+    def findRows(self, val, col_name):
+        """Rows whose col_name equals val, looked up in a hash index built on first use"""
+        slots = self._columnIndex(self.getColIndex(col_name)).get(val)
+        if not slots:
+            return []
+        positions = self._rowPositions()
+        return [positions[slot] for slot in slots]
+
+    def slotForRow(self, row):
+        """Storage slot of a row; slots don't change when other rows are removed or reordered"""
+        return self._rows[row]
+
+    def slotValue(self, slot, col):
+        return self._store.columns[col][slot]
+
+    def storeColumn(self, col):
+        """Column object holding col's value for every slot, see column_store.py; read only"""
+        return self._store.columns[col]
+
+    def liveSlots(self):
+        return list(self._rows)
+
+    def insertRows(self, row, count, parent=QModelIndex(), rows=None):
+        """Insert count rows before row; rows gives their values as dicts, missing values are None"""
+        if parent.isValid() or count < 1 or not 0 <= row <= len(self._rows):
+            return False
+        rows = list(rows) if rows is not None else [{} for _ in range(count)]
+        if len(rows) != count:
+            return False
+        if self._changes is not None:
+            for values in rows:
+                self._changes.recordInsert(values)
+        if not self._headers:
+            # an empty model has no columns yet, the first rows decide them
+            self.resetModel(rows)
+            return True
+        first_slot = len(self._store)
+        self.beginInsertRows(parent, row, row + count - 1)
+        for values in rows:
+            self._store.append(values)
+        self._insertSlots(row, range(first_slot, len(self._store)))
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or count < 1 or row < 0 or row + count > len(self._rows):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        slots = self._rows[row:row + count]
+        if self._changes is not None:
+            for slot in slots:
+                self._changes.recordDelete(self._store.row(slot))
+        del self._rows[row:row + count]
+        self.revision += 1
+        for col, col_index in self._indexes.items():
+            column = self._store.columns[col]
+            for slot in slots:
+                self._unindex(col_index, column[slot], slot)
+        self._positions = None
+        self.endRemoveRows()
+        return True
+
+    def removeRow(self, row, parent=QModelIndex()):
+        return self.removeRows(row, 1, parent)
+
+    def findRowByKey(self, key):
+        """Row whose columns equal every value of a {col_name: value} dict, or -1"""
+        (first, *others) = key.items()
+        for row in sorted(self.findRows(first[1], first[0])):
+            slot = self._rows[row]
+            if all(self.slotValue(slot, self.getColIndex(name)) == value for name, value in others):
+                return row
+        return -1
+
+    def upsertRow(self, values, key_columns=("watchlist_id", "movie_id")):
+        """Update the row with the same key_columns as values, or append values as a new row.
+        Returns the row it ends up in."""
+        row = self.findRowByKey({name: values[name] for name in key_columns}) if self._headers else -1
+        if row == -1:
+            row = len(self._rows)
+            self.insertRows(row, 1, rows=[values])
+            return row
+        slot = self._rows[row]
+        self._recordUpdate(slot, values)
+        for name, value in values.items():
+            if name in self._headers:
+                self._setValue(slot, self.getColIndex(name), value)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._headers) - 1), [Qt.DisplayRole])
+        return row
+
+    def resetModel(self, data, headers=None):
+        """Show data in memory; this also leaves paged mode. data is a list of row dicts or a
+        ColumnStore, which is copied so the caller's store is never edited. headers keeps the
+        columns when data is empty"""
         self.beginResetModel()
-        self._data = data
-        self._headers = list(data[0].keys()) if data else []
+        self._closeSource()
+        if isinstance(data, ColumnStore):
+            self._store = data.copy()
+        else:
+            self._store = ColumnStore(data if data else [], headers if not data else None)
+        self._headers = self._store.headers
+        self._resetRows()
+        if self._sort is not None and self._sort[0] < len(self._headers):
+            self._rows = self._sortedSlots(*self._sort)
         self.endResetModel()
-    
+
     def getColIndex(self, col_name):
         return self._headers.index(col_name)
-    
+
     def getRow(self, index):
-        return self._data[index]
-    
+        return self._store.row(self._rows[index])
+
     def updateCell(self, row_index, col_name, new_value):
-        self._data[row_index][col_name] = new_value
-    
+        self._recordUpdate(self._rows[row_index], {col_name: new_value})
+        self._setValue(self._rows[row_index], self.getColIndex(col_name), new_value)
+
     def setData(self, index, value, role = Qt.EditRole):
         if index.isValid() and role == Qt.EditRole:
-            self._data[index.row()][self._headers[index.column()]] = value
+            self._recordUpdate(self._rows[index.row()], {self._headers[index.column()]: value})
+            self._setValue(self._rows[index.row()], index.column(), value)
             # Emit dataChanged signal
             self.dataChanged.emit(index, index, [Qt.DisplayRole])
             return True
-        return False
\ No newline at end of file
+        return False
+
+    # write-behind: edits are kept in a UnitOfWork and written to the database by save
+
+    def trackChanges(self, unit_of_work):
+        """Record every later insert, edit and removal in unit_of_work"""
+        self._changes = unit_of_work
+
+    def isDirty(self):
+        return self._changes is not None and self._changes.isDirty()
+
+    def save(self, fetch_row=None):
+        """Write the recorded changes in one transaction; returns the FlushResult, None if clean.
+
+        Rows that were changed elsewhere since they were loaded are replaced by the stored
+        row. A row removed here but changed elsewhere comes back as fetch_row(key) returns
+        it, since the stored row only has the table's own columns."""
+        if not self.isDirty():
+            return None
+        from src.classes.sql_controller import flush_changes
+        result = flush_changes(self._changes)
+        (changes, self._changes) = (self._changes, None)
+        try:
+            for key, stored in list(result.saved.items()) + list(result.conflicts.items()):
+                row = self.findRowByKey(dict(zip(changes.key_columns, key)))
+                if stored is None:
+                    if row != -1:
+                        self.removeRows(row, 1)
+                elif row == -1:
+                    stored = fetch_row(key) if fetch_row else None
+                    if stored:
+                        self.insertRows(len(self._rows), 1, rows=[stored])
+                else:
+                    self.upsertRow(stored, changes.key_columns)
+        finally:
+            self._changes = changes
+        return result
+
+    def discardChanges(self):
+        if self._changes is not None:
+            self._changes.clear()
+
+    # paged mode: rows are read from the database as the view scrolls
+
+    def setPagedQuery(self, query, page_size=200, prefetch_pages=1, key_columns=None):
+        from src.classes.page_source import PageSource
+        self.beginResetModel()
+        self._closeSource()
+        self._source = PageSource(query, page_size, prefetch_pages, key_columns)
+        rows = self._source.nextPage()
+        self._store = ColumnStore(rows, self._source.columns)
+        self._headers = self._store.headers
+        self._resetRows()
+        self.endResetModel()
+
+    def isPaged(self):
+        return self._source is not None
+
+    def pagedQuery(self):
+        """(sql, params) reading every row of a paged model in its current order, search and conditions"""
+        return self._source.fullQuery()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._source is None:
+            return False
+        return self._source.hasMore()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._source is None:
+            return
+        rows = self._source.nextPage()
+        if not rows:
+            return
+        start = len(self._rows)
+        first_slot = len(self._store)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._store.extend(rows)
+        self._appendSlots(range(first_slot, len(self._store)))
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Reorder the rows by column, NULLs first when ascending; column -1 restores load order.
+        In paged mode the database sorts. Rows inserted or edited later stay where they are
+        until the next sort."""
+        if not -1 <= column < len(self._headers):
+            return
+        self._sort = (column, order) if column >= 0 else None
+        if self._source is not None:
+            if column >= 0:
+                self._source.setOrder(self._headers[column], order == Qt.DescendingOrder)
+                self._reloadFirstPage()
+            return
+        self.layoutAboutToBeChanged.emit()
+        rows = self._sortedSlots(column, order)
+        # selections and the current index follow their rows
+        persistent = self.persistentIndexList()
+        if persistent:
+            positions = {slot: row for row, slot in enumerate(rows)}
+            self.changePersistentIndexList(persistent, [
+                self.index(positions[self._rows[index.row()]], index.column()) for index in persistent])
+        self._rows = rows
+        self._positions = None
+        self.layoutChanged.emit()
+
+    def setSearch(self, text):
+        """Filter a paged model with a LIKE match on every non-id column"""
+        if self._source is None:
+            return
+        self._source.setSearch(text)
+        self._reloadFirstPage()
+
+    def setConditions(self, conditions):
+        """Filter a paged model with (sql, params) WHERE fragments"""
+        if self._source is None:
+            return
+        self._source.setConditions(conditions)
+        self._reloadFirstPage()
+
+    def fetchUntil(self, col_name, val):
+        """Load pages until a row with col_name == val is loaded or there are no more rows"""
+        (row_index, col_index) = self.getRowIndexFromVal(val, col_name)
+        while row_index == -1 and self.canFetchMore():
+            start = len(self._rows)
+            self.fetchMore()
+            if len(self._rows) == start:
+                break
+            (row_index, col_index) = self.getRowIndexFromVal(val, col_name)
+        return (row_index, col_index)
+
+    def _reloadFirstPage(self):
+        self.beginResetModel()
+        self._store = ColumnStore(self._source.nextPage(), self._headers)
+        self._resetRows()
+        self.endResetModel()
+
+    def _closeSource(self):
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    # row slots and value indexes
+    # Each row keeps the slot it was stored in; self._rows lists the slots in display
+    # order, so removing a row never renumbers the slots the indexes point at.
+
+    def _resetRows(self):
+        self.revision += 1
+        self._rows = list(range(len(self._store)))
+        self._indexes = {}
+        self._positions = None
+        self._sort_cache = (self.revision, {}, {})
+
+    # sorting
+    # A column's sort keys are computed once (see column_store.py), after which ordering
+    # the rows is a single sorted() call comparing plain ints, floats or strings. Keys and
+    # finished orders are cached until the next change to the rows.
+
+    def _sortedSlots(self, column, order):
+        (revision, keys, orders) = self._sort_cache
+        if revision != self.revision:
+            (keys, orders) = ({}, {})
+            self._sort_cache = (self.revision, keys, orders)
+        cached = orders.get((column, order))
+        if cached is None:
+            # ties keep load order, whatever order the rows are shown in now
+            live = range(len(self._store)) if len(self._rows) == len(self._store) else sorted(self._rows)
+            if column < 0:
+                cached = list(live)
+            else:
+                if column not in keys:
+                    keys[column] = self._store.columns[column].sort_keys()
+                cached = sorted(live, key=keys[column].__getitem__, reverse=order == Qt.DescendingOrder)
+            orders[(column, order)] = cached
+        return list(cached)
+
+    def _appendSlots(self, slots):
+        self.revision += 1
+        for slot in slots:
+            self._rows.append(slot)
+            if self._positions is not None:
+                self._positions[slot] = len(self._rows) - 1
+            for col, col_index in self._indexes.items():
+                col_index.setdefault(self._store.columns[col][slot], set()).add(slot)
+
+    def _insertSlots(self, row, slots):
+        if row == len(self._rows):
+            self._appendSlots(slots)
+            return
+        self.revision += 1
+        self._rows[row:row] = slots
+        for col, col_index in self._indexes.items():
+            column = self._store.columns[col]
+            for slot in slots:
+                col_index.setdefault(column[slot], set()).add(slot)
+        # every row after the insert moved down
+        self._positions = None
+
+    def _recordUpdate(self, slot, values):
+        if self._changes is not None:
+            self._changes.recordUpdate(self._store.row(slot), values)
+
+    def _setValue(self, slot, col, value):
+        self.revision += 1
+        col_index = self._indexes.get(col)
+        if col_index is not None:
+            self._unindex(col_index, self._store.columns[col][slot], slot)
+            col_index.setdefault(value, set()).add(slot)
+        self._store.set(slot, col, value)
+
+    def _columnIndex(self, col):
+        col_index = self._indexes.get(col)
+        if col_index is None:
+            col_index = {}
+            column = self._store.columns[col]
+            for slot in self._rows:
+                col_index.setdefault(column[slot], set()).add(slot)
+            self._indexes[col] = col_index
+        return col_index
+
+    def _rowPositions(self):
+        if self._positions is None:
+            self._positions = {slot: row for row, slot in enumerate(self._rows)}
+        return self._positions
+
+    @staticmethod
+    def _unindex(col_index, value, slot):
+        slots = col_index.get(value)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del col_index[value]
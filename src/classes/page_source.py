@@ -0,0 +1,186 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.classes.filter_builder import escape_like
+
+class PageSource:
+    """Reads a query one page at a time using keyset pagination.
+
+    Rows are ordered by the sort column (if any) followed by the key columns, which
+    must identify a row and be covered by an index, e.g. ["movie_id"]. When ordered by
+    the key columns each page continues after the last row of the previous one, so
+    fetching page n costs the same as fetching the first. Other sort columns have ties
+    and inexact FLOAT values, so they page by OFFSET instead. Up to prefetch_pages
+    pages are fetched ahead on a background thread."""
+
+    def __init__(self, query, page_size=200, prefetch_pages=1, key_columns=None):
+        if not key_columns:
+            # guessing them from the column names picks up non-key *_id columns that no index covers
+            raise ValueError("a paged query needs its key columns, e.g. ['movie_id']")
+        self.query = query.strip().rstrip(";")
+        self.page_size = page_size
+        self.prefetch_pages = prefetch_pages
+        self.key_columns = list(key_columns)
+        self.columns = []
+        self.sort_column = None
+        self.descending = False
+        self.search_text = ""
+        self.conditions = []  # (sql, params) fragments added to the WHERE clause
+        self.exhausted = False
+        self._last_row = None
+        self._offset = 0
+        self._generation = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def reset(self):
+        """Start again from the first page, dropping pages fetched for the old query"""
+        with self._lock:
+            self._generation += 1
+            self._last_row = None
+            self._offset = 0
+            self._pending.clear()
+            self.exhausted = False
+
+    def setOrder(self, column, descending=False):
+        self.sort_column = column
+        self.descending = descending
+        self.reset()
+
+    def setSearch(self, text):
+        self.search_text = text or ""
+        self.reset()
+
+    def setConditions(self, conditions):
+        self.conditions = list(conditions)
+        self.reset()
+
+    def nextPage(self):
+        """Return the next page of rows as a list of dicts"""
+        if self.exhausted and not self._pending:
+            return []
+        with self._lock:
+            if not self._pending:
+                self._schedule_locked()
+            future = self._pending.popleft()
+        rows = future.result()
+        with self._lock:
+            while len(self._pending) < self.prefetch_pages and not self.exhausted:
+                self._schedule_locked()
+        return rows
+
+    def hasMore(self):
+        return not self.exhausted or bool(self._pending)
+
+    def fetchAll(self):
+        """Stream every remaining row, one page at a time"""
+        while True:
+            rows = self.nextPage()
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self.reset()
+        self._executor.shutdown(wait=False)
+
+    def _schedule_locked(self):
+        self._pending.append(self._executor.submit(self._fetch, self._generation))
+
+    def _fetch(self, generation):
+        # runs on the worker thread; pages are fetched strictly one after another
+        from src.classes.sql_controller import query_with_columns
+        with self._lock:
+            if generation != self._generation or self.exhausted:
+                return []
+            last_row = self._last_row
+            offset = self._offset
+        self._readColumns()
+        use_keyset = self.sort_column is None or self.sort_column in self.key_columns
+        query, params = self._select(last_row if use_keyset else None)
+        query += f" LIMIT {int(self.page_size)}"
+        if not use_keyset and offset:
+            query += f" OFFSET {int(offset)}"
+        columns, rows = query_with_columns(query, params or None)
+        with self._lock:
+            if generation != self._generation:
+                return []
+            if columns:
+                self.columns = columns
+            if rows:
+                self._last_row = rows[-1]
+                self._offset += len(rows)
+            if len(rows) < self.page_size:
+                self.exhausted = True
+        return rows
+
+    def fullQuery(self):
+        """(sql, params) reading every row in the current order, search and conditions, without paging"""
+        self._readColumns()
+        return self._select(None)
+
+    def _readColumns(self):
+        from src.classes.sql_controller import query_with_columns
+        if not self.columns:
+            # the search needs the result's columns before the first page is read
+            self.columns = query_with_columns(f"SELECT * FROM ({self.query}) AS paged LIMIT 0")[0]
+
+    def _select(self, last_row):
+        where, params = self._where(last_row)
+        order = ", ".join(f"`{column}` {'DESC' if desc else 'ASC'}" for column, desc in self._ordering())
+        query = f"SELECT * FROM ({self.query}) AS paged{where}"
+        if order:
+            query += f" ORDER BY {order}"
+        return query, params
+
+    def _ordering(self):
+        ordering = []
+        if self.sort_column:
+            ordering.append((self.sort_column, self.descending))
+        ordering += [(column, False) for column in self.key_columns if column != self.sort_column]
+        return ordering
+
+    def _where(self, last_row):
+        clauses = []
+        params = []
+        for sql, fragment_params in self.conditions:
+            clauses.append(f"({sql})")
+            params.extend(fragment_params)
+        if self.search_text:
+            searchable = [column for column in self.columns if not column.endswith("_id")]
+            if searchable:
+                clauses.append("(" + " OR ".join(f"`{column}` LIKE %s ESCAPE '!'" for column in searchable) + ")")
+                params.extend(["%" + escape_like(self.search_text) + "%"] * len(searchable))
+        if last_row is not None:
+            sql, keyset_params = self._after(last_row)
+            clauses.append(sql)
+            params.extend(keyset_params)
+        if not clauses:
+            return "", params
+        return " WHERE " + " AND ".join(clauses), params
+
+    def _after(self, last_row):
+        """Condition matching rows that sort after last_row; MySQL sorts NULL first ascending"""
+        alternatives = []
+        params = []
+        equal = []
+        equal_params = []
+        for column, desc in self._ordering():
+            value = last_row.get(column)
+            if value is None:
+                after = "1=0" if desc else f"`{column}` IS NOT NULL"
+                after_params = []
+                same = f"`{column}` IS NULL"
+                same_params = []
+            else:
+                after = f"(`{column}` < %s OR `{column}` IS NULL)" if desc else f"`{column}` > %s"
+                after_params = [value]
+                same = f"`{column}` = %s"
+                same_params = [value]
+            alternatives.append("(" + " AND ".join(equal + [after]) + ")")
+            params.extend(equal_params + after_params)
+            equal.append(same)
+            equal_params += same_params
+        return "(" + " OR ".join(alternatives) + ")", params
@@ -0,0 +1,214 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+ALL_TABLES = "*"
+
+_MOVIE_TABLES = {'movie_summary', 'movie', 'movie_genre', 'genre', 'movie_subtitle', 'language', 'movie_cast', 'actor',
+                 'director', 'movie_company', 'production_company', 'movie_country', 'country', 'movie_awards'}
+
+# base tables behind each view and read procedure; a write to any of them makes cached reads stale
+DEPENDENCIES = {
+    'movie_view': _MOVIE_TABLES,
+    'movie_summary': _MOVIE_TABLES,
+    'actor_view': {'actor', 'movie_cast'},
+    'director_view': {'director', 'movie_cast'},
+    'production_view': {'production_company', 'movie_company'},
+    'awards_view': {'awards', 'movie_awards'},
+    'get_watchlist_entries': {'watchlist_entries', 'movie'},
+    'search_view': _MOVIE_TABLES | {'awards', 'movie_awards'},
+}
+
+# tables written by procedures that change data
+PROCEDURE_WRITES = {'refresh_movie_summary': {'movie_summary'}}
+
+# tables whose writes also rewrite other tables through triggers: the junction table triggers and
+# the parent table triggers (renames, see refresh_movie_summaries_of) refresh movie_summary
+TRIGGERED_WRITES = {table: {'movie_summary'} for table in _MOVIE_TABLES | {'awards'}}
+
+_WHITESPACE = re.compile(r"\s+")
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+_WRITE_TABLE = re.compile(r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)`?", re.IGNORECASE)
+_CALL = re.compile(r"^\s*CALL\s+`?(\w+)`?", re.IGNORECASE)
+# the table or view a schema or bulk statement changes; anything it doesn't match changes every table
+_SCHEMA_TABLE = re.compile(r"^\s*(?:TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE"
+                           r"|DROP\s+(?:TEMPORARY\s+)?(?:TABLE|VIEW)(?:\s+IF\s+EXISTS)?"
+                           r"|CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMPORARY\s+)?(?:TABLE|VIEW)(?:\s+IF\s+NOT\s+EXISTS)?"
+                           r"|LOAD\s+DATA\s+(?:LOCAL\s+)?INFILE\s+\S+\s+(?:(?:REPLACE|IGNORE)\s+)?INTO\s+TABLE)"
+                           r"\s+`?(\w+)`?", re.IGNORECASE)
+
+DATA_WRITES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+# statements that change the schema or load a table in bulk
+SCHEMA_WRITES = ("TRUNCATE", "ALTER", "DROP", "CREATE", "RENAME", "LOAD")
+
+def normalize(query):
+    return _WHITESPACE.sub(" ", query).strip().rstrip(";").strip()
+
+def statement_kind(query):
+    """'read' for cacheable reads, 'write' for data, schema and bulk changes, None for anything else"""
+    head = query.lstrip()[:8].upper()
+    if head.startswith("SELECT"):
+        # SELECT NOW(), LAST_INSERT_ID() or @@variables read no table, so no write would expire them
+        if "FOR UPDATE" in query.upper() or not _READ_TABLES.search(query):
+            return None
+        return "read"
+    if head.startswith(DATA_WRITES + SCHEMA_WRITES):
+        return "write"
+    if head.startswith("CALL"):
+        name = _CALL.match(query).group(1).lower()
+        return "read" if name in DEPENDENCIES else "write"
+    return None
+
+def changes_rows(query):
+    """Whether query inserts, updates or deletes rows, so triggers may have run"""
+    return query.lstrip()[:8].upper().startswith(DATA_WRITES)
+
+def expand(names):
+    """Base tables a set of table, view or procedure names depends on"""
+    tables = set()
+    for name in names:
+        name = name.lower()
+        tables.add(name)
+        tables.update(DEPENDENCIES.get(name, ()))
+    return tables
+
+def read_tables(query):
+    call = _CALL.match(query)
+    if call:
+        name = call.group(1).lower()
+        return expand([name]) if name in DEPENDENCIES else {ALL_TABLES}
+    names = _READ_TABLES.findall(query)
+    return expand(names) if names else {ALL_TABLES}
+
+def procedure_tables(procedure_name):
+    """(is a read, tables) for a stored procedure"""
+    name = procedure_name.lower()
+    if name in DEPENDENCIES:
+        return True, expand([name])
+    return False, PROCEDURE_WRITES.get(name, {ALL_TABLES})
+
+def written_tables(query):
+    call = _CALL.match(query)
+    if call:
+        return procedure_tables(call.group(1))[1]
+    match = _WRITE_TABLE.match(query) or _SCHEMA_TABLE.match(query)
+    # DROP TABLE a, b and db.table name more than the one table matched
+    if not match or query[match.end():].lstrip().startswith((",", ".")):
+        return {ALL_TABLES}
+    table = match.group(1).lower()
+    return {table} | TRIGGERED_WRITES.get(table, set())
+
+class QueryCache:
+    """Size-bounded LRU cache of query results with a TTL and table-level invalidation.
+
+    A read on another thread can finish after a write to its tables has invalidated the
+    cache, so its result is already stale when it is put. Every invalidation bumps a
+    generation and records it per table; put() is given the generation from before the
+    read ran and skips results whose tables were invalidated since."""
+
+    def __init__(self, max_entries=256, max_rows=200000, ttl=60):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        self._generation = 0
+        self._invalidated = {}  # table -> generation of its last invalidation
+        self._all_invalidated = 0  # generation of the last invalidation of every table
+        self._entries = OrderedDict()  # key -> (value, tables, row count, expiry time)
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query, params=None, *variant):
+        return (normalize(query), repr(params)) + variant
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def generation(self):
+        """Take before running a read and pass to put()"""
+        with self._lock:
+            return self._generation
+
+    def put(self, key, value, tables, generation=None):
+        """Cache a read's result, unless one of its tables was invalidated after generation"""
+        rows = len(value) if isinstance(value, (list, tuple)) else 1
+        if rows > self.max_rows:
+            return
+        with self._lock:
+            if generation is not None and self._invalidatedSince(tables, generation):
+                self.stale_puts += 1
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, frozenset(tables), rows, time.monotonic() + self.ttl)
+            self._rows += rows
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        """Drop every cached result that depends on one of tables"""
+        with self._lock:
+            self._generation += 1
+            if ALL_TABLES in tables:
+                self._all_invalidated = self._generation
+            else:
+                for table in tables:
+                    self._invalidated[table] = self._generation
+            if ALL_TABLES in tables:
+                stale = list(self._entries)
+            else:
+                stale = [key for key, entry in self._entries.items()
+                         if ALL_TABLES in entry[1] or not entry[1].isdisjoint(tables)]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._all_invalidated = self._generation
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+                "entries": len(self._entries),
+                "rows": self._rows,
+            }
+
+    def _invalidatedSince(self, tables, generation):
+        if self._all_invalidated > generation:
+            return True
+        if ALL_TABLES in tables:
+            return self._generation > generation
+        return any(self._invalidated.get(table, 0) > generation for table in tables)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._rows -= entry[2]
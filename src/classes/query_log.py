@@ -0,0 +1,171 @@
+"""Timings of the statements sql_controller runs, kept in a bounded ring buffer.
+
+Each statement is recorded with its shape (the SQL with whitespace collapsed and
+literals replaced by ?), a fingerprint of its parameters, how long getting a
+connection, executing and fetching took, and the size of the result. Reads slower
+than slow_seconds get their plan captured, once per shape. Hooks added with
+add_hook see every record as it is made, e.g. to forward them elsewhere.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+
+class QueryRecord(namedtuple("QueryRecord", "time kind shape params connect execute fetch rows payload error")):
+    __slots__ = ()
+
+    @property
+    def total(self):
+        return self.connect + self.execute + self.fetch
+
+# rows measured to estimate the payload of a large result
+PAYLOAD_SAMPLE = 50
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def shape(query):
+    """query with its literals replaced by ?, so statements differing only in values group together"""
+    return _WHITESPACE.sub(" ", _LITERALS.sub("?", query)).strip().rstrip(";").strip()
+
+def fingerprint(params):
+    """Short hash of the parameter values, or None without parameters"""
+    if params is None or params == () or params == []:
+        return None
+    return hashlib.blake2b(repr(params).encode(), digest_size=6).hexdigest()
+
+def payload_size(rows):
+    """Approximate size in bytes of the values in rows, measured on a sample of them"""
+    if not rows or not isinstance(rows, list):
+        return 0
+    sample = rows[:PAYLOAD_SAMPLE]
+    measured = 0
+    for row in sample:
+        values = row.values() if isinstance(row, dict) else row if isinstance(row, (tuple, list)) else (row,)
+        measured += sum(_value_size(value) for value in values)
+    return measured * len(rows) // len(sample)
+
+def _value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float)):
+        return 8
+    return len(str(value))
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * p // 100))
+    return values[min(len(values), int(rank)) - 1]
+
+class Timing:
+    """Start time of a statement and the end of each of its phases, from time.perf_counter()"""
+
+    def __init__(self):
+        self.start = self.connected = self.executed = self.fetched = time.perf_counter()
+
+    def connect_done(self):
+        self.connected = self.executed = self.fetched = time.perf_counter()
+
+    def execute_done(self):
+        self.executed = self.fetched = time.perf_counter()
+
+    def fetch_done(self):
+        self.fetched = time.perf_counter()
+
+class QueryLog:
+    """The last capacity QueryRecords, with per-shape summaries and captured plans"""
+
+    def __init__(self, capacity=2000, slow_seconds=None):
+        self.slow_seconds = slow_seconds
+        self._records = deque(maxlen=capacity)
+        self._plans = {}  # shape -> plan of its first slow run
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook):
+        """Call hook(record) for every record from now on"""
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    def record(self, kind, query, params, timing, rows=None, error=None):
+        record = QueryRecord(time.time(), kind, shape(query), fingerprint(params),
+                             timing.connected - timing.start, timing.executed - timing.connected,
+                             timing.fetched - timing.executed, len(rows) if isinstance(rows, list) else 0,
+                             payload_size(rows), None if error is None else f"{type(error).__name__}: {error}")
+        with self._lock:
+            self._records.append(record)
+        for hook in list(self._hooks):
+            hook(record)
+        return record
+
+    def wants_plan(self, record):
+        """True if record is a slow read whose shape has no plan captured yet"""
+        return (self.slow_seconds is not None and record.error is None and record.total >= self.slow_seconds
+                and record.kind == "query" and record.shape[:6].upper() == "SELECT" and record.shape not in self._plans)
+
+    def add_plan(self, query_shape, plan):
+        with self._lock:
+            self._plans[query_shape] = plan
+
+    def plan(self, query_shape):
+        return self._plans.get(query_shape)
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def slow_records(self):
+        if self.slow_seconds is None:
+            return []
+        return [record for record in self.records() if record.total >= self.slow_seconds]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._plans.clear()
+
+    def summary(self):
+        """One dict per shape with its count, errors, p50/p95/p99/max seconds and mean rows and payload,
+        slowest p95 first"""
+        groups = {}
+        for record in self.records():
+            groups.setdefault(record.shape, []).append(record)
+        rows = []
+        for query_shape, records in groups.items():
+            totals = sorted(record.total for record in records)
+            rows.append({
+                "shape": query_shape,
+                "kind": records[-1].kind,
+                "count": len(records),
+                "errors": sum(1 for record in records if record.error),
+                "p50": percentile(totals, 50),
+                "p95": percentile(totals, 95),
+                "p99": percentile(totals, 99),
+                "max": totals[-1],
+                "rows": sum(record.rows for record in records) / len(records),
+                "payload": sum(record.payload for record in records) / len(records),
+                "has_plan": query_shape in self._plans,
+            })
+        rows.sort(key=lambda row: row["p95"], reverse=True)
+        return rows
+
+    def export_jsonl(self, path):
+        """Write every record as one JSON object per line, with the captured plan of its shape; returns the count"""
+        records = self.records()
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                entry = record._asdict()
+                entry["total"] = record.total
+                entry["plan"] = self._plans.get(record.shape)
+                f.write(json.dumps(entry, default=str) + "\n")
+        return len(records)
@@ -0,0 +1,34 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class QueryWorkerSignals(QObject):
+    # signals are delivered on the thread the receiver lives in, normally the GUI thread
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+
+class QueryWorker(QRunnable):
+    """Runs fn(*args, **kwargs) on a QThreadPool thread and emits the result with key"""
+    def __init__(self, key, fn, *args, **kwargs):
+        super().__init__()
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = QueryWorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.key, str(e))
+            return
+        self.signals.finished.emit(self.key, result)
+
+def run_in_background(key, fn, *args, on_finished=None, on_failed=None, priority=0, **kwargs):
+    """Start fn on the global thread pool; higher priority workers start first"""
+    worker = QueryWorker(key, fn, *args, **kwargs)
+    if on_finished:
+        worker.signals.finished.connect(on_finished)
+    if on_failed:
+        worker.signals.failed.connect(on_failed)
+    QThreadPool.globalInstance().start(worker, priority)
+    return worker
@@ -0,0 +1,235 @@
+"""Precomputed "More Like This" neighbours of every movie.
+
+A movie's features are its genres, cast, directors, production companies and
+countries. Each feature is weighted by its kind (KIND_WEIGHTS) and by how rare it
+is, so sharing a director counts for more than sharing the Drama genre, and two
+movies are compared by the cosine of their weighted feature vectors.
+
+The TOP_K most similar movies of each movie are computed once and kept in flat
+arrays, so looking them up when a menu item is clicked is a slice. Candidates are
+found through the movies' rarer features; features shared by more than
+MAX_POSTING movies, like genres and countries, only add to the scores of
+candidates found otherwise. update() re-reads the features and only recomputes
+the movies whose features changed and the movies that could rank them.
+"""
+import heapq
+import math
+from array import array
+from operator import itemgetter
+
+# query of each feature kind; its rows are (movie_id, feature id)
+FEATURE_QUERIES = {
+    "genre": "SELECT movie_id, genre_id FROM movie_genre",
+    "actor": "SELECT DISTINCT movie_id, actor_id FROM movie_cast",
+    "director": "SELECT DISTINCT movie_id, director_id FROM movie_cast",
+    "company": "SELECT movie_id, company_id FROM movie_company",
+    "country": "SELECT movie_id, country_id FROM movie_country",
+}
+TITLES_QUERY = "SELECT movie_id, title FROM movie"
+# tables the features are read from, to tell when they are out of date (see data_versions)
+TABLES = ("movie", "movie_genre", "movie_cast", "movie_company", "movie_country")
+
+# how much sharing one feature of a kind counts, before rarer features are weighted up
+KIND_WEIGHTS = {"genre": 1.0, "actor": 1.5, "director": 2.0, "company": 1.0, "country": 0.5}
+TOP_K = 20
+# features of more movies than this don't find candidates, they only add to their scores
+MAX_POSTING = 300
+# above this share of changed movies update() rebuilds everything
+FULL_REBUILD_SHARE = 0.2
+# watchlist ratings go from 0 to MAX_RATING; an entry without one counts as NEUTRAL_RATING
+MAX_RATING = 5
+NEUTRAL_RATING = 2.5
+
+def read_features(query):
+    """({movie_id: frozenset of (kind, id)}, {movie_id: title}) from the database; query(sql)
+    returns rows as tuples, like query_data(sql, get_tuples=True)"""
+    titles = {movie_id: title for (movie_id, title) in query(TITLES_QUERY) or []}
+    features = {movie_id: set() for movie_id in titles}
+    for kind, sql in FEATURE_QUERIES.items():
+        for (movie_id, feature_id) in query(sql) or []:
+            if movie_id in features:
+                features[movie_id].add((kind, feature_id))
+    return {movie_id: frozenset(movie_features) for movie_id, movie_features in features.items()}, titles
+
+class Recommender:
+    """Top-K similar movies of every movie, and recommendations for a set of rated movies"""
+
+    def __init__(self, features, titles=None, top_k=TOP_K):
+        """features is {movie_id: set of hashable features}, as read_features returns them"""
+        self.top_k = top_k
+        self.titles = dict(titles or {})
+        self._build(features)
+
+    @classmethod
+    def fromDatabase(cls, query, top_k=TOP_K):
+        return cls(*read_features(query), top_k=top_k)
+
+    def copy(self):
+        """A Recommender with the same neighbours that can be updated without changing this one"""
+        other = Recommender.__new__(Recommender)
+        other.top_k = self.top_k
+        other.titles = dict(self.titles)
+        other._features = dict(self._features)
+        other._postings = {feature: set(posting) for feature, posting in self._postings.items()}
+        other._weights = dict(self._weights)
+        other._norms = dict(self._norms)
+        other._movie_ids = list(self._movie_ids)
+        other._positions = dict(self._positions)
+        other._neighbour_ids = array("i", self._neighbour_ids)
+        other._scores = array("f", self._scores)
+        other._counts = array("B", self._counts)
+        return other
+
+    def neighbours(self, movie_id):
+        """[(movie_id, similarity)] of the most similar movies, best first"""
+        position = self._positions.get(movie_id)
+        if position is None:
+            return []
+        start = position * self.top_k
+        end = start + self._counts[position]
+        return list(zip(self._neighbour_ids[start:end], self._scores[start:end]))
+
+    def recommend(self, entries, limit=TOP_K):
+        """[(movie_id, score)] of the movies most like a watchlist's (movie_id, rating) entries,
+        leaving out the entries themselves. Each entry's neighbours count in proportion to
+        its rating, so movies like the ones rated highest come first."""
+        listed = {movie_id for movie_id, _ in entries}
+        scores = {}
+        for movie_id, rating in entries:
+            weight = (NEUTRAL_RATING if rating is None else rating) / MAX_RATING
+            if weight <= 0:
+                continue
+            for other, similarity in self.neighbours(movie_id):
+                if other not in listed:
+                    scores[other] = scores.get(other, 0.0) + weight * similarity
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+    def update(self, features, titles=None):
+        """Take newly read features; returns the number of movies whose neighbours were recomputed"""
+        if titles is not None:
+            self.titles = dict(titles)
+        changed = {movie_id for movie_id in self._features.keys() | features.keys()
+                   if self._features.get(movie_id) != features.get(movie_id)}
+        if not changed:
+            return 0
+        if len(changed) > FULL_REBUILD_SHARE * max(len(features), 1):
+            self._build(features)
+            return len(self._features)
+        # movies sharing a rare feature with a changed movie, before or after the change, and
+        # movies ranking a changed movie may now rank differently
+        affected = set(changed)
+        for movie_id in changed:
+            for feature in self._features.get(movie_id, frozenset()) | features.get(movie_id, frozenset()):
+                posting = self._postings.get(feature, ())
+                if len(posting) <= MAX_POSTING:
+                    affected.update(posting)
+        for position, movie_id in enumerate(self._movie_ids):
+            start = position * self.top_k
+            if not changed.isdisjoint(self._neighbour_ids[start:start + self._counts[position]]):
+                affected.add(movie_id)
+        for movie_id in changed:
+            self._setFeatures(movie_id, features.get(movie_id))
+        for movie_id in affected:
+            if movie_id in self._features:
+                self._store(movie_id, self._compute(movie_id))
+        return len(affected & self._features.keys())
+
+    def _build(self, features):
+        self._features = {}
+        self._postings = {}  # feature -> set of movie_ids
+        self._weights = {}  # feature -> weight
+        self._norms = {}  # movie_id -> length of its weighted feature vector
+        self._movie_ids = []
+        self._positions = {}
+        self._neighbour_ids = array("i")
+        self._scores = array("f")
+        self._counts = array("B")
+        for movie_id, movie_features in features.items():
+            self._features[movie_id] = frozenset(movie_features)
+            for feature in movie_features:
+                self._postings.setdefault(feature, set()).add(movie_id)
+        movies = max(len(self._features), 1)
+        for feature, posting in self._postings.items():
+            self._weights[feature] = self._weight(feature, len(posting), movies)
+        for movie_id in self._features:
+            self._norms[movie_id] = self._norm(movie_id)
+        for movie_id in self._features:
+            self._store(movie_id, self._compute(movie_id))
+
+    @staticmethod
+    def _weight(feature, movies_with, movies):
+        kind = feature[0] if isinstance(feature, tuple) else None
+        # smoothed inverse document frequency
+        return KIND_WEIGHTS.get(kind, 1.0) * math.log(1 + movies / movies_with)
+
+    def _norm(self, movie_id):
+        return math.sqrt(sum(self._weights[feature] ** 2 for feature in self._features[movie_id]))
+
+    def _setFeatures(self, movie_id, movie_features):
+        for feature in self._features.get(movie_id, ()):
+            posting = self._postings[feature]
+            posting.discard(movie_id)
+            if not posting:
+                del self._postings[feature]
+                del self._weights[feature]
+        if movie_features is None:
+            self._features.pop(movie_id, None)
+            self._norms.pop(movie_id, None)
+            self._store(movie_id, [])
+            return
+        self._features[movie_id] = frozenset(movie_features)
+        movies = max(len(self._features), 1)
+        for feature in movie_features:
+            posting = self._postings.setdefault(feature, set())
+            posting.add(movie_id)
+            # weights of features that already existed are kept until the next full build
+            if feature not in self._weights:
+                self._weights[feature] = self._weight(feature, len(posting), movies)
+        self._norms[movie_id] = self._norm(movie_id)
+
+    def _compute(self, movie_id):
+        """[(movie_id, similarity)] of movie_id's top_k neighbours"""
+        movie_features = self._features[movie_id]
+        norm = self._norms[movie_id]
+        if not norm:
+            return []
+        scores = {}
+        common = []
+        for feature in movie_features:
+            posting = self._postings[feature]
+            if len(posting) > MAX_POSTING:
+                common.append(feature)
+                continue
+            shared = self._weights[feature] ** 2
+            for other in posting:
+                scores[other] = scores.get(other, 0.0) + shared
+        if len(scores) <= self.top_k and common:
+            # nothing rarer to go by: the movies sharing its least common feature are the candidates
+            for other in self._postings[min(common, key=lambda feature: len(self._postings[feature]))]:
+                scores.setdefault(other, 0.0)
+        scores.pop(movie_id, None)
+        features = self._features
+        for feature in common:
+            shared = self._weights[feature] ** 2
+            for other in scores:
+                if feature in features[other]:
+                    scores[other] += shared
+        norms = self._norms
+        similarities = ((other, score / (norm * norms[other])) for other, score in scores.items() if score > 0)
+        return heapq.nlargest(self.top_k, similarities, key=itemgetter(1))
+
+    def _store(self, movie_id, neighbours):
+        position = self._positions.get(movie_id)
+        if position is None:
+            if not neighbours:
+                return
+            position = self._positions[movie_id] = len(self._movie_ids)
+            self._movie_ids.append(movie_id)
+            self._neighbour_ids.extend([0] * self.top_k)
+            self._scores.extend([0.0] * self.top_k)
+            self._counts.append(0)
+        start = position * self.top_k
+        for i, (other, similarity) in enumerate(neighbours):
+            self._neighbour_ids[start + i] = other
+            self._scores[start + i] = similarity
+        self._counts[position] = len(neighbours)
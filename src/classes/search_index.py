@@ -0,0 +1,98 @@
+from array import array
+
+# separates column texts so no trigram spans two columns
+COLUMN_SEPARATOR = "\x1f"
+
+def cell_text(value):
+    return "" if value is None else str(value).lower()
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """Trigram index over the rows of a MySQLModel, keyed by row slot.
+
+    Each trigram maps to the slots whose text contains it. A search reads the
+    smallest posting list among the query's trigrams and confirms each candidate
+    with a substring check, so postings may keep stale slots after an edit or
+    removal without giving wrong results."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.postings = {}
+        self.texts = {}  # slot -> lowercase text of every column, joined by COLUMN_SEPARATOR
+
+    @classmethod
+    def fromModel(cls, model):
+        index = cls(model.columnCount())
+        for slot in model.liveSlots():
+            index.update(slot, [model.slotValue(slot, col) for col in range(index.columns)])
+        return index
+
+    @classmethod
+    def fromRows(cls, rows, headers):
+        """Index query rows as loaded into a fresh model, where row i is stored in slot i.
+        Only reads rows, so it can run on a worker thread."""
+        index = cls(len(headers))
+        for slot, row in enumerate(rows):
+            index.update(slot, [row[header] for header in headers])
+        return index
+
+    @classmethod
+    def fromStore(cls, store):
+        """Index a ColumnStore as loaded into a fresh model; like fromRows, safe on a worker thread"""
+        index = cls(len(store.headers))
+        columns = store.columns
+        for slot in range(len(store)):
+            index.update(slot, [column[slot] for column in columns])
+        return index
+
+    def update(self, slot, values):
+        # postings for the slot's old text are left in place; the substring check filters them out
+        text = COLUMN_SEPARATOR.join(cell_text(value) for value in values)
+        self.texts[slot] = text
+        postings = self.postings
+        for gram in trigrams(text):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("i")
+            posting.append(slot)
+
+    def remove(self, slot):
+        self.texts.pop(slot, None)
+
+    def search(self, query, columns=None, within=None):
+        """Slots whose text contains query (case-insensitive).
+
+        columns limits the match to those column numbers; within limits the
+        candidates, e.g. to the result of a shorter query this one extends."""
+        query = query.lower()
+        if within is not None:
+            candidates = within
+        else:
+            candidates = self.texts.keys()
+        grams = trigrams(query)
+        if grams:
+            smallest = None
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    return set()
+                if smallest is None or len(posting) < len(smallest):
+                    smallest = posting
+            if within is None or len(smallest) < len(within):
+                candidates = smallest
+        if COLUMN_SEPARATOR in query:
+            return set()
+        if within is not None and candidates is not within:
+            candidates = (slot for slot in candidates if slot in within)
+        return {slot for slot in candidates if self._matches(slot, query, columns)}
+
+    def _matches(self, slot, query, columns):
+        text = self.texts.get(slot)
+        if text is None or query not in text:
+            return False
+        if columns is None:
+            return True
+        parts = text.split(COLUMN_SEPARATOR)
+        return any(query in parts[col] for col in columns)
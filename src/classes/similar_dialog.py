@@ -0,0 +1,54 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QLabel,
+                             QHeaderView, QAbstractItemView)
+
+class SimilarMoviesDialog(QDialog):
+    """Ranked movies, e.g. a Recommender's neighbours of a movie or its picks for a watchlist.
+    Double clicking a movie calls open_movie(movie_id); "Show All" calls show_all(movie_ids)."""
+
+    COLUMNS = ["Title", "Score"]
+
+    def __init__(self, title, movies, open_movie, show_all, parent=None):
+        """movies is a list of (movie_id, title, score), best first"""
+        super().__init__(parent)
+        self.movies = movies
+        self.open_movie = open_movie
+        self.show_all = show_all
+        self.setWindowTitle(title)
+        self.resize(500, 500)
+
+        self.table = QTableWidget(len(movies), len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, (movie_id, movie_title, score) in enumerate(movies):
+            title_item = QTableWidgetItem(str(movie_title))
+            title_item.setData(Qt.UserRole, movie_id)
+            self.table.setItem(row, 0, title_item)
+            score_item = QTableWidgetItem()
+            score_item.setData(Qt.DisplayRole, round(score * 100, 1))
+            self.table.setItem(row, 1, score_item)
+        self.table.cellDoubleClicked.connect(self.openRow)
+
+        buttons = QHBoxLayout()
+        for text, slot in [("Show All in Movies Tab", self.showAll), ("Close", self.reject)]:
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+
+        layout = QVBoxLayout(self)
+        if not movies:
+            layout.addWidget(QLabel("No similar movies were found."))
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+
+    def openRow(self, row, column):
+        self.open_movie(self.table.item(row, 0).data(Qt.UserRole))
+        self.accept()
+
+    def showAll(self):
+        self.show_all({movie_id for movie_id, _, _ in self.movies})
+        self.accept()
@@ -0,0 +1,148 @@
+"""On-disk snapshots of tab data, so the window can show rows before any query runs.
+
+A snapshot holds a ColumnStore in a binary file: a JSON header followed by each
+column's raw array bytes. The file is read in one call and each numeric column is
+copied straight into its array, without parsing rows.
+Text and other object values are pickled, so only snapshots this program wrote
+in SNAPSHOT_DIR are ever loaded.
+
+Each snapshot is stamped with a change token: the data_version of every table
+the tab's query reads (see movie_ddl.sql). A snapshot is current while the
+tokens match; otherwise the tab is queried again and the snapshot rewritten.
+"""
+import json
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+from src.classes.column_store import ColumnStore, DictColumn, FloatColumn, IntColumn, ObjectColumn
+from src.classes import query_cache
+
+SNAPSHOT_DIR = "data/snapshots"
+MAGIC = b"MDBSNAP1"
+# row in data_version that changes whenever the database is recreated
+GENERATION = "*"
+
+_HEADER_LENGTH = struct.Struct("<Q")
+
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, name + ".snap")
+
+def change_token(query, versions):
+    """Versions of the tables query reads, or None if they can't be told apart from older data"""
+    if GENERATION not in versions:
+        return None
+    tables = query_cache.read_tables(query)
+    if query_cache.ALL_TABLES in tables:
+        return None
+    return sorted([table, versions[table]] for table in tables | {GENERATION} if table in versions)
+
+def write_snapshot(name, token, store):
+    """Write store to name's snapshot file; the old file is replaced only once the new one is complete"""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    blobs = []
+    columns = []
+    offset = 0
+    for column in store.columns:
+        parts = _columnParts(column)
+        entry = {"kind": column.kind, "parts": []}
+        for part in parts:
+            entry["parts"].append([offset, len(part)])
+            offset += len(part)
+        blobs.extend(parts)
+        columns.append(entry)
+    header = json.dumps({"token": token, "rows": len(store), "headers": store.headers,
+                         "byteorder": sys.byteorder, "columns": columns}).encode()
+    path = snapshot_path(name)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temp_path, path)
+
+def read_snapshot(name):
+    """(token, ColumnStore) from name's snapshot file, or None if there is no readable one"""
+    try:
+        with open(snapshot_path(name), "rb") as f:
+            data = f.read()
+        return _parse(memoryview(data))
+    except (OSError, ValueError, KeyError, struct.error, pickle.UnpicklingError, EOFError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Ignoring snapshot {name}: {e}")
+        return None
+
+def refresh(name, query, params=None, token=None):
+    """Run a tab's query and snapshot the result if token is known. Returns the rows as a
+    ColumnStore, or None if the query couldn't run. Meant for a worker thread."""
+    from src.classes.sql_controller import query_data
+    rows = query_data(query, params=params)
+    if rows is None:
+        return None
+    store = ColumnStore(rows if rows else [])
+    if token is not None:
+        try:
+            write_snapshot(name, token, store)
+        except OSError as e:
+            print(f"Could not write snapshot {name}: {e}")
+    return store
+
+def remove_snapshot(name):
+    try:
+        os.remove(snapshot_path(name))
+    except FileNotFoundError:
+        pass
+
+def _columnParts(column):
+    if isinstance(column, DictColumn):
+        return [column.codes.tobytes(), pickle.dumps(column.dictionary, pickle.HIGHEST_PROTOCOL)]
+    if isinstance(column, (IntColumn, FloatColumn)):
+        return [column.values.tobytes(), bytes(column.nulls)]
+    return [pickle.dumps(column.values, pickle.HIGHEST_PROTOCOL)]
+
+def _parse(data):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a snapshot file")
+    start = len(MAGIC)
+    (length,) = _HEADER_LENGTH.unpack_from(data, start)
+    start += _HEADER_LENGTH.size
+    header = json.loads(bytes(data[start:start + length]))
+    body = start + length
+    swap = header["byteorder"] != sys.byteorder
+    columns = []
+    for entry in header["columns"]:
+        # memoryview slices, so each part is only copied once, into its column
+        parts = [data[body + offset:body + offset + size] for offset, size in entry["parts"]]
+        column = _buildColumn(entry["kind"], parts, swap)
+        if len(column) != header["rows"]:
+            raise ValueError("column length doesn't match the row count")
+        columns.append(column)
+    return header["token"], ColumnStore.fromColumns(header["headers"], columns, header["rows"])
+
+def _buildColumn(kind, parts, swap):
+    if kind == DictColumn.kind:
+        column = DictColumn.__new__(DictColumn)
+        column.codes = _array("i", parts[0], swap)
+        column.dictionary = pickle.loads(parts[1])
+        column.lookup = {value: code for code, value in enumerate(column.dictionary)}
+        return column
+    if kind in (IntColumn.kind, FloatColumn.kind):
+        cls = IntColumn if kind == IntColumn.kind else FloatColumn
+        column = cls.__new__(cls)
+        column.values = _array(cls.typecode, parts[0], swap)
+        column.nulls = bytearray(parts[1])
+        return column
+    if kind == ObjectColumn.kind:
+        return ObjectColumn(pickle.loads(parts[0]))
+    raise ValueError(f"unknown column kind {kind!r}")
+
+def _array(typecode, data, swap):
+    values = array(typecode)
+    values.frombytes(data)
+    if swap:
+        values.byteswap()
+    return values
@@ -1,19 +1,120 @@
-import pymysql
-import sys
-import pandas as pd
 import os
 import re
+import threading
 
-def connect_to_database():
+from src.classes.connection_pool import ConnectionPool
+from src.classes import query_cache, query_log, filter_builder, backends
+
+# "mysql", or "sqlite" to keep the database in SQLITE_PATH without a server
+DB_BACKEND = os.environ.get("MOVIEDB_BACKEND", "mysql")
+SQLITE_PATH = "data/moviedb.sqlite3"
+
+DB_HOST = "localhost"
+DB_USER = "root"
+DB_NAME = "moviedb"
+
+# pool settings: connections kept open between queries, closed after sitting idle
+POOL_SIZE = 5
+POOL_IDLE_TIMEOUT = 300
+
+# results of reads are cached until a write through query_data/callProcedure touches their tables
+CACHE_ENTRIES = 256
+CACHE_ROWS = 200000
+CACHE_TTL = 60
+
+# timings of the last QUERY_LOG_SIZE statements; reads slower than SLOW_QUERY_SECONDS get their plan captured
+QUERY_LOG_SIZE = 2000
+SLOW_QUERY_SECONDS = None
+
+# rows stream_query reads from an unbuffered cursor at a time
+STREAM_CHUNK_ROWS = 5000
+
+_password = None
+_backend = None
+_backend_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+_cache = query_cache.QueryCache(CACHE_ENTRIES, CACHE_ROWS, CACHE_TTL)
+_query_log = query_log.QueryLog(QUERY_LOG_SIZE, SLOW_QUERY_SECONDS)
+
+def get_connection_args(database=None):
+    """Connection arguments, reading the password file only once; database defaults to DB_NAME"""
+    global _password
+    if _password is None:
+        _password = fetchPassword()
     connection_args = {
-            "host": "localhost",
-            "user": "root",
-            "database": "moviedb",
-            "cursorclass": pymysql.cursors.DictCursor
+            "host": DB_HOST,
+            "user": DB_USER,
+            "database": database or DB_NAME,
         }
-    password = fetchPassword()
-    if password:
-        connection_args["password"] = password
+    if _password:
+        connection_args["password"] = _password
+    return connection_args
+
+def get_backend():
+    """The backends.Backend named by DB_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if DB_BACKEND == "mysql":
+                _backend = backends.MySQLBackend(get_connection_args)
+            elif DB_BACKEND == "sqlite":
+                from src.classes.sqlite_backend import SQLiteBackend
+                _backend = SQLiteBackend(SQLITE_PATH)
+            else:
+                raise ValueError(f"unknown database backend {DB_BACKEND!r}")
+        return _backend
+
+def use_backend(name, sqlite_path=None):
+    """Switch every later query to another backend, e.g. use_backend("sqlite")"""
+    global DB_BACKEND, SQLITE_PATH, _backend
+    close_pool()
+    clear_cache()
+    with _backend_lock:
+        DB_BACKEND = name
+        if sqlite_path is not None:
+            SQLITE_PATH = sqlite_path
+        _backend = None
+    return get_backend()
+
+def get_pool():
+    global _pool
+    backend = get_backend()
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(backend.connect, max_size=POOL_SIZE, idle_timeout=POOL_IDLE_TIMEOUT,
+                                   health_check=backend.is_healthy, connection_errors=backend.connection_errors)
+        return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def configure_pool(size=None, idle_timeout=None):
+    global POOL_SIZE, POOL_IDLE_TIMEOUT
+    if size is not None:
+        POOL_SIZE = size
+    if idle_timeout is not None:
+        POOL_IDLE_TIMEOUT = idle_timeout
+    close_pool()
+
+def check_connection():
+    """Return True if a pooled connection to the database can be opened"""
+    try:
+        connection = get_pool().acquire()
+    except Exception as err:
+        print(f"Error: {err}")
+        return False
+    get_pool().release(connection)
+    return True
+
+def connect_to_database():
+    import pymysql
+    connection_args = get_connection_args()
+    connection_args["cursorclass"] = pymysql.cursors.DictCursor
     try:
         connection = pymysql.connect(**connection_args)
         if connection:
@@ -23,72 +124,312 @@ def connect_to_database():
         return None
 
 def tuple_connect_to_database():
+    import pymysql
     try:
-        connection_args = {
-            "host": "localhost",
-            "user": "root",
-            "database": "moviedb",
-        }
-        password = fetchPassword()
-        if password:
-            connection_args["password"] = password
-        connection = pymysql.connect(**connection_args)
+        connection = pymysql.connect(**get_connection_args())
         if connection:
             return connection
     except Exception as err:
         print(f"Error: {err}")
         return None
-    
-def query_data(query, get_tuples=False, params=None):
-        if get_tuples is False:
-            connection = connect_to_database()
-            if not connection:
-                print("CONNECTION FAILED")
-                print(query)
-                return
-        else:
-            connection = tuple_connect_to_database()
-            if not connection:
-                print("CONNECTION FAILED")
-                print(query)
-                return
+
+def _format_rows(data, get_tuples):
+    if data and len(data[0]) == 1:
+        if isinstance(data[0], dict):
+            return [next(iter(row.values())) for row in data]
+        return [row[0] for row in data]
+    elif data:
+        return list(data)
+    elif get_tuples:
+        return []
+    else:
+        return {}
+
+def cache_stats():
+    """Hit/miss counters of the query result cache"""
+    return _cache.stats()
+
+def clear_cache():
+    _cache.clear()
+
+def get_query_log():
+    """The QueryLog every statement run through this module is recorded in"""
+    return _query_log
+
+def set_slow_query_threshold(seconds):
+    """Capture the plan of reads slower than seconds, or stop with None"""
+    _query_log.slow_seconds = seconds
+
+def _log_statement(kind, query, params, timing, rows=None, error=None):
+    record = _query_log.record(kind, query, params, timing, rows, error)
+    if _query_log.wants_plan(record):
+        print(f"Slow query ({record.total:.2f}s): {record.shape[:200]}")
         try:
-            with connection.cursor() as cursor:
-                if params:
-                    cursor.execute(query, params)
-                else:
-                    cursor.execute(query)
-                data = cursor.fetchall()
-                if data and len(data[0]) == 1:
-                    return [row[0] for row in data]
-                elif data:
-                    return data
-                elif get_tuples:
-                    return []
-                else:
-                    return {}
-        finally:
-            if query.strip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
-                connection.commit()
-            if connection: connection.close()
-
-def callProcedure(procedure_name, params=None):
-    connection = connect_to_database()
+            _query_log.add_plan(record.shape, explain(query, params))
+        except Exception as e:
+            _query_log.add_plan(record.shape, f"EXPLAIN failed: {e}")
+
+def explain(query, params=None):
+    """The backend's plan for a read query: EXPLAIN FORMAT=JSON on MySQL"""
+    backend = get_backend()
+    with get_pool().connection() as connection:
+        with backend.cursor(connection) as cursor:
+            return backend.explain(cursor, query, params)
+
+def _copy_result(result):
+    # callers may change the rows they get back, so never hand out the cached objects
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    if isinstance(result, dict):
+        return {}
+    return result
+
+def query_data(query, get_tuples=False, params=None, use_cache=True):
+    kind = query_cache.statement_kind(query)
+    if kind == "read" and use_cache:
+        key = _cache.key(query, params, get_tuples)
+        hit, result = _cache.get(key)
+        if hit:
+            return _copy_result(result)
+        # a write committed while the read runs makes its result stale, see QueryCache
+        generation = _cache.generation()
+        result = _query_data(query, get_tuples, params)
+        if result is not None:
+            _cache.put(key, _copy_result(result), query_cache.read_tables(query), generation)
+        return result
+    try:
+        return _query_data(query, get_tuples, params)
+    finally:
+        if kind == "write":
+            _cache.invalidate(query_cache.written_tables(query))
+
+def _query_data(query, get_tuples=False, params=None):
+    backend = get_backend()
+    pool = get_pool()
+    timing = query_log.Timing()
+    try:
+        connection = pool.acquire()
+    except Exception as err:
+        _log_statement("query", query, params, timing, error=err)
+        print(f"Error: {err}")
+        print("CONNECTION FAILED")
+        print(query)
+        return
+    timing.connect_done()
+    broken = False
+    try:
+        with backend.cursor(connection, dict_rows=not get_tuples) as cursor:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            timing.execute_done()
+            rows = cursor.fetchall()
+            timing.fetch_done()
+    except Exception as err:
+        broken = isinstance(err, backend.connection_errors)
+        _log_statement("query", query, params, timing, error=err)
+        raise
+    finally:
+        pool.release(connection, discard=broken)
+    rows = list(rows)
+    _log_statement("query", query, params, timing, rows)
+    return _format_rows(rows, get_tuples)
+
+def query_with_columns(query, params=None):
+    """Run a read query and return (column names, list of row dicts), even when no rows match"""
+    backend = get_backend()
+    pool = get_pool()
+    broken = False
+    timing = query_log.Timing()
+    connection = pool.acquire()
+    timing.connect_done()
+    try:
+        with backend.cursor(connection) as cursor:
+            cursor.execute(query, params)
+            timing.execute_done()
+            columns = [column[0] for column in cursor.description] if cursor.description else []
+            rows = list(cursor.fetchall())
+            timing.fetch_done()
+    except Exception as err:
+        broken = isinstance(err, backend.connection_errors)
+        _log_statement("query", query, params, timing, error=err)
+        raise
+    finally:
+        pool.release(connection, discard=broken)
+    _log_statement("query", query, params, timing, rows)
+    return columns, rows
+
+def stream_query(query, params=None, chunk_size=STREAM_CHUNK_ROWS):
+    """Run a read query on an unbuffered cursor and yield (column names, list of row tuples)
+    chunk_size rows at a time, so a large result is never held in memory at once. The
+    connection is held until the generator is exhausted or closed."""
+    backend = get_backend()
+    pool = get_pool()
+    broken = False
+    timing = query_log.Timing()
+    connection = pool.acquire()
+    timing.connect_done()
+    error = None
     try:
-        with connection.cursor() as cursor:
+        with backend.stream_cursor(connection) as cursor:
+            cursor.execute(query, params)
+            timing.execute_done()
+            columns = [column[0] for column in cursor.description] if cursor.description else []
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                timing.fetch_done()
+                if not rows:
+                    break
+                yield columns, list(rows)
+    except Exception as err:
+        broken = isinstance(err, backend.connection_errors)
+        error = err
+        raise
+    finally:
+        pool.release(connection, discard=broken)
+        # also logged when the caller stops early, timed up to the last chunk read
+        _log_statement("query", query, params, timing, error=error)
+
+def callProcedure(procedure_name, params=None, use_cache=True):
+    is_read, tables = query_cache.procedure_tables(procedure_name)
+    if is_read and use_cache:
+        key = _cache.key("CALL " + procedure_name, params)
+        hit, result = _cache.get(key)
+        if hit:
+            return _copy_result(result)
+        generation = _cache.generation()
+        result = _callProcedure(procedure_name, params)
+        _cache.put(key, _copy_result(result), tables, generation)
+        return result
+    try:
+        return _callProcedure(procedure_name, params)
+    finally:
+        if not is_read:
+            _cache.invalidate(tables)
+
+def _callProcedure(procedure_name, params=None):
+    backend = get_backend()
+    pool = get_pool()
+    broken = False
+    # logged in the form the statement would be written in
+    statement = f"CALL {procedure_name}({', '.join(['%s'] * len(params or ()))})"
+    timing = query_log.Timing()
+    connection = pool.acquire()
+    timing.connect_done()
+    try:
+        with backend.cursor(connection) as cursor:
             if params:
                 cursor.callproc(procedure_name, params)
             else:
                 cursor.callproc(procedure_name)
-            data = cursor.fetchall()
-            if data and len(data[0]) == 1:
-                return [row[0] for row in data]
-            elif data:
-                return data
-            else:
-                return {}
+            timing.execute_done()
+            data = list(cursor.fetchall())
+            # drain the trailing status result so the connection can be reused
+            while cursor.nextset():
+                pass
+            timing.fetch_done()
+    except Exception as err:
+        broken = isinstance(err, backend.connection_errors)
+        _log_statement("procedure", statement, params, timing, error=err)
+        raise
+    finally:
+        pool.release(connection, discard=broken)
+    _log_statement("procedure", statement, params, timing, data)
+    return _format_rows(data, False)
+
+def flush_changes(unit_of_work):
+    """Write a UnitOfWork's pending changes in one transaction and return its FlushResult.
+    The changes are cleared once the transaction commits, and kept for the next try if it fails."""
+    if not unit_of_work.isDirty():
+        return None
+    backend = get_backend()
+    pool = get_pool()
+    broken = False
+    statement = f"FLUSH {unit_of_work.table}"
+    timing = query_log.Timing()
+    connection = pool.acquire()
+    timing.connect_done()
+    try:
+        backend.begin(connection)
+        with backend.cursor(connection) as cursor:
+            result = unit_of_work.flush(cursor)
+        connection.commit()
+        # only now are the changes safely written; conflicting ones are dropped too, the
+        # caller shows their stored rows instead
+        unit_of_work.clear()
+        timing.execute_done()
+    except Exception as e:
+        broken = isinstance(e, backend.connection_errors)
+        if not broken:
+            connection.rollback()
+        _log_statement("flush", statement, None, timing, error=e)
+        raise
     finally:
-        connection.close()
+        pool.release(connection, discard=broken)
+        _cache.invalidate(query_cache.written_tables("UPDATE " + unit_of_work.table))
+    _log_statement("flush", statement, None, timing, list(result.saved.values()))
+    return result
+
+# views the search_view procedure can answer from FULLTEXT indexes
+SEARCHABLE_VIEWS = ('movie_view', 'actor_view', 'director_view', 'production_view', 'awards_view')
+SEARCH_LIMIT = 500
+# InnoDB's default innodb_ft_min_token_size; shorter words are not in the index
+FULLTEXT_MIN_WORD = 3
+
+def fulltext_query(text):
+    """Boolean-mode FULLTEXT query requiring every word of text as a prefix"""
+    words = [word for word in re.findall(r"\w+", text) if len(word) >= FULLTEXT_MIN_WORD]
+    return " ".join("+" + word + "*" for word in words)
+
+def search_view(view_name, text, limit=SEARCH_LIMIT):
+    """Top matches for text in a view, best first, or None if text has no word the index can match"""
+    query = fulltext_query(text)
+    if not query or view_name not in SEARCHABLE_VIEWS:
+        return None
+    rows = callProcedure("search_view", (view_name, query, limit))
+    if not rows:
+        return []
+    for row in rows:
+        row.pop("relevance", None)
+    return rows
+
+def get_watchlist_entry(watchlist_id, movie_id):
+    """One row of get_watchlist_entries, or None if the movie isn't in the watchlist"""
+    rows = query_data("""SELECT watchlist_entries.watchlist_id, watchlist_entries.movie_id, movie.title AS movie_name,
+                             watchlist_entries.rating, watchlist_entries.comment, watchlist_entries.last_edited
+                         FROM watchlist_entries
+                         INNER JOIN movie ON watchlist_entries.movie_id = movie.movie_id
+                         WHERE watchlist_entries.watchlist_id = %s AND watchlist_entries.movie_id = %s""",
+                      params=(watchlist_id, movie_id))
+    return rows[0] if rows else None
+
+def data_versions():
+    """{table name: version} from data_version, bumped by triggers on every write; {} if unavailable"""
+    try:
+        rows = query_data("SELECT table_name, version FROM data_version", get_tuples=True, use_cache=False)
+    except get_backend().database_error as e:
+        print(f"Could not read data versions: {e}")
+        return {}
+    return {name: version for (name, version) in rows or []}
+
+def bump_data_versions():
+    """Mark every table as changed, e.g. after a bulk load that skipped the triggers"""
+    query_data("UPDATE data_version SET version = version + 1")
+
+def filter_columns(view_name):
+    """Columns of a view that can be filtered, in the order filter_view takes them"""
+    return filter_builder.filter_columns(view_name)
+
+def filter_conditions(view_name, values):
+    """WHERE fragments for a {column: text} filter, e.g. for a paged model's setConditions"""
+    return filter_builder.build_conditions(view_name, values)[1]
+
+def filter_view(view_name, values):
+    """Rows of view_name matching a {column: text} filter; raises ValueError for a malformed value"""
+    query, params = filter_builder.build_query(view_name, values)
+    rows = query_data(query, params=params)
+    return rows if rows else []
 
 def fetchPassword():
     with open('data/sql_password.txt', 'r') as f:
@@ -99,119 +440,57 @@ def fetchPassword():
         return ""
 
 def setPassword(s):
+    global _password
     with open('data/sql_password.txt', 'w') as f:
         f.write(s)
+    _password = None
+    close_pool()
 
-def create_database(file_path):
-    with open(file_path, "r") as file:
-        sql_script = file.read()
-    try:
-        connection_args = {
-            "host": "localhost",
-            "user": "root",
-            "database": "mysql",
-            "cursorclass": pymysql.cursors.DictCursor
-        }
-        password = fetchPassword()
-        if password:
-            connection_args["password"] = password
-        connection = pymysql.connect(**connection_args)
-    except Exception as err:
-        print(f"Error: {err}")
-        return False
-    try:
-        # Connect to the database
-        cursor = connection.cursor()
-
-        # Split the script by `DELIMITER` statements
-        statements = re.split(r"DELIMITER\s+(\S+)", sql_script)
-
-        # Default delimiter
-        current_delimiter = ";"
-
-        # Execute each part of the script
-        for i, statement in enumerate(statements):
-            if i % 2 == 0:  # Normal SQL commands
-                commands = statement.split(current_delimiter)
-                for command in commands:
-                    command = command.strip()
-                    if command:  # Skip empty commands
-                        cursor.execute(command)
-                        print(f"Executed: {command[:30]}...")  # Log part of the statement
-            else:  # Change delimiter
-                current_delimiter = statement.strip()
-                print(f"Changed delimiter to: {current_delimiter}")
-
-        # Commit changes
-        connection.commit()
+def create_database(file_path=None):
+    """Drop and recreate the database from a schema file, by default the backend's own"""
+    backend = get_backend()
+    # the schema is dropped and recreated, so pooled connections and cached results are stale
+    close_pool()
+    success = backend.apply_schema(file_path or backend.schema_file, log=_log_schema_statement)
+    clear_cache()
+    if success:
         print("DDL schema successfully uploaded!")
-        return True
-
-    except pymysql.MySQLError as err:
-        print(f"Error: {err}")
-        return False
+    return success
 
-    finally:
-        if connection:
-            cursor.close()
-            connection.close()
+def _log_schema_statement(statement, seconds, error):
+    timing = query_log.Timing()
+    timing.start = timing.connected = timing.executed - seconds
+    _query_log.record("schema", statement, None, timing, error=error)
+    if error is not None:
+        print(f"Failed statement: {statement}")
 
 # Function to insert data from CSV into MySQL table
-def insert_data(csv_file, table_name):
-    connection = connect_to_database()
-    
-    if connection is None:
-        print("Failed to connect to the database.")
-        return False
-    
-    cursor = connection.cursor()
-
-    try:
-        # Load the CSV into a DataFrame
-        df = pd.read_csv(csv_file)
-
-        # Replace NaN values with None
-        df = df.where(pd.notnull(df), None)
-
-        # Prepare the columns and placeholders dynamically
-        columns = ", ".join(df.columns)
-        placeholders = ', '.join(['%s'] * len(df.columns))
-
-        # Create the insert query
-        insert_query = f"""
-        INSERT INTO {table_name} ({columns})
-        VALUES ({placeholders})
-        """
+def insert_data(csv_file, table_name, mode="executemany"):
+    from src.classes.bulk_loader import load_table
+    result = load_table(csv_file, table_name, mode=mode)
+    print(result)
+    return result.ok
 
-        # Insert data row by row
-        for index, row in df.iterrows():
-            cursor.execute(insert_query, tuple(row))
+def loop_csv(csv_dir, mode="executemany"):
+    return load_csv_dirs([csv_dir], mode=mode)
 
-        # Commit the changes
-        connection.commit()
-        print('Success! Data inserted.')
-        return True
+def load_csv_dirs(csv_dirs, mode="executemany"):
+    """Bulk load every csv in csv_dirs in foreign key order; returns True if all tables loaded"""
+    # the backend skips the per-row movie_summary triggers; the summary is rebuilt once at the end
+    results = get_backend().bulk_load(csv_dirs, mode=mode)
+    # the loader writes on its own connections, past the cache's invalidation
+    clear_cache()
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        print(f"Failed to load {result.table_name}: {result.error}")
+    if results and not failed:
+        refresh_movie_summary()
+        bump_data_versions()
+    return bool(results) and not failed
 
-    except Exception as e:
-        print(f"Error inserting data: {e}")
-        return False
-    finally:
-        # Close the cursor and connection
-        cursor.close()
-        connection.close()
-
-def loop_csv(csv_dir):
-    for file_name in os.listdir(csv_dir):
-        if file_name.endswith(".csv"):
-            csv_path = os.path.join(csv_dir, file_name)
-            table_name = os.path.splitext(os.path.basename(csv_path))[0]
-        try:
-            print(f"Processing file: {csv_path} into table: {table_name}")
-            result = insert_data(csv_path, table_name)
-            if result: print(f"Successfully inserted data from {csv_path} into table {table_name}")
-            else: print("failed")
-        except Exception as e:
-            print(f"Failed to process {csv_path}: {e}")
+def refresh_movie_summary(movie_id=None):
+    """Rebuild the materialized movie_view rows for one movie, or all movies if movie_id is None"""
+    callProcedure("refresh_movie_summary", (movie_id,))
 
 order = ['actor.csv', 'production_company.csv', 'awards.csv', 'genre.csv', 'country.csv', 'director.csv', 'language.csv', 'movie.csv', 
          'movie_genre.csv', 'movie_awards.csv', 'movie_audio.csv', 'movie_cast.csv', 'movie_company.csv', 'movie_country.csv', 'movie_subtitle.csv']
\ No newline at end of file
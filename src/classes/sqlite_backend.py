@@ -0,0 +1,379 @@
+"""The whole database in one local SQLite file, for running without a MySQL server.
+
+The app's statements are MySQL: SQLiteCursor swaps their %s placeholders for ?,
+drops FOR UPDATE (a transaction started by begin() already holds SQLite's write
+lock), and runs CALL statements and callproc with the Python versions of the stored
+procedures in PROCEDURES. The schema is movie_sqlite.sql.
+"""
+import os
+import re
+import sqlite3
+import time
+from functools import lru_cache
+
+from src.classes.backends import Backend
+from src.classes import query_cache
+from src.classes.filter_builder import escape_like
+
+_CALL = re.compile(r"\s*CALL\s+`?(\w+)`?\s*\((.*)\)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\s*(;?)\s*$", re.IGNORECASE)
+
+# seconds a connection waits for another one's write lock
+BUSY_TIMEOUT = 30
+
+class SQLiteBackend(Backend):
+    name = "sqlite"
+    schema_file = "database_files/movie_sqlite.sql"
+    connection_errors = (sqlite3.InterfaceError,)
+    database_error = sqlite3.Error
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self, skip_summary_refresh=False):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # pooled connections move between worker threads, but only one uses a connection at a time
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("PRAGMA journal_mode = WAL")
+        # stands in for MySQL's @skip_summary_refresh session variable in the triggers
+        flag = 1 if skip_summary_refresh else None
+        connection.create_function("skip_summary_refresh", 0, lambda: flag)
+        return connection
+
+    def is_healthy(self, connection):
+        try:
+            connection.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def cursor(self, connection, dict_rows=True):
+        return SQLiteCursor(connection, dict_rows)
+
+    def stream_cursor(self, connection):
+        # sqlite3 cursors step through the result as it is fetched
+        return SQLiteCursor(connection, dict_rows=False)
+
+    def begin(self, connection):
+        # take the write lock up front, as SELECT ... FOR UPDATE would
+        connection.execute("BEGIN IMMEDIATE")
+
+    def apply_schema(self, file_path, log=None):
+        with open(file_path, "r") as file:
+            sql_script = file.read()
+        # the equivalent of DROP DATABASE: start from an empty file
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+        try:
+            connection = self.connect()
+        except sqlite3.Error as err:
+            print(f"Error: {err}")
+            return False
+        start = time.perf_counter()
+        try:
+            connection.executescript(sql_script)
+            if log:
+                log(sql_script, time.perf_counter() - start, None)
+            return True
+        except sqlite3.Error as err:
+            if log:
+                log(sql_script, time.perf_counter() - start, err)
+            print(f"Error: {err}")
+            return False
+        finally:
+            connection.close()
+
+    def explain(self, cursor, query, params=None):
+        cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def bulk_load(self, csv_dirs, mode="executemany"):
+        """Load the csv files one table at a time in foreign key order, each in one transaction.
+        mode is ignored: there is no server to send the files to."""
+        from src.classes.bulk_loader import LoadResult, fallback_levels, find_csv_files, read_chunks, DEFAULT_CHUNK_SIZE
+        files = find_csv_files(csv_dirs)
+        results = []
+        connection = self.connect(skip_summary_refresh=True)
+        try:
+            for [table_name] in fallback_levels(files):
+                start = time.perf_counter()
+                rows = 0
+                try:
+                    connection.execute("BEGIN")
+                    for header, chunk in read_chunks(files[table_name], DEFAULT_CHUNK_SIZE):
+                        columns = ", ".join(f"`{column}`" for column in header)
+                        placeholders = ", ".join(["?"] * len(header))
+                        connection.executemany(f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})", chunk)
+                        rows += len(chunk)
+                    connection.execute("COMMIT")
+                    result = LoadResult(table_name, rows, time.perf_counter() - start)
+                except sqlite3.Error as e:
+                    connection.rollback()
+                    result = LoadResult(table_name, rows, time.perf_counter() - start, e)
+                results.append(result)
+                print(result)
+                if not result.ok:
+                    break
+        finally:
+            connection.close()
+        return results
+
+
+class SQLiteCursor:
+    """DB-API cursor over a sqlite3 connection that takes the statements written for pymysql"""
+
+    def __init__(self, connection, dict_rows=True):
+        self.connection = connection
+        self.dict_rows = dict_rows
+        self._cursor = connection.cursor()
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=None):
+        call = _CALL.match(query)
+        if call:
+            return self.callproc(call.group(1), self._arguments(call.group(2), params))
+        self._cursor.execute(translate(query), _sequence(params))
+        self.rowcount = self._cursor.rowcount
+        if query_cache.changes_rows(query):
+            _refresh_stale_summaries(self._cursor)
+        return self.rowcount
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(translate(query), [_sequence(params) for params in seq_of_params])
+        self.rowcount = self._cursor.rowcount
+        if query_cache.changes_rows(query):
+            _refresh_stale_summaries(self._cursor)
+        return self.rowcount
+
+    def callproc(self, procname, args=()):
+        procedure = PROCEDURES.get(procname.lower())
+        if procedure is None:
+            raise sqlite3.OperationalError(f"PROCEDURE {procname} does not exist")
+        procedure(self._cursor, *args)
+        self.rowcount = self._cursor.rowcount
+        return args
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self.dict_rows or self._cursor.description is None:
+            return rows
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchmany(self, size):
+        rows = self._cursor.fetchmany(size)
+        if not self.dict_rows or self._cursor.description is None:
+            return rows
+        names = [column[0] for column in self._cursor.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is None or not self.dict_rows:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def nextset(self):
+        # procedures here return a single result set
+        return None
+
+    def close(self):
+        self._cursor.close()
+
+    def _arguments(self, text, params):
+        # evaluate the argument list so literals and placeholders both work
+        if not text.strip():
+            return ()
+        return self.connection.execute("SELECT " + translate(text), _sequence(params)).fetchone()
+
+@lru_cache(maxsize=512)
+def translate(query):
+    """query with pymysql's %s placeholders (and %% escapes) in SQLite's ? style, and without FOR UPDATE"""
+    query = _FOR_UPDATE.sub(r"\1", query)
+    return re.sub(r"%(s|%)", lambda match: "?" if match.group(1) == "s" else "%", query)
+
+def _sequence(params):
+    # pymysql also takes a single value for one placeholder
+    if params is None:
+        return ()
+    if isinstance(params, (list, tuple)):
+        return params
+    return (params,)
+
+
+# stored procedures of movie_ddl.sql: each runs on a sqlite3 cursor and leaves its result there
+
+def get_watchlist_entries(cursor, watchlist_id):
+    cursor.execute("""SELECT
+            watchlist_entries.watchlist_id,
+            watchlist_entries.movie_id,
+            movie.title AS movie_name,
+            watchlist_entries.rating,
+            watchlist_entries.comment,
+            watchlist_entries.last_edited
+        FROM watchlist_entries
+        INNER JOIN movie
+            ON watchlist_entries.movie_id = movie.movie_id
+        WHERE watchlist_entries.watchlist_id = ?""", (watchlist_id,))
+
+# refresh_movie_summary's SELECT with {movies} standing for a condition on movie_id;
+# SQLite's GROUP_CONCAT(DISTINCT ...) can't take a separator, so ',' is replaced after
+_SUMMARY_SELECT = """SELECT
+        m.movie_id,
+        m.title,
+        m.budget,
+        m.revenue,
+        m.release_year,
+        m.runtime,
+        m.age_rating,
+        m.rating,
+        ma.award_count,
+        REPLACE(GROUP_CONCAT(DISTINCT g.genre_name), ',', ', ') AS genres,
+        REPLACE(GROUP_CONCAT(DISTINCT s.subtitle_language), ',', ', ') as sub_language,
+        MIN(a.actor_id) as actor_id,
+        MIN(a.star) as star,
+        a.director_id,
+        a.director_name,
+        MIN(p.company_id) as company_id,
+        MIN(p.production_company) as production_company,
+        MIN(c.country_name) as country_name
+    FROM
+        (SELECT * FROM movie WHERE {movies}) AS m
+    LEFT OUTER JOIN
+        (SELECT movie_id, COUNT(*) AS award_count
+         FROM movie_awards
+         WHERE {movies}
+         GROUP BY movie_id) AS ma
+    ON m.movie_id = ma.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, genre_name
+         FROM genre JOIN movie_genre ON genre.genre_id = movie_genre.genre_id
+         WHERE {movies}) as g
+    ON m.movie_id = g.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, language_name as subtitle_language
+         FROM movie_subtitle JOIN language ON movie_subtitle.language_id = language.language_id
+         WHERE {movies}) as s
+    ON m.movie_id = s.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, actor.actor_id, actor.actor_name AS star, director.director_id, director.director_name
+         FROM movie_cast
+         JOIN actor ON actor.actor_id = movie_cast.actor_id
+         JOIN director ON movie_cast.director_id = director.director_id
+         WHERE {movies}) as a
+    ON m.movie_id = a.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, production_company.company_id, company_name AS production_company
+         FROM movie_company JOIN production_company ON movie_company.company_id = production_company.company_id
+         WHERE {movies}) as p
+    ON m.movie_id = p.movie_id
+    LEFT OUTER JOIN
+        (SELECT movie_id, country_name
+         FROM movie_country JOIN country ON movie_country.country_id = country.country_id
+         WHERE {movies}) as c
+    ON m.movie_id = c.movie_id
+    GROUP BY
+        m.movie_id, m.title, m.budget, m.revenue, m.release_year, m.runtime, m.age_rating, m.rating,
+        ma.award_count, a.director_id, a.director_name"""
+# number of {movies} conditions in _SUMMARY_SELECT
+_SUMMARY_TABLES = 7
+
+def refresh_movie_summary(cursor, movie_id=None):
+    if movie_id is None:
+        movies, params = "1", ()
+    else:
+        movies, params = "movie_id = ?", (movie_id,) * _SUMMARY_TABLES
+    _refresh_summary(cursor, movies, params)
+    if movie_id is None:
+        cursor.execute("DELETE FROM movie_summary_stale")
+
+def _refresh_summary(cursor, movies, params):
+    cursor.execute(f"DELETE FROM movie_summary WHERE {movies}", params[:1])
+    cursor.execute("INSERT INTO movie_summary " + _SUMMARY_SELECT.format(movies=movies), params)
+
+def _refresh_stale_summaries(cursor):
+    """Rebuild the summary of the movies the triggers queued while running a write"""
+    if cursor.execute("SELECT 1 FROM movie_summary_stale LIMIT 1").fetchone() is None:
+        return
+    _refresh_summary(cursor, "movie_id IN (SELECT movie_id FROM movie_summary_stale)", ())
+    cursor.execute("DELETE FROM movie_summary_stale")
+
+# (view key column, [(tables, key of the matched row, text columns of t)]) of each view search_view
+# can search, as the MATCHes of the MySQL procedure; a row matches when one source matches every word
+_SEARCH_SOURCES = {
+    'movie_view': ('movie_id', [
+        ("movie AS t", "t.movie_id", ('title',)),
+        ("genre AS t JOIN movie_genre AS j ON j.genre_id = t.genre_id", "j.movie_id", ('genre_name',)),
+        ("actor AS t JOIN movie_cast AS j ON j.actor_id = t.actor_id", "j.movie_id", ('actor_name',)),
+        ("director AS t JOIN movie_cast AS j ON j.director_id = t.director_id", "j.movie_id", ('director_name',)),
+        ("production_company AS t JOIN movie_company AS j ON j.company_id = t.company_id", "j.movie_id", ('company_name',)),
+    ]),
+    'actor_view': ('actor_id', [("actor AS t", "t.actor_id", ('actor_name',))]),
+    'director_view': ('director_id', [("director AS t", "t.director_id", ('director_name',))]),
+    'production_view': ('company_id', [("production_company AS t", "t.company_id", ('company_name',))]),
+    'awards_view': ('award_id', [("awards AS t", "t.award_id", ('category', 'organization'))]),
+}
+
+def search_view(cursor, view_name, search_value, max_rows):
+    """Rows of the view whose text columns have a word starting with each +word* of a
+    FULLTEXT boolean-mode query; relevance is the number of words matched at the start"""
+    if view_name not in _SEARCH_SOURCES:
+        raise sqlite3.OperationalError("search_view: view has no FULLTEXT search")
+    key, sources = _SEARCH_SOURCES[view_name]
+    words = re.findall(r"\w+", search_value)
+    selects = []
+    params = []
+    for tables, source_key, columns in sources:
+        select, source_params = _search_source(tables, source_key, columns, words)
+        selects.append(select)
+        params.extend(source_params)
+    cursor.execute(f"""SELECT v.*, found.relevance
+        FROM (SELECT search_key, MAX(relevance) AS relevance
+              FROM ({" UNION ALL ".join(selects)})
+              GROUP BY search_key) AS found
+        JOIN {view_name} AS v ON v.`{key}` = found.search_key
+        ORDER BY found.relevance DESC
+        LIMIT ?""", params + [max_rows])
+
+def _search_source(tables, key, columns, words):
+    """(SELECT of search_key, relevance, params) for the rows of one source matching every word"""
+    conditions = []
+    relevance = []
+    params = []
+    for word in words:
+        matches = []
+        for column in columns:
+            matches.append(f"(t.`{column}` LIKE ? ESCAPE '!' OR t.`{column}` LIKE ? ESCAPE '!')")
+            escaped = escape_like(word)
+            params.extend([escaped + "%", "% " + escaped + "%"])
+        conditions.append("(" + " OR ".join(matches) + ")")
+    starts = []
+    for word in words:
+        for column in columns:
+            relevance.append(f"(t.`{column}` LIKE ? ESCAPE '!')")
+            starts.append(escape_like(word) + "%")
+    where = " AND ".join(conditions) if conditions else "1"
+    score = " + ".join(relevance) if relevance else "0"
+    return f"SELECT {key} AS search_key, {score} AS relevance FROM {tables} WHERE {where}", starts + params
+
+PROCEDURES = {
+    'get_watchlist_entries': get_watchlist_entries,
+    'refresh_movie_summary': refresh_movie_summary,
+    'search_view': search_view,
+}
@@ -0,0 +1,94 @@
+"""Wall-clock timings of the steps of a launch, turned on with --startup-profile.
+
+Every step is recorded as (name, start, end) in seconds since the process started
+timing, so overlapping background work (the tab queries) shows as overlapping spans.
+When profiling is off, measure() and timed() cost one attribute check.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+FLAG = "--startup-profile"
+
+_start = time.perf_counter()
+_enabled = False
+_export_path = None
+_steps = []
+_lock = threading.Lock()
+_finished = False
+
+def enable(start=None, export_path=None):
+    """Start recording; start is the perf_counter() value the times are measured from"""
+    global _enabled, _start, _export_path
+    _enabled = True
+    if start is not None:
+        _start = start
+    _export_path = export_path
+
+def enable_from_args(argv, start=None):
+    """Enable if argv has --startup-profile, or --startup-profile=FILE to also write the steps to FILE as JSON"""
+    for arg in argv:
+        if arg == FLAG or arg.startswith(FLAG + "="):
+            enable(start, arg.partition("=")[2] or None)
+            return True
+    return False
+
+def is_enabled():
+    return _enabled
+
+def record(name, start, end=None):
+    if not _enabled:
+        return
+    end = time.perf_counter() if end is None else end
+    with _lock:
+        _steps.append((name, start - _start, end - _start))
+
+def mark(name):
+    """Record an instant, e.g. the first paint"""
+    now = time.perf_counter()
+    record(name, now, now)
+
+@contextmanager
+def measure(name):
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start)
+
+def timed(name, fn):
+    """fn wrapped to record how long each call takes, for work started on other threads"""
+    if not _enabled:
+        return fn
+    def wrapper(*args, **kwargs):
+        with measure(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def steps():
+    with _lock:
+        return sorted(_steps, key=lambda step: (step[1], step[2]))
+
+def report():
+    lines = [f"{'step':<40} {'start':>9} {'end':>9} {'took':>9}"]
+    for name, start, end in steps():
+        lines.append(f"{name:<40} {start * 1000:>7.1f}ms {end * 1000:>7.1f}ms {(end - start) * 1000:>7.1f}ms")
+    return "\n".join(lines)
+
+def finish():
+    """Print the report, and write it to the export file if one was given; only the first call reports"""
+    global _finished
+    if not _enabled or _finished:
+        return
+    _finished = True
+    print("Startup profile:", file=sys.stderr)
+    print(report(), file=sys.stderr)
+    if _export_path:
+        with open(_export_path, "w") as f:
+            json.dump([{"step": name, "start": start, "end": end, "seconds": end - start}
+                       for name, start, end in steps()], f, indent=2)
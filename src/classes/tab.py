@@ -1,24 +1,36 @@
-from PyQt5.QtCore import Qt, QSortFilterProxyModel
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHeaderView, QDialog, QMessageBox, QLineEdit, QLabel, QTextEdit, QSpinBox, QInputDialog, QAction, QMenu, QTableView
 from PyQt5.QtGui import QCursor
 from src.classes.mysql_model import MySQLModel
-
-import pandas as pd
-from src.classes.mysql_model import MySQLModel
-from src.run import resource_path
-from pathlib import Path
+from src.classes.column_store import ColumnStore
+from src.classes.table_proxy import TableProxyModel
+from src.classes.search_index import TrigramIndex
+from src.classes import local_filter
+from src.classes.query_worker import run_in_background
+from src.classes import startup_profile
 
 class TabWidget(QWidget): 
-    def __init__(self, parent, data, name): 
+    # "More Like This" on a movie: (movie_id, title)
+    moreLikeThis = pyqtSignal(int, str)
+    # "Recommend Movies" on a watchlist row: watchlist_id
+    recommendForWatchlist = pyqtSignal(int)
+
+    def __init__(self, parent, data, name, query=None, page_size=None, key_columns=None, loading=False): 
         super(QWidget, self).__init__(parent)
+        self.loading = loading
         self.default_data = data
         self.name = name
+        self.query = query
+        self.page_size = page_size
+        self.key_columns = key_columns
+        self.filtered = False
+        # change token of the snapshot the tab is showing, see snapshot.py
+        self.snapshot_token = None
         self.watchlist_menu = QMenu()
         self.person_menu = QMenu()
 
-        if type(data) == str:
-            data = pd.read_json(resource_path(Path(data)))
-            #self.model = PandasModel(data)
+        if query and page_size and not loading:
+            self.model = MySQLModel(query=query, page_size=page_size, key_columns=key_columns)
         else:
             if data:
                 self.model = MySQLModel(data)
@@ -27,10 +39,8 @@ class TabWidget(QWidget):
         self.columns = self.model.getColumnNames()
 
         # create proxy models (used for filtering)
-        self.proxy = QSortFilterProxyModel()
+        self.proxy = TableProxyModel()
         self.proxy.setSourceModel(self.model)
-        self.proxy.setFilterKeyColumn(-1) # set the column to filter by as all
-        self.proxy.setFilterCaseSensitivity(False)
 
         # create view model
         self.view = QTableView()
@@ -46,7 +56,13 @@ class TabWidget(QWidget):
         for i in range(self.view.horizontalHeader().count()):
             self.view.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
         
+        # shown in place of the rows until the tab's query has finished
+        self.loading_label = QLabel("Loading...")
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.loading_label.setVisible(loading)
+
         self.layout = QVBoxLayout(self)
+        self.layout.addWidget(self.loading_label)
         self.layout.addWidget(self.view)
         self.setLayout(self.layout)
 
@@ -95,6 +111,11 @@ class TabWidget(QWidget):
             watchlist_option = QAction(f"Add to {name}", self.watchlist_menu)
             watchlist_option.setData((id, movie_id, name, data))
             self.watchlist_menu.addAction(watchlist_option)
+        self.watchlist_menu.addSeparator()
+        # no data, so the watchlist menu's handler leaves it to its own slot
+        similar = QAction("More Like This", self.watchlist_menu)
+        similar.triggered.connect(lambda: self.moreLikeThis.emit(int(movie_id), str(data)))
+        self.watchlist_menu.addAction(similar)
         # show menu
         action = self.watchlist_menu.exec_(QCursor.pos())
     
@@ -107,8 +128,15 @@ class TabWidget(QWidget):
         edit.setData((watchlist_id, movie_id, row))
         delete = QAction("Delete")
         delete.setData((watchlist_id, movie_id, row))
+        similar = QAction("More Like This")
+        similar.setData((watchlist_id, movie_id, row))
+        recommend = QAction("Recommend Movies")
+        recommend.setData((watchlist_id, movie_id, row))
         edit_menu.addAction(edit)
         edit_menu.addAction(delete)
+        edit_menu.addSeparator()
+        edit_menu.addAction(similar)
+        edit_menu.addAction(recommend)
         edit_menu.triggered.connect(self.deleteOrEditEntry)
         edit_menu.exec_(QCursor.pos())
     
@@ -116,16 +144,36 @@ class TabWidget(QWidget):
         (watchlist_id, movie_id, row) = action.data()
         if action.text() == "Delete":
             self.deleteEntry(watchlist_id, movie_id, row)
+        elif action.text() == "More Like This":
+            self.moreLikeThis.emit(int(movie_id), str(self.model.getRow(row)["movie_name"]))
+        elif action.text() == "Recommend Movies":
+            self.recommendForWatchlist.emit(int(watchlist_id))
         else:
             self.editEntry(watchlist_id, movie_id, row)
 
+    def ratedMovies(self):
+        """(movie_id, rating) of every entry of a watchlist tab, including unsaved edits"""
+        if "movie_id" not in self.columns:
+            return []
+        return [(row["movie_id"], row.get("rating")) for row in (self.model.getRow(i) for i in range(self.model.rowCount()))]
+
     def deleteEntry(self, watchlist_id, movie_id, row):
-        from src.classes.sql_controller import query_data
-        query = "DELETE FROM watchlist_entries WHERE watchlist_id = %s AND movie_id = %s"
-        query_data(query, params=(watchlist_id, movie_id))
+        # written to the database with the tab's other changes, see save
         self.model.removeRow(row)
-        row_count = self.model.rowCount()
-        self.view.rowCountChanged(row_count - 1, row_count)
+
+    def upsertEntry(self, entry):
+        """Show a new or changed watchlist entry without reloading the other rows"""
+        had_columns = bool(self.model.getColumnNames())
+        row = self.model.upsertRow(entry)
+        if not had_columns:
+            self.columns = self.model.getColumnNames()
+            self.formatColumns()
+        return row
+
+    def save(self):
+        """Write the watchlist's pending adds, edits and deletes; returns the FlushResult"""
+        from src.classes.sql_controller import get_watchlist_entry
+        return self.model.save(fetch_row=lambda key: get_watchlist_entry(*key))
     
     def editEntry(self, watchlist_id, movie_id, row_index):
         row = self.model.getRow(row_index)
@@ -148,12 +196,9 @@ class TabWidget(QWidget):
         dialog.layout().insertWidget(4, comment_text)
         ret = dialog.exec_() == QDialog.Accepted
         if ret:
-            from src.classes.sql_controller import query_data
-            query = "UPDATE watchlist_entries SET rating = %s, comment = %s WHERE watchlist_id = %s AND movie_id = %s"
             new_rating = rating_box.value()
             new_comment = comment_text.toPlainText()
             try:
-                query_data(query, params=(new_rating, new_comment, watchlist_id, movie_id))
                 self.model.setData(self.model.index(row_index, self.model.getColIndex("rating")), new_rating)
                 self.model.setData(self.model.index(row_index, self.model.getColIndex("comment")), new_comment)
             except Exception as e:
@@ -172,24 +217,142 @@ class TabWidget(QWidget):
         action = self.person_menu.exec_(QCursor.pos())
 
     def findPerson(self, person_id, col_name):
-        self.setFilter()
-        (row_index, col_index) = self.model.getRowIndexFromVal(person_id, col_name)
+        """Select the row whose col_name is person_id. A filter is only cleared if it hides that
+        row, and a filter applied by the proxy is cleared without resetting the model."""
+        (row_index, col_index) = self.findRow(person_id, col_name)
+        if row_index != -1 and self.proxy.hasRowFilter() and not self.getRowFromModel(row_index, col_index).isValid():
+            # the model holds every row, the proxy only hides some
+            self.filtered = False
+            self.proxy.setRowFilter(None)
+        elif row_index == -1 and self.filtered and not self.proxy.hasRowFilter():
+            # the model holds the rows of a database filter or search, go back to every row
+            self.setFilter()
+            (row_index, col_index) = self.findRow(person_id, col_name)
+        if row_index == -1:
+            return
         qindex = self.getRowFromModel(row_index, col_index)
+        if not qindex.isValid():
+            # hidden by the search bar
+            return
         self.view.selectRow(qindex.row())
+        self.view.scrollTo(qindex)
+
+    def findRow(self, value, col_name):
+        """(row, column) in the model of the first row whose col_name is value, through the
+        model's column index; a paged model loads pages until it finds one"""
+        if self.model.isPaged():
+            return self.model.fetchUntil(col_name, value)
+        return self.model.getRowIndexFromVal(value, col_name)
     
+    def movieAt(self, view_row):
+        """(movie_id, title) of a row as the view shows it, or None past the rows or if the tab has no movie_id"""
+        if "movie_id" not in self.columns or not 0 <= view_row < self.proxy.rowCount():
+            return None
+        index = self.proxy.mapToSource(self.proxy.index(view_row, 0))
+        if not index.isValid():
+            return None
+        row = self.model.getRow(index.row())
+        if row.get("movie_id") is None:
+            return None
+        return (row["movie_id"], row.get("title", row.get("movie_name")))
+
+    def visibleColumns(self):
+        """Indexes of the columns the view shows, left to right"""
+        header = self.view.horizontalHeader()
+        return sorted((i for i in range(len(self.columns)) if not self.view.isColumnHidden(i)), key=header.visualIndex)
+
     def getRowFromModel(self, row, col):
         qindex = self.model.index(row, col)
         proxy_index = self.proxy.mapFromSource(qindex)
         return proxy_index
     
     def setFilter(self, data=None):
+        self.filtered = bool(data)
         if data:
             self.model.resetModel(data)
+        elif self.query and self.page_size:
+            self.model.setPagedQuery(self.query, self.page_size, key_columns=self.key_columns)
         else:
             self.model.resetModel(self.default_data)
         self.columns = self.model.getColumnNames()
         self.formatColumns()
     
+    def setLocalFilter(self, values):
+        """Filter the rows the tab has loaded by a {field name: text} dict, without the database
+        (see local_filter.py). Returns False, leaving the tab as it is, if the tab is paged or
+        still loading or a value can only be checked by the database. Raises ValueError for a
+        malformed value."""
+        if self.loading or self.model.isPaged():
+            return False
+        tests = local_filter.compile_filter(self.name, values)
+        if tests is None or any(name not in self.columns for name, _ in tests):
+            return False
+        if self.filtered and not self.proxy.hasRowFilter():
+            # the model holds the rows of a database filter or search, go back to every row
+            self.setFilter()
+        self.filtered = bool(tests)
+        self.proxy.setRowFilter(local_filter.select(self.model, tests) if tests else None)
+        return True
+
+    def showMovies(self, movie_ids):
+        """Only show the rows whose movie_id is in a set, e.g. the result of a BitmapIndex query"""
+        if self.model.isPaged():
+            if not movie_ids:
+                self.setConditions([("1 = 0", [])])
+            else:
+                ids = sorted(movie_ids)
+                self.setConditions([("movie_id IN (" + ", ".join(["%s"] * len(ids)) + ")", ids)])
+            return
+        if self.filtered and not self.proxy.hasRowFilter():
+            self.setFilter()
+        column = self.model.storeColumn(self.model.getColIndex("movie_id"))
+        self.filtered = True
+        self.proxy.setRowFilter({slot for slot in self.model.liveSlots() if column[slot] in movie_ids})
+
+    def setConditions(self, conditions):
+        """Filter a paged tab in the database with (sql, params) WHERE fragments"""
+        self.filtered = bool(conditions)
+        self.model.setConditions(conditions)
+
+    def showSearchResults(self, rows):
+        """Show rows found by a database search in place of the tab's rows"""
+        self.filtered = True
+        self.model.resetModel(rows, headers=list(self.columns))
+        self.columns = self.model.getColumnNames()
+        self.formatColumns()
+
+    def loadData(self, data):
+        """Show the rows of a query that finished loading in the background, or of a snapshot.
+        data is a list of row dicts or a ColumnStore"""
+        self.default_data = data
+        self.loading = False
+        self.loading_label.setVisible(False)
+        with startup_profile.measure(f"model {self.name}"):
+            self.setFilter()
+        if data and not self.model.isPaged():
+            # build the search index off the GUI thread; a search before it's ready builds it directly
+            if isinstance(data, ColumnStore):
+                run_in_background(self.model.revision, TrigramIndex.fromStore, data,
+                                  on_finished=self.proxy.searchIndexBuilt)
+            else:
+                run_in_background(self.model.revision, TrigramIndex.fromRows, data, self.columns,
+                                  on_finished=self.proxy.searchIndexBuilt)
+
+    def refreshData(self, data):
+        """Swap in fresh rows for rows shown from a snapshot"""
+        if data is None or self.model.isDirty():
+            # keep the unsaved edits; saving checks them against the stored rows
+            return
+        if self.filtered:
+            # shown when the filter is cleared
+            self.default_data = data
+            return
+        self.loadData(data)
+
+    def loadFailed(self, message):
+        self.loading = False
+        self.loading_label.setText("Could not load this tab: " + message)
+
     def formatColumns(self):
         for i, val in enumerate(self.columns):
             if '_id' in val:
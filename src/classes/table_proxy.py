@@ -0,0 +1,131 @@
+from array import array
+from PyQt5.QtCore import Qt, QSortFilterProxyModel
+from src.classes.search_index import TrigramIndex
+
+class TableProxyModel(QSortFilterProxyModel):
+    """Proxy between a MySQLModel and its view.
+
+    The search bar is answered from a TrigramIndex over the model's rows instead of
+    formatting and scanning every cell on each keystroke. A query that extends the
+    previous one only re-checks the previous matches. When the model is paged,
+    searching is handed to the database instead. A filter run on the loaded rows
+    (see local_filter.py) is a second set of slots, shown in the same way.
+
+    Sorting is always done by the model, which orders its rows by precomputed
+    per-column keys (or asks the database when paged), so the proxy never calls
+    lessThan and only keeps the source's order."""
+
+    def __init__(self):
+        super().__init__()
+        self.search_text = ""
+        self.search_columns = None  # column numbers to search, None for all
+        self._index = None
+        self._matches = None  # slots matching search_text, None when not searching
+        self._shown = None  # slots kept by setRowFilter, None when not filtering
+
+    def setSourceModel(self, model):
+        # connected before the proxy's own handlers so the matches are current when it re-filters
+        model.modelReset.connect(self._sourceReset)
+        model.dataChanged.connect(self._sourceDataChanged)
+        model.rowsInserted.connect(self._sourceRowsInserted)
+        model.rowsAboutToBeRemoved.connect(self._sourceRowsAboutToBeRemoved)
+        super().setSourceModel(model)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def setFilterFixedString(self, text):
+        if self.sourceModel().isPaged():
+            self.search_text = text
+            self.sourceModel().setSearch(text)
+            return
+        within = None
+        if self._matches is not None and self.search_text.lower() in text.lower():
+            within = self._matches
+        self.search_text = text
+        self._matches = self._search(text, within)
+        self.invalidateFilter()
+
+    def setRowFilter(self, slots):
+        """Only show the source rows in the slots set, or every row for None"""
+        self._shown = slots
+        self.invalidateFilter()
+
+    def hasRowFilter(self):
+        return self._shown is not None
+
+    def shownSlots(self):
+        """Storage slots of the rows the proxy shows, in the order it shows them"""
+        # the source does the sorting, so the proxy keeps its order
+        slots = array("i", self.sourceModel().liveSlots())
+        if self._matches is None and self._shown is None:
+            return slots
+        return array("i", filter(self._accepts, slots))
+
+    def setSearchColumns(self, columns):
+        self.search_columns = columns
+        if self.search_text and not self.sourceModel().isPaged():
+            self._matches = self._search(self.search_text)
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._matches is None and self._shown is None:
+            return True
+        return self._accepts(self.sourceModel().slotForRow(source_row))
+
+    def _accepts(self, slot):
+        return (self._matches is None or slot in self._matches) and (self._shown is None or slot in self._shown)
+
+    def searchIndexBuilt(self, revision, index):
+        """Use an index built on a worker thread if the model hasn't changed since"""
+        if self._index is None and revision == self.sourceModel().revision:
+            self._index = index
+
+    def _searchIndex(self):
+        if self._index is None:
+            self._index = TrigramIndex.fromModel(self.sourceModel())
+        return self._index
+
+    def _search(self, text, within=None):
+        if not text:
+            return None
+        return self._searchIndex().search(text, self.search_columns, within)
+
+    def _recheck(self, slots):
+        model = self.sourceModel()
+        for slot in slots:
+            self._index.update(slot, [model.slotValue(slot, col) for col in range(model.columnCount())])
+        if self._matches is not None:
+            hits = self._index.search(self.search_text, self.search_columns, set(slots))
+            self._matches.difference_update(slots)
+            self._matches.update(hits)
+
+    def _sourceReset(self):
+        self._index = None
+        self._matches = None
+        self._shown = None
+        if self.search_text and not self.sourceModel().isPaged():
+            self._matches = self._search(self.search_text)
+
+    def _sourceDataChanged(self, top_left, bottom_right, roles=None):
+        if self._index is not None:
+            model = self.sourceModel()
+            self._recheck([model.slotForRow(row) for row in range(top_left.row(), bottom_right.row() + 1)])
+
+    def _sourceRowsInserted(self, parent, first, last):
+        if self._index is not None:
+            model = self.sourceModel()
+            self._recheck([model.slotForRow(row) for row in range(first, last + 1)])
+
+    def _sourceRowsAboutToBeRemoved(self, parent, first, last):
+        if self._shown is not None:
+            model = self.sourceModel()
+            for row in range(first, last + 1):
+                self._shown.discard(model.slotForRow(row))
+        if self._index is not None:
+            model = self.sourceModel()
+            for row in range(first, last + 1):
+                slot = model.slotForRow(row)
+                self._index.remove(slot)
+                if self._matches is not None:
+                    self._matches.discard(slot)
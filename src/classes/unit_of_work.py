@@ -0,0 +1,129 @@
+class FlushResult:
+    """What a flush wrote: saved maps each inserted or updated key to its row as stored,
+    conflicts maps each key changed elsewhere to its current row, or None if it was deleted"""
+    def __init__(self, saved=None, conflicts=None):
+        self.saved = saved or {}
+        self.conflicts = conflicts or {}
+
+    @property
+    def ok(self):
+        return not self.conflicts
+
+class UnitOfWork:
+    """Pending inserts, updates and deletes of one table's rows, written together by flush.
+
+    Repeated changes to the same row are coalesced, so an entry edited several times
+    is written once, and an entry added and deleted again is never written. Updates
+    and deletes remember the row's version_column as it was loaded; a flush skips any
+    row whose version changed since and reports it as a conflict instead."""
+
+    def __init__(self, table="watchlist_entries", key_columns=("watchlist_id", "movie_id"),
+                 columns=("rating", "comment"), version_column="last_edited"):
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.columns = tuple(columns)
+        self.version_column = version_column
+        self.inserts = {}  # key -> column values
+        self.updates = {}  # key -> changed column values
+        self.deletes = {}  # key -> version the row was loaded with
+        self.versions = {}  # key -> version of updated rows as loaded
+
+    def key(self, row):
+        return tuple(row[name] for name in self.key_columns)
+
+    def isDirty(self):
+        return bool(self.inserts or self.updates or self.deletes)
+
+    def __len__(self):
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+    def recordInsert(self, row):
+        key = self.key(row)
+        values = {name: row.get(name) for name in self.columns}
+        if key in self.deletes:
+            # deleted and added back: write it as an update of the existing row
+            self.versions[key] = self.deletes.pop(key)
+            self.updates[key] = values
+        else:
+            self.inserts[key] = values
+
+    def recordUpdate(self, row, values):
+        """row is the row before the change, values the changed columns"""
+        key = self.key(row)
+        values = {name: value for name, value in values.items() if name in self.columns}
+        if not values:
+            return
+        if key in self.inserts:
+            self.inserts[key].update(values)
+            return
+        if key not in self.updates:
+            self.updates[key] = {}
+            self.versions[key] = row.get(self.version_column)
+        self.updates[key].update(values)
+
+    def recordDelete(self, row):
+        key = self.key(row)
+        if self.inserts.pop(key, None) is not None:
+            return
+        self.updates.pop(key, None)
+        self.deletes[key] = self.versions.pop(key, row.get(self.version_column))
+
+    def clear(self):
+        self.inserts.clear()
+        self.updates.clear()
+        self.deletes.clear()
+        self.versions.clear()
+
+    def flush(self, cursor):
+        """Write the pending changes with cursor, inside the caller's transaction.
+
+        The rows being changed are locked and their versions checked first; rows that
+        conflict are left alone. The changes stay pending until the caller calls clear()
+        after the transaction commits, so a failed commit loses none of them."""
+        expected = dict(self.versions)
+        expected.update(self.deletes)
+        current = self._lockRows(cursor, list(expected) + list(self.inserts))
+        conflicts = set()
+        for key, version in expected.items():
+            if key not in current or current[key].get(self.version_column) != version:
+                conflicts.add(key)
+        for key in self.inserts:
+            if key in current:
+                conflicts.add(key)
+
+        deletes = [key for key in self.deletes if key not in conflicts]
+        inserts = [(key, values) for key, values in self.inserts.items() if key not in conflicts]
+        updates = [(key, values) for key, values in self.updates.items() if key not in conflicts]
+        where = " AND ".join(f"`{name}` = %s" for name in self.key_columns)
+        if deletes:
+            cursor.executemany(f"DELETE FROM `{self.table}` WHERE {where}", deletes)
+        if inserts:
+            names = self.key_columns + self.columns
+            cursor.executemany(f"INSERT INTO `{self.table}` ({', '.join(f'`{name}`' for name in names)}) "
+                               f"VALUES ({', '.join(['%s'] * len(names))})",
+                               [key + tuple(values.get(name) for name in self.columns) for key, values in inserts])
+        # one executemany per set of changed columns
+        shapes = {}
+        for key, values in updates:
+            shapes.setdefault(tuple(sorted(values)), []).append((key, values))
+        for names, rows in shapes.items():
+            assignments = ", ".join(f"`{name}` = %s" for name in names)
+            cursor.executemany(f"UPDATE `{self.table}` SET {assignments} WHERE {where}",
+                               [tuple(values[name] for name in names) + key for key, values in rows])
+
+        # read back what triggers and defaults filled in, e.g. the new last_edited
+        saved = self._selectRows(cursor, [key for key, _ in inserts] + [key for key, _ in updates])
+        return FlushResult(saved, {key: current.get(key) for key in conflicts})
+
+    def _lockRows(self, cursor, keys):
+        return self._selectRows(cursor, keys, " FOR UPDATE")
+
+    def _selectRows(self, cursor, keys, suffix=""):
+        if not keys:
+            return {}
+        names = self.key_columns + self.columns + (self.version_column,)
+        placeholders = ", ".join(["(" + ", ".join(["%s"] * len(self.key_columns)) + ")"] * len(keys))
+        cursor.execute(f"SELECT {', '.join(f'`{name}`' for name in names)} FROM `{self.table}` "
+                       f"WHERE ({', '.join(f'`{name}`' for name in self.key_columns)}) IN ({placeholders}){suffix}",
+                       [value for key in keys for value in key])
+        return {self.key(row): row for row in cursor.fetchall()}
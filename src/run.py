@@ -1,11 +1,13 @@
 # imports
+import time
+_start = time.perf_counter()
 import sys
-import os
-from PyQt5.QtWidgets import QApplication, QInputDialog, QDialog, QLineEdit
-from pathlib import Path
-import socket
-from random import randrange
-from src.classes.sql_controller import *
+from src.classes import startup_profile
+startup_profile.enable_from_args(sys.argv, _start)
+with startup_profile.measure("import PyQt5"):
+    from PyQt5.QtWidgets import QApplication
+# sql_controller and the loader are imported where they are used, so a normal launch
+# only pays for what the window needs
 
 # create a unique app id for exec file
 try:
@@ -15,52 +17,18 @@ try:
 except ImportError:
     pass
 
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    try:
-        # PyInstaller creates a temp folder and stores path in _MEIPASS
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-
-    return os.path.join(base_path, relative_path)
-
 def runApp():
-        from src.classes.main_window import MainWindow
-        window = MainWindow()
+        with startup_profile.measure("import main_window"):
+            from src.classes.main_window import MainWindow
+        with startup_profile.measure("build window"):
+            window = MainWindow()
         app.exec_()
 
-def getPassword():
-    text, ret = QInputDialog.getText(None, "SQL Password","Please enter your SQL password below. Double check it, as you cannot change it later.", QLineEdit.Normal, "")
-    if text and ret:
-        return text
-    else:
-        getPassword()
-
-def loadSQLData():
-    if fetchPassword() == "":
-        new_password = getPassword()
-        setPassword(new_password)
-    success = create_database('database_files/movie_ddl.sql')
-    print("create database:", success)
-    try:
-        loop_csv("database_files/parent_tables")
-        loop_csv("database_files/dependent_tables")
-        return True
-    except Exception as e:
-        print(e)
-        return False
-
-
 if __name__ == '__main__':
     # run the app
     try:
-        app = QApplication(sys.argv)
-        """attempt = connect_to_database()
-        if attempt is None:
-            loaded = loadSQLData()
-        else:
-            attempt.close()"""
+        with startup_profile.measure("create QApplication"):
+            app = QApplication(sys.argv)
     except Exception as e:
         print(e)
     finally:
@@ -0,0 +1,49 @@
+import pytest
+
+from src.classes.bitmap_index import BitmapIndex
+
+@pytest.fixture
+def index():
+    index = BitmapIndex([1, 2, 3, 4, 5, 6, 7, 8, 9])
+    index.addRows("genre", [(1, "Horror"), (2, "Horror"), (2, "Comedy"), (3, "Comedy"), (4, "Drama"),
+                            (5, "Science Fiction"), (9, "Horror"), (99, "Horror")])
+    index.addRows("subtitle", [(1, "English"), (3, "English"), (4, "French")])
+    index.addRows("country", [(1, "United States", "US"), (2, "France", "FR"), (9, "United States", "US")])
+    return index
+
+def movies(index, text):
+    return index.movieIds(index.query(text))
+
+def test_single_terms_ignore_case(index):
+    assert movies(index, "genre:horror") == {1, 2, 9}
+    assert movies(index, 'genre:"science fiction"') == {5}
+    assert movies(index, "genre:Western") == set()
+
+def test_and_may_be_left_out(index):
+    assert movies(index, "genre:Horror AND subtitle:English") == {1}
+    assert movies(index, "genre:Horror subtitle:English") == {1}
+
+def test_not_binds_tighter_than_or(index):
+    # (NOT Horror) OR Comedy, not NOT (Horror OR Comedy)
+    assert movies(index, "NOT genre:Horror OR genre:Comedy") == {2, 3, 4, 5, 6, 7, 8}
+    assert movies(index, "NOT (genre:Horror OR genre:Comedy)") == {4, 5, 6, 7, 8}
+
+def test_and_binds_tighter_than_or(index):
+    assert movies(index, "genre:Drama OR genre:Horror AND country:US") == {1, 4, 9}
+    assert movies(index, "(genre:Drama OR genre:Horror) AND country:US") == {1, 9}
+
+def test_not_of_a_term_after_and(index):
+    assert movies(index, "genre:Horror AND NOT country:US") == {2}
+    assert movies(index, "NOT NOT genre:Drama") == {4}
+
+def test_countries_by_name_or_code(index):
+    assert movies(index, "country:us") == movies(index, 'country:"United States"') == {1, 9}
+    assert index.values("country") == ["France", "United States"]
+
+def test_count(index):
+    assert index.count(index.query("genre:Horror OR genre:Comedy")) == 4
+
+@pytest.mark.parametrize("text", ["genre:Horror AND", "(genre:Horror", "genre:Horror)", "Horror", "mood:sad", "OR genre:Drama"])
+def test_malformed_queries_raise(index, text):
+    with pytest.raises(ValueError):
+        index.query(text)
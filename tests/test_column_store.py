@@ -0,0 +1,96 @@
+from decimal import Decimal
+
+import pytest
+
+from src.classes import snapshot
+from src.classes.column_store import ColumnStore, DictColumn, FloatColumn, IntColumn, ObjectColumn
+
+ROWS = [
+    {"movie_id": i, "title": f"Movie {i}", "age_rating": ["G", "PG", "R", None][i % 4],
+     "rating": None if i % 5 == 0 else i / 10, "budget": Decimal(i) if i % 7 == 0 else None}
+    for i in range(100)
+]
+
+def test_columns_get_compact_types():
+    store = ColumnStore(ROWS)
+    kinds = {header: type(column) for header, column in zip(store.headers, store.columns)}
+    assert kinds == {"movie_id": IntColumn, "title": ObjectColumn, "age_rating": DictColumn,
+                     "rating": FloatColumn, "budget": DictColumn}
+    assert len(store.columns[2].dictionary) == 4
+
+def test_rows_round_trip():
+    store = ColumnStore(ROWS)
+    assert len(store) == len(ROWS)
+    assert store.rows() == ROWS
+    assert store.get(5, 3) is None
+
+def test_edits_keep_the_other_rows():
+    store = ColumnStore(ROWS)
+    store.set(1, 0, 1000)
+    store.set(2, 3, None)
+    store.append({"movie_id": 2 ** 70, "title": "Big", "age_rating": "NC-17", "rating": 1})
+    store.delete(0)
+    assert store.row(0)["movie_id"] == 1000
+    assert store.row(1)["rating"] is None
+    assert store.row(len(store) - 1) == {"movie_id": 2 ** 70, "title": "Big", "age_rating": "NC-17", "rating": 1,
+                                         "budget": None}
+    # values a typed column can't hold turn it into a plain one
+    assert isinstance(store.columns[0], ObjectColumn) and isinstance(store.columns[3], ObjectColumn)
+    assert store.rows()[2:-1] == ROWS[3:]
+
+def test_index_finds_values_not_nulls_in_their_place():
+    store = ColumnStore(ROWS)
+    assert store.index(0, 42) == 42
+    assert store.index(3, None) == 0
+    assert store.index(3, 0.6) == 6
+    # NULL rows hold 0 in the array, which isn't a match
+    assert store.index(3, 0.0) == -1
+    assert store.index(2, "NC-17") == -1
+    assert store.index(0, "42") == -1
+
+def test_copy_is_independent():
+    store = ColumnStore(ROWS)
+    copied = store.copy()
+    copied.set(0, 1, "Changed")
+    copied.set(0, 2, "X")
+    assert store.row(0) == ROWS[0]
+
+def test_extend_of_an_empty_store_picks_types():
+    store = ColumnStore([], ["movie_id", "title"])
+    store.extend([{"movie_id": 1, "title": "A"}, {"movie_id": 2, "title": "A"}])
+    assert isinstance(store.columns[0], IntColumn)
+    assert store.rows() == [{"movie_id": 1, "title": "A"}, {"movie_id": 2, "title": "A"}]
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    return tmp_path
+
+def test_snapshot_round_trip(snapshot_dir):
+    store = ColumnStore(ROWS)
+    snapshot.write_snapshot("movies", [["*", 1], ["movie", 3]], store)
+    token, loaded = snapshot.read_snapshot("movies")
+    assert token == [["*", 1], ["movie", 3]]
+    assert loaded.headers == store.headers
+    assert [type(column) for column in loaded.columns] == [type(column) for column in store.columns]
+    assert loaded.rows() == ROWS
+    # the loaded columns can be edited like fresh ones
+    loaded.set(0, 2, "R")
+    loaded.append(ROWS[1])
+    assert loaded.row(0)["age_rating"] == "R" and loaded.row(100) == ROWS[1]
+
+def test_empty_snapshot_round_trip(snapshot_dir):
+    snapshot.write_snapshot("empty", None, ColumnStore([]))
+    token, loaded = snapshot.read_snapshot("empty")
+    assert token is None and len(loaded) == 0
+
+def test_damaged_snapshots_are_ignored(snapshot_dir):
+    assert snapshot.read_snapshot("missing") is None
+    snapshot.write_snapshot("movies", None, ColumnStore(ROWS))
+    path = snapshot.snapshot_path("movies")
+    with open(path, "rb") as f:
+        data = f.read()
+    for damaged in (data[:12], b"NOTASNAP" + data[8:], data[:-8]):
+        with open(path, "wb") as f:
+            f.write(damaged)
+        assert snapshot.read_snapshot("movies") is None
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+
+from src.classes.filter_builder import (DATE, FLOAT, NUMBER, TEXT, YEAR, Predicate, build_query, parse_predicate,
+                                        predicate_sql)
+
+def test_plain_values_are_exact_matches():
+    assert parse_predicate(TEXT, " Drama ") == Predicate("eq", ["Drama"])
+    assert parse_predicate(NUMBER, "120") == Predicate("eq", [120])
+    assert parse_predicate(YEAR, "999") == Predicate("eq", ["0999"])
+
+def test_list_of_values():
+    assert parse_predicate(TEXT, "Drama | Comedy |") == Predicate("in", ["Drama", "Comedy"])
+    assert parse_predicate(NUMBER, "1|2") == Predicate("in", [1, 2])
+
+def test_list_of_ranges_is_an_or():
+    predicate = parse_predicate(TEXT, "The Sh* | *ring")
+    assert predicate == Predicate("any", [Predicate("prefix", ["The Sh"]), Predicate("contains", ["ring"])])
+    shape, params = predicate_sql(predicate)
+    assert shape == "(({col} LIKE %s ESCAPE '!') OR ({col} LIKE %s ESCAPE '!'))"
+    assert params == ["The Sh%", "%ring%"]
+
+def test_ranges():
+    assert parse_predicate(NUMBER, "1000000..5000000") == Predicate("between", [1000000, 5000000])
+    assert parse_predicate(YEAR, "1990..") == Predicate("ge", ["1990"])
+    assert parse_predicate(NUMBER, "..120") == Predicate("le", [120])
+
+def test_text_has_no_ranges():
+    assert parse_predicate(TEXT, "a..b") == Predicate("eq", ["a..b"])
+
+def test_float_equality_allows_for_rounding():
+    assert parse_predicate(FLOAT, "7.5") == Predicate("between", [7.45, 7.55])
+
+def test_dates_cover_a_year_or_a_day():
+    assert parse_predicate(DATE, "1970") == Predicate("dates", [datetime.date(1970, 1, 1), datetime.date(1971, 1, 1)])
+    assert parse_predicate(DATE, "1970-01-31..") == Predicate("dates", [datetime.date(1970, 1, 31), None])
+    assert predicate_sql(parse_predicate(DATE, "..1970")) == ("{col} < %s", [datetime.date(1971, 1, 1)])
+
+def test_like_wildcards_are_matched_literally():
+    assert predicate_sql(parse_predicate(TEXT, "100%_!*")) == ("{col} LIKE %s ESCAPE '!'", ["100!%!_!!%"])
+
+@pytest.mark.parametrize("kind, text", [
+    (NUMBER, "many"), (NUMBER, ".."), (TEXT, "*"), (TEXT, "|"), (DATE, "1970-02-30"), (DATE, "yesterday"),
+])
+def test_malformed_values_raise(kind, text):
+    with pytest.raises(ValueError):
+        parse_predicate(kind, text)
+
+def test_build_query_uses_the_base_tables():
+    query, params = build_query("movie_view", {"title": "Alien*", "runtime": "..120", "genres": ""})
+    assert query == ("SELECT * FROM movie_view WHERE (movie_id IN (SELECT movie_id FROM movie WHERE title LIKE %s ESCAPE '!')) "
+                     "AND (movie_id IN (SELECT movie_id FROM movie WHERE runtime <= %s))")
+    assert params == ["Alien%", 120]
+
+def test_build_query_names_the_bad_field():
+    with pytest.raises(ValueError, match="^budget: "):
+        build_query("movie_view", {"budget": "lots"})
@@ -0,0 +1,98 @@
+import pytest
+
+from src.classes.query_cache import ALL_TABLES, QueryCache, read_tables, statement_kind, written_tables
+
+def test_hit_after_put():
+    cache = QueryCache()
+    key = cache.key("SELECT * FROM  actor_view;")
+    assert cache.get(key) == (False, None)
+    cache.put(key, [{"actor_id": 1}], {"actor"})
+    assert cache.key("SELECT * FROM actor_view") == key
+    assert cache.get(key) == (True, [{"actor_id": 1}])
+
+def test_invalidate_drops_only_dependent_results():
+    cache = QueryCache()
+    cache.put("actors", [1], read_tables("SELECT * FROM actor_view"))
+    cache.put("awards", [2], read_tables("SELECT * FROM awards_view"))
+    cache.invalidate(written_tables("UPDATE actor SET actor_name = %s WHERE actor_id = %s"))
+    assert cache.get("actors") == (False, None)
+    assert cache.get("awards") == (True, [2])
+
+def test_parent_table_writes_invalidate_the_movie_view():
+    cache = QueryCache()
+    cache.put("movies", [1], read_tables("SELECT * FROM movie_view"))
+    # renaming a genre refreshes movie_summary through triggers
+    cache.invalidate(written_tables("UPDATE genre SET genre_name = %s WHERE genre_id = %s"))
+    assert cache.get("movies") == (False, None)
+
+def test_unknown_writes_invalidate_everything():
+    cache = QueryCache()
+    cache.put("actors", [1], {"actor"})
+    assert written_tables("RENAME TABLE actor TO cast_member") == {ALL_TABLES}
+    cache.invalidate({ALL_TABLES})
+    assert cache.get("actors") == (False, None)
+
+def test_put_after_an_invalidation_during_the_read_is_skipped():
+    cache = QueryCache()
+    generation = cache.generation()
+    cache.invalidate({"actor"})  # a write that finished while the read ran
+    cache.put("actors", [1], {"actor"}, generation)
+    assert cache.get("actors") == (False, None)
+    assert cache.stats()["stale_puts"] == 1
+
+def test_put_after_an_unrelated_invalidation_is_kept():
+    cache = QueryCache()
+    generation = cache.generation()
+    cache.invalidate({"awards"})
+    cache.put("actors", [1], {"actor"}, generation)
+    assert cache.get("actors") == (True, [1])
+
+def test_put_after_clear_is_skipped():
+    cache = QueryCache()
+    generation = cache.generation()
+    cache.clear()
+    cache.put("actors", [1], {"actor"}, generation)
+    assert cache.get("actors") == (False, None)
+
+def test_expired_entries_miss():
+    cache = QueryCache(ttl=-1)
+    cache.put("actors", [1], {"actor"})
+    assert cache.get("actors") == (False, None)
+
+def test_least_recently_used_is_evicted():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", [1], {"actor"})
+    cache.put("b", [2], {"actor"})
+    cache.get("a")
+    cache.put("c", [3], {"actor"})
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, [1])
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.parametrize("query, tables", [
+    ("TRUNCATE actor", {"actor"}),
+    ("truncate table `awards`", {"awards", "movie_summary"}),
+    ("ALTER TABLE watchlists ADD COLUMN x int", {"watchlists"}),
+    ("DROP VIEW IF EXISTS movie_view", {"movie_view"}),
+    ("CREATE OR REPLACE VIEW actor_view AS SELECT 1", {"actor_view"}),
+    ("LOAD DATA LOCAL INFILE %s INTO TABLE `watchlists` FIELDS TERMINATED BY ','", {"watchlists"}),
+    ("DROP TABLE a, b", {ALL_TABLES}),
+    ("CREATE TRIGGER t AFTER INSERT ON movie FOR EACH ROW SET @x = 1", {ALL_TABLES}),
+    ("DROP DATABASE moviedb", {ALL_TABLES}),
+])
+def test_schema_and_bulk_statements_are_writes(query, tables):
+    assert statement_kind(query) == "write"
+    assert written_tables(query) >= tables
+
+def test_truncate_invalidates_the_views_of_its_table():
+    cache = QueryCache()
+    cache.put("actors", [1], read_tables("SELECT * FROM actor_view"))
+    cache.invalidate(written_tables("TRUNCATE TABLE movie_cast"))
+    assert cache.get("actors") == (False, None)
+
+@pytest.mark.parametrize("query", ["SELECT NOW()", "SELECT LAST_INSERT_ID()", "SELECT @@version", "SELECT * FROM movie FOR UPDATE"])
+def test_selects_that_may_change_without_a_write_are_not_cached(query):
+    assert statement_kind(query) is None
+
+def test_reads_of_tables_are_cached():
+    assert statement_kind("SELECT COUNT(*) FROM movie_view") == "read"
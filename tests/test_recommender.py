@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from src.classes import recommender as recommender_module
+from src.classes.recommender import Recommender
+
+def features(count=200, seed=7):
+    rng = random.Random(seed)
+    return {movie_id: frozenset({("genre", rng.randrange(6)), ("genre", rng.randrange(6)),
+                                 ("actor", rng.randrange(40)), ("actor", rng.randrange(40)),
+                                 ("director", rng.randrange(25))})
+            for movie_id in range(1, count + 1)}
+
+def test_neighbours_share_rare_features():
+    recommender = Recommender({1: {("director", 1), ("genre", 1)}, 2: {("director", 1), ("genre", 2)},
+                               3: {("genre", 1)}, 4: {("genre", 3)}})
+    neighbours = recommender.neighbours(1)
+    assert [movie_id for movie_id, _ in neighbours] == [2, 3]
+    assert 0 < neighbours[1][1] < neighbours[0][1] <= 1
+    assert recommender.neighbours(4) == []
+    assert recommender.neighbours(99) == []
+
+def test_update_without_changes_recomputes_nothing():
+    movie_features = features()
+    recommender = Recommender(movie_features)
+    assert recommender.update(dict(movie_features)) == 0
+
+def test_update_matches_a_fresh_build(monkeypatch):
+    # weights of existing features are kept by update, so compare with equal weights
+    monkeypatch.setattr(Recommender, "_weight", staticmethod(lambda feature, movies_with, movies: 1.0))
+    movie_features = features()
+    recommender = Recommender(movie_features)
+    changed = dict(movie_features)
+    changed[5] = frozenset({("director", 3), ("actor", 11)})
+    changed[201] = frozenset({("director", 3), ("genre", 2)})
+    del changed[9]
+    assert recommender.update(changed) > 0
+    fresh = Recommender(changed)
+    for movie_id in changed:
+        assert [score for _, score in recommender.neighbours(movie_id)] == \
+            pytest.approx([score for _, score in fresh.neighbours(movie_id)])
+    assert recommender.neighbours(9) == []
+    assert all(other != 9 for movie_id in changed for other, _ in recommender.neighbours(movie_id))
+
+def test_many_changes_rebuild_everything():
+    movie_features = features()
+    recommender = Recommender(movie_features)
+    changed = features(seed=8)
+    assert recommender.update(changed) == len(changed)
+    assert recommender.neighbours(1) == Recommender(changed).neighbours(1)
+
+def test_update_of_a_copy_leaves_the_original_alone():
+    movie_features = features()
+    recommender = Recommender(movie_features, titles={1: "One"})
+    before = {movie_id: recommender.neighbours(movie_id) for movie_id in movie_features}
+    copy = recommender.copy()
+    changed = dict(movie_features)
+    del changed[1]
+    copy.update(changed, titles={})
+    assert copy.neighbours(1) == []
+    assert recommender.titles == {1: "One"}
+    assert all(recommender.neighbours(movie_id) == before[movie_id] for movie_id in movie_features)
+
+def test_recommend_leaves_out_the_watchlist_and_weights_by_rating():
+    recommender = Recommender({1: {("director", 1)}, 2: {("director", 1)}, 3: {("director", 2)}, 4: {("director", 2)}})
+    recommended = dict(recommender.recommend([(1, recommender_module.MAX_RATING), (3, 1)]))
+    assert set(recommended) == {2, 4}
+    assert recommended[2] > recommended[4]
+    assert recommender.recommend([(1, 0)]) == []
@@ -0,0 +1,44 @@
+from src.classes.column_store import ColumnStore
+from src.classes.search_index import TrigramIndex
+
+ROWS = [
+    {"title": "The Shining", "director": "Stanley Kubrick", "year": 1980},
+    {"title": "Alien", "director": "Ridley Scott", "year": 1979},
+    {"title": "Shine", "director": None, "year": 1996},
+]
+
+def index():
+    return TrigramIndex.fromRows(ROWS, ["title", "director", "year"])
+
+def test_substring_search_ignores_case():
+    assert index().search("SHIN") == {0, 2}
+    assert index().search("kubrick") == {0}
+    assert index().search("1979") == {1}
+
+def test_short_queries_check_every_row():
+    assert index().search("li") == {1}
+    assert index().search("") == {0, 1, 2}
+
+def test_no_match_across_columns():
+    assert index().search("ngstan") == set()
+    assert index().search("en\x1frid") == set()
+
+def test_search_within_columns():
+    assert index().search("ri", columns=[1]) == {0, 1}
+    assert index().search("ri", columns=[0]) == set()
+
+def test_search_within_earlier_results():
+    search = index()
+    assert search.search("shini", within=search.search("shin")) == {0}
+
+def test_edits_and_removals():
+    search = index()
+    search.update(1, ["Aliens", "James Cameron", 1986])
+    assert search.search("scott") == set()
+    assert search.search("cameron") == {1}
+    search.remove(0)
+    assert search.search("shin") == {2}
+
+def test_from_store_matches_from_rows():
+    store = ColumnStore(ROWS)
+    assert TrigramIndex.fromStore(store).texts == index().texts
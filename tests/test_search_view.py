@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from src.classes.sqlite_backend import SQLiteBackend
+
+SCHEMA = os.path.join(os.path.dirname(__file__), os.pardir, "database_files", "movie_sqlite.sql")
+
+@pytest.fixture
+def database(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "movies.sqlite3"))
+    assert backend.apply_schema(SCHEMA)
+    connection = backend.connect()
+    connection.execute("INSERT INTO movie VALUES (1, 'The Dark Knight', 0, 0, '2008', 152, 'PG-13', 9.0), "
+                       "(2, 'Memento', 0, 0, '2000', 113, 'R', 8.4), (3, 'Knight Moves', 0, 0, '1992', 116, 'R', 5.9)")
+    connection.execute("INSERT INTO genre VALUES (1, 'Thriller')")
+    connection.execute("INSERT INTO movie_genre VALUES (1, 2)")
+    connection.execute("INSERT INTO actor VALUES (1, 'Guy Pearce', 'Male', '1967-10-05', 'UK')")
+    connection.execute("INSERT INTO director VALUES (1, 'Christopher Nolan', 'Male', '1970-07-30', 'UK'), "
+                       "(2, 'Carl Schenkel', 'Male', '1948-05-08', 'CH')")
+    connection.execute("INSERT INTO movie_cast VALUES (1, 1, 1), (2, 1, 1), (3, 1, 2)")
+    connection.execute("INSERT INTO production_company VALUES (1, 'Syncopy', 3, '2001-01-01')")
+    connection.execute("INSERT INTO movie_company VALUES (1, 1)")
+    with backend.cursor(connection) as cursor:
+        cursor.execute("CALL refresh_movie_summary(NULL)")
+    yield backend, connection
+    connection.close()
+
+def search(database, view_name, text):
+    backend, connection = database
+    with backend.cursor(connection) as cursor:
+        cursor.execute("CALL search_view(%s, %s, %s)", [view_name, text, 10])
+        return [row["movie_id"] for row in cursor.fetchall()]
+
+def test_movies_match_their_linked_names(database):
+    assert search(database, "movie_view", "knight") == [3, 1]
+    assert sorted(search(database, "movie_view", "nolan")) == [1, 2]
+    assert search(database, "movie_view", "thrill") == [2]
+    assert search(database, "movie_view", "syncopy") == [1]
+
+def test_every_word_matches_in_one_name(database):
+    assert sorted(search(database, "movie_view", "christopher nolan")) == [1, 2]
+    # one word in the title and one in the director's name isn't a match
+    assert search(database, "movie_view", "memento nolan") == []
@@ -0,0 +1,132 @@
+import os
+import time
+
+import pytest
+
+from src.classes.sqlite_backend import SQLiteBackend
+from src.classes.unit_of_work import UnitOfWork
+
+SCHEMA = os.path.join(os.path.dirname(__file__), os.pardir, "database_files", "movie_sqlite.sql")
+
+def entry(movie_id, rating=3, comment=None, last_edited=None):
+    return {"watchlist_id": 1, "movie_id": movie_id, "rating": rating, "comment": comment, "last_edited": last_edited}
+
+# coalescing
+
+def test_repeated_edits_are_one_update():
+    work = UnitOfWork()
+    work.recordUpdate(entry(1, last_edited="v1"), {"rating": 4})
+    work.recordUpdate(entry(1, rating=4), {"comment": "good", "movie_name": "ignored"})
+    assert work.updates == {(1, 1): {"rating": 4, "comment": "good"}}
+    assert work.versions == {(1, 1): "v1"}
+    assert len(work) == 1
+
+def test_edits_of_a_new_row_go_into_its_insert():
+    work = UnitOfWork()
+    work.recordInsert(entry(1, rating=None))
+    work.recordUpdate(entry(1, rating=None), {"rating": 5})
+    assert work.inserts == {(1, 1): {"rating": 5, "comment": None}}
+    assert not work.updates
+
+def test_added_then_deleted_is_never_written():
+    work = UnitOfWork()
+    work.recordInsert(entry(1))
+    work.recordUpdate(entry(1), {"rating": 1})
+    work.recordDelete(entry(1))
+    assert not work.isDirty()
+
+def test_delete_keeps_the_version_the_row_was_loaded_with():
+    work = UnitOfWork()
+    work.recordUpdate(entry(1, last_edited="v1"), {"rating": 4})
+    work.recordDelete(entry(1, rating=4, last_edited="v2"))
+    assert work.deletes == {(1, 1): "v1"}
+    assert not work.updates and not work.versions
+
+def test_deleted_then_added_back_is_an_update():
+    work = UnitOfWork()
+    work.recordDelete(entry(1, last_edited="v1"))
+    work.recordInsert(entry(1, rating=2))
+    assert work.updates == {(1, 1): {"rating": 2, "comment": None}}
+    assert work.versions == {(1, 1): "v1"}
+    assert not work.deletes and not work.inserts
+
+def test_unknown_columns_are_not_recorded():
+    work = UnitOfWork()
+    work.recordUpdate(entry(1), {"movie_name": "x"})
+    assert not work.isDirty()
+
+# flushing against the SQLite schema, whose triggers set last_edited
+
+@pytest.fixture
+def database(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "movies.sqlite3"))
+    assert backend.apply_schema(SCHEMA)
+    connection = backend.connect()
+    connection.execute("INSERT INTO movie VALUES (1, 'One', 0, 0, '2000', 90, 'PG', 7.0), "
+                       "(2, 'Two', 0, 0, '2001', 95, 'R', 6.0), (3, 'Three', 0, 0, '2002', 100, 'G', 5.0)")
+    connection.execute("INSERT INTO watchlists (watchlist_id, name) VALUES (1, 'Mine')")
+    connection.execute("INSERT INTO watchlist_entries (watchlist_id, movie_id, rating) VALUES (1, 1, 3), (1, 2, 3)")
+    yield backend, connection
+    connection.close()
+
+def flush(backend, connection, work):
+    backend.begin(connection)
+    with backend.cursor(connection) as cursor:
+        result = work.flush(cursor)
+    connection.commit()
+    return result
+
+def stored(backend, connection, movie_id):
+    with backend.cursor(connection) as cursor:
+        cursor.execute("SELECT * FROM watchlist_entries WHERE watchlist_id = 1 AND movie_id = %s", [movie_id])
+        return cursor.fetchone()
+
+def test_flush_writes_every_change(database):
+    backend, connection = database
+    work = UnitOfWork()
+    work.recordInsert(entry(3, rating=5))
+    work.recordUpdate(stored(backend, connection, 1), {"comment": "again"})
+    work.recordDelete(stored(backend, connection, 2))
+    result = flush(backend, connection, work)
+    assert result.ok
+    assert set(result.saved) == {(1, 3), (1, 1)}
+    assert result.saved[(1, 1)]["last_edited"] is not None
+    assert stored(backend, connection, 1)["comment"] == "again"
+    assert stored(backend, connection, 2) is None
+    assert stored(backend, connection, 3)["rating"] == 5
+    # clearing is left to the caller, after the commit
+    assert work.isDirty()
+
+def test_rows_changed_elsewhere_are_conflicts(database):
+    backend, connection = database
+    loaded = stored(backend, connection, 1)
+    work = UnitOfWork()
+    work.recordUpdate(loaded, {"rating": 1})
+    connection.execute("UPDATE watchlist_entries SET comment = 'elsewhere' WHERE movie_id = 1")
+    result = flush(backend, connection, work)
+    assert set(result.conflicts) == {(1, 1)}
+    assert result.conflicts[(1, 1)]["comment"] == "elsewhere"
+    assert stored(backend, connection, 1)["rating"] == 3
+
+def test_edits_within_the_same_second_still_conflict(database):
+    backend, connection = database
+    connection.execute("UPDATE watchlist_entries SET rating = 4 WHERE movie_id = 1")
+    loaded = stored(backend, connection, 1)
+    time.sleep(0.005)
+    connection.execute("UPDATE watchlist_entries SET rating = 5 WHERE movie_id = 1")
+    work = UnitOfWork()
+    work.recordUpdate(loaded, {"comment": "stale"})
+    assert set(flush(backend, connection, work).conflicts) == {(1, 1)}
+
+def test_deleted_elsewhere_is_a_conflict(database):
+    backend, connection = database
+    loaded = stored(backend, connection, 2)
+    connection.execute("DELETE FROM watchlist_entries WHERE movie_id = 2")
+    work = UnitOfWork()
+    work.recordDelete(loaded)
+    work.recordInsert(entry(1, rating=2))
+    result = flush(backend, connection, work)
+    assert result.conflicts[(1, 2)] is None
+    # the row to insert already exists
+    assert result.conflicts[(1, 1)]["rating"] == 3
+    assert not result.saved